@@ -0,0 +1,29 @@
+"""
+ICC2 Log Viewer package
+
+Modules:
+  icc2_log_viewer       - Extract and display the commands and QoR of an ICC2 log
+  icc2_log_comparator   - Compare the QoR of two ICC2 logs
+  icc2_log_recompressor - Recompress the logs of a flow directory to seekable files
+  icc2_log_daemon       - Keep parsed logs in memory for the viewer and comparator
+  icc2_log_client       - Run the viewer or comparator by the daemon, or in process
+
+Library API, see icc2_log_viewer.parse:
+  import icc2_log_viewer
+  for m in icc2_log_viewer.parse('place_opt.out', categories=['cmd', 'qor']):
+    print(m.ln, m.tag, icc2_log_viewer.to_dict(m))
+
+Modules are imported when first used, so that a console script only pays for
+the modules it uses
+"""
+
+API = ('parse', 'to_dict') # of the icc2_log_viewer module
+
+
+# Author: Deyuan Guo
+# Import the icc2_log_viewer module for the library API when it is used
+def __getattr__(name):
+  if name in API:
+    from . import icc2_log_viewer
+    return getattr(icc2_log_viewer, name)
+  raise AttributeError('module ' + repr(__name__) + ' has no attribute ' + repr(name))
@@ -0,0 +1,5 @@
+# Author: Deyuan Guo
+# Entry of python3 -m icc2_log_viewer <args>
+from .icc2_log_client import icc2_log_viewer
+
+icc2_log_viewer()
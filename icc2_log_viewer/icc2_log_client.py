@@ -0,0 +1,173 @@
+#!/remote/us01home46/dguo/bin/python3
+# -*- coding: utf-8 -*-
+"""
+File: icc2_log_client.py
+Brief:
+  Entry of icc2_log_viewer and icc2_log_comparator. The command line is sent
+  to a running icc2_log_daemon.py, which keeps parsed logs in memory, and its
+  output is written here. Without a daemon the viewer or comparator runs in
+  this process. Only sys and os are imported before that, so a query served
+  by the daemon does not pay for importing the viewer
+  Usage: python3 icc2_log_client.py viewer|comparator <args>
+
+Author:  Deyuan Guo <dguo@synopsys.com>
+Manager: Jeng-Liang Tsai <jengt@synopsys.com>
+Team:    ICC2 Optimization Team @ Synopsys, Inc.
+
+SYNOPSYS CONFIDENTIAL - This is an unpublished, proprietary work of
+Synopsys, Inc., and is fully protected under copyright and trade
+secret laws. You may not view, use, disclose, copy, or distribute this
+file or any information contained herein except pursuant to a valid
+written license from Synopsys.
+
+File history:
+  10/18/2026 Created
+"""
+
+import sys
+import os
+
+
+##############################################################################
+
+# Author: Deyuan Guo
+# Client of icc2_log_daemon.py. The request is the program name, working
+# directory, whether stdout is a terminal and argv, separated by NUL bytes
+# and ended by closing the write side. The response is a sequence of frames:
+# a channel byte, a 4-byte big-endian length and the data. The EXIT frame
+# holds the exit status and ends the response
+class DaemonClient:
+  SOCKET = os.environ.get('ICC2_LOG_VIEWER_SOCKET',
+                          os.path.join(os.environ.get('ICC2_LOG_VIEWER_CACHE',
+                                                      os.path.join(os.path.expanduser('~'), '.cache', 'icc2_log_viewer')),
+                                       'daemon.sock')) # in ParseCache.DIR, '' to never use a daemon
+  EXIT = 0
+  STDOUT = 1
+  STDERR = 2
+  LOCAL_OPTIONS = ('-tui', '-follow') # need the terminal or run until Ctrl-C
+
+
+  # Return True if the command line can be served by the daemon. Help
+  # messages, -tui, -follow and logs read from stdin are run in this process
+  @staticmethod
+  def can_serve(args):
+    if len(list(filter(len, args))) == 0:
+      return False
+    for arg in args:
+      if arg == '-':
+        return False
+      for option in DaemonClient.LOCAL_OPTIONS:
+        if len(arg) > 2 and option.startswith(arg): # argparse accepts prefixes
+          return False
+    return True
+
+
+  # Run the command line of program by the daemon if it can serve it.
+  # Return the exit status, or None if it is not run
+  @staticmethod
+  def run(program, argv):
+    if not DaemonClient.can_serve(argv[1:]):
+      return None
+    return DaemonClient.request(program, argv)
+
+
+  # Send a request to the daemon and write its output. Return the exit
+  # status, or None if no daemon is running
+  @staticmethod
+  def request(program, argv):
+    if DaemonClient.SOCKET == '':
+      return None
+    import _socket # socket imports enum, which costs more than the query
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+      try:
+        sock.connect(DaemonClient.SOCKET)
+        fields = [program.encode('ascii'), os.fsencode(os.getcwd()), b'1' if sys.stdout.isatty() else b'0']
+      except OSError: # no daemon, a stale socket of a stopped daemon, or no cwd
+        return None
+      sock.sendall(b'\0'.join(fields + [os.fsencode(arg) for arg in argv]))
+      sock.shutdown(_socket.SHUT_WR)
+      return DaemonClient.receive(sock)
+    finally:
+      sock.close()
+
+
+  # Write the output frames of the daemon, return the exit status
+  @staticmethod
+  def receive(sock):
+    streams = {DaemonClient.STDOUT: sys.stdout, DaemonClient.STDERR: sys.stderr}
+    data = b''
+    while True:
+      block = sock.recv(1 << 16)
+      if block == b'':
+        break
+      data += block
+      while len(data) >= 5:
+        size = int.from_bytes(data[1:5], 'big')
+        if len(data) < 5 + size:
+          break
+        channel, payload = data[0], data[5:5 + size]
+        data = data[5 + size:]
+        if channel == DaemonClient.EXIT:
+          return int(payload)
+        stream = streams[channel]
+        stream.flush()
+        stream.buffer.write(payload) # bytes as the daemon wrote them
+        stream.buffer.flush()
+    print('Error: icc2_log_daemon closed the connection', file=sys.stderr)
+    return 1
+
+
+  # One output frame
+  @staticmethod
+  def pack(channel, data):
+    return bytes([channel]) + len(data).to_bytes(4, 'big') + data
+
+
+  # Run program in this process
+  @staticmethod
+  def run_local(program):
+    import importlib
+    name = 'icc2_log_' + program
+    if __package__:
+      module = importlib.import_module('.' + name, __package__)
+    else: # run as a script, not from the icc2_log_viewer package
+      module = importlib.import_module(name)
+    getattr(module, name)()
+    return
+
+
+  # Entry of program, served by the daemon if it is running
+  @staticmethod
+  def main(program):
+    sys.tracebacklimit = 0
+    status = DaemonClient.run(program, sys.argv)
+    if status == None:
+      DaemonClient.run_local(program)
+      return
+    sys.exit(status)
+
+
+##############################################################################
+
+# Author: Deyuan Guo
+def icc2_log_viewer():
+  DaemonClient.main('viewer')
+  return
+
+
+# Author: Deyuan Guo
+def icc2_log_comparator():
+  DaemonClient.main('comparator')
+  return
+
+
+# Entry
+if __name__ ==  '__main__' :
+  program = sys.argv.pop(1) if len(sys.argv) > 1 else ''
+  if program not in ('viewer', 'comparator'):
+    print('Usage: python3 icc2_log_client.py viewer|comparator <args>')
+    sys.exit(2)
+  # argparse shows the name of the module that is run
+  sys.argv[0] = os.path.join(os.path.dirname(sys.argv[0]), 'icc2_log_' + program + '.py')
+  DaemonClient.main(program)
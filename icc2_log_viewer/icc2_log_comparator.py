@@ -1,10 +1,10 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 File: icc2_log_comparator.py
 Brief:
   A script to help to compare two ICC2 log files
-  Usage: python-2.7 icc2_log_comparator.py <args>
+  Usage: python3 icc2_log_comparator.py <args>
 
 Author:  Deyuan Guo <dguo@synopsys.com>
 Manager: Jeng-Liang Tsai <jengt@synopsys.com>
@@ -25,15 +25,19 @@ File history:
   12/10/2017 Support -regex option
   12/18/2017 Support more than two QoR categories
   02/01/2018 Fix a minor issue when showing help messages
+  10/18/2026 Reuse parse results of unchanged logs from the parse cache
+  10/18/2026 Support repeated -regex and -regex-file
+  10/18/2026 Port to Python 3 as a package with console scripts
+  10/18/2026 Set up viewers with ICC2LogViewer.set_categories, as parse() does
 """
 
 import sys
 import os
-import gzip
 import re
-import argparse
-import itertools
-import icc2_log_viewer as V
+try:
+  from . import icc2_log_viewer as V
+except ImportError: # run as a script, not from the icc2_log_viewer package
+  import icc2_log_viewer as V
 
 Version = '20180201'
 
@@ -43,6 +47,7 @@ Version = '20180201'
 # Author: Deyuan Guo
 # ICC2 Log Comparator
 class ICC2LogComparator:
+  CATEGORIES = ('cmd', 'cts', 'flow', 'gr', 'lgl', 'dft', 'qor') # extracted from both logs
 
   # Constructor
   def __init__(self):
@@ -57,6 +62,7 @@ class ICC2LogComparator:
     self.runtime = False
     self.setup = False
     self.regex = None
+    self.use_cache = True
     self.colored = True
     self.tot_width = 0
     self.col_width = {}
@@ -79,58 +85,58 @@ class ICC2LogComparator:
 
   # Run
   def run(self):
-    if len(filter(len, sys.argv)) <= 2:
-      print '------------------------------------'
-      print ' ICC2 Log Comparator (ver.' + Version + ') '
-      print ' Deyuan Guo <dguo@synopsys.com> '
-      print '------------------------------------'
-      print
+    if len(list(filter(len, sys.argv))) <= 2:
+      print('------------------------------------')
+      print(' ICC2 Log Comparator (ver.' + Version + ') ')
+      print(' Deyuan Guo <dguo@synopsys.com> ')
+      print('------------------------------------')
+      print()
       self.parser.print_help()
-      print
+      print()
       return
 
-    print 'Info: ICC2 Log Comparator (ver.' + Version + ')'
+    print('Info: ICC2 Log Comparator (ver.' + Version + ')')
     ok = self.parse_args()
     if not ok:
       return
 
     #print 'Info: Parsing log file 1 ...'
-    v1 = V.ICC2LogViewer()
-    v1.log = self.log1
-    v1.cmd = True
-    v1.cts = True
-    v1.flow = True
-    v1.gr = True
-    v1.lgl = True
-    v1.dft = True
-    v1.qor = True
-    v1.regex = self.regex
-    v1.load_file()
-    v1.parse_log_file()
-
+    v1 = self.load_viewer(self.log1)
     #print 'Info: Parsing log file 2 ...'
-    v2 = V.ICC2LogViewer()
-    v2.log = self.log2
-    v2.cmd = True
-    v2.cts = True
-    v2.flow = True
-    v2.gr = True
-    v2.lgl = True
-    v2.dft = True
-    v2.qor = True
-    v2.regex = self.regex
-    v2.load_file()
-    v2.parse_log_file()
+    v2 = self.load_viewer(self.log2)
 
     self.show(v1, v2)
+    v1.release_logs()
+    v2.release_logs()
     return
 
 
+  # Viewer of a log with the compared information extracted, as parse() of
+  # icc2_log_viewer.py but with its file information shown
+  def load_viewer(self, log):
+    v = V.ICC2LogViewer()
+    v.log = log
+    v.set_categories(ICC2LogComparator.CATEGORIES, self.regex)
+    v.use_cache = self.use_cache
+    v.fields = self.get_fields()
+    v.load_info()
+    return v
+
+
+  # Optional fields of data models needed by the compared categories
+  def get_fields(self):
+    fields = ['name']
+    if self.runtime:
+      fields.append('elapsed')
+    return fields
+
+
   # Create argparse object
   def create_argparse(self):
+    import argparse
     parser = argparse.ArgumentParser(add_help=False)
-    parser.add_argument('log1',         help='ICC2 log file 1', type=argparse.FileType('r'))
-    parser.add_argument('log2',         help='ICC2 log file 2', type=argparse.FileType('r'))
+    parser.add_argument('log1',         help='ICC2 log file 1', type=argparse.FileType('rb'))
+    parser.add_argument('log2',         help='ICC2 log file 2', type=argparse.FileType('rb'))
 
     #group = parser.add_mutually_exclusive_group()
     parser.add_argument('-s', '-setup',     help='compare (S)etup timing (default)', action='store_true')
@@ -141,15 +147,17 @@ class ICC2LogComparator:
     parser.add_argument('-p', '-power',     help='compare (P)ower: leakage and lvth', action='store_true')
     parser.add_argument('-r', '-runtime',   help='compare (R)untime and peak memory', action='store_true')
 
-    parser.add_argument('-regex',       help='show lines that can match with a RegEx expression', type=str)
+    parser.add_argument('-regex',       help='show lines that can match with a RegEx expression (repeatable)', type=str, action='append')
+    parser.add_argument('-regex-file',  help='show lines that can match with RegEx expressions in FILE, one per line', type=str, metavar='FILE')
     parser.add_argument('--help',       help='show this help message and exit', action='help')
+    parser.add_argument('--no-cache',   help='do not read or write the parse cache', action='store_true')
     parser.add_argument('--no-color',   help='turn off color decorations for output redirection', action='store_true')
     return parser
 
 
   # Parse command line auguments
   def parse_args(self):
-    args = self.parser.parse_args(filter(len, sys.argv[1:]))
+    args = self.parser.parse_args(list(filter(len, sys.argv[1:])))
     self.log1 = args.log1
     self.log2 = args.log2
     self.setup = args.s
@@ -159,8 +167,9 @@ class ICC2LogComparator:
     self.buf = args.b
     self.power = args.p
     self.runtime = args.r
-    self.regex = args.regex
-    self.colored = not args.no_color
+    self.regex = V.ICC2LogViewer.get_regexes(self.parser, args.regex, args.regex_file)
+    self.use_cache = not args.no_cache
+    self.colored = not args.no_color and sys.stdout.isatty()
 
     count = 0
     if self.area:    count += 1
@@ -186,7 +195,7 @@ class ICC2LogComparator:
     cols = ['WNS', 'TNS', 'NSV', 'WHS', 'THS', 'NHV', 'AREA', '#INST', 'MTRAN', 'MTV', 'MCAP', 'MCV', '#BUF', '#INV', 'LEAKAGE', '#LVTH', '%LVTH', 'ELAPSED', 'INCR', 'MEM']
     for col in cols:
       self.col_width[col] = len(col)
-    for m in itertools.chain(v1.info.values(), v2.info.values()):
+    for m in list(v1.info.values()) + list(v2.info.values()):
       if m.TAG == 'QOR':
         self.update_width('WNS',     m.wns)
         self.update_width('TNS',     m.tns)
@@ -268,8 +277,8 @@ class ICC2LogComparator:
     fn1 = self.log1.name.ljust(self.get_tot_width())[:self.get_tot_width()]
     fn2 = self.log2.name.ljust(self.get_tot_width())[:self.get_tot_width()]
 
-    print fn1 + self.get_sep() + fn2
-    print header + self.get_sep() + header
+    print(fn1 + self.get_sep() + fn2)
+    print(header + self.get_sep() + header)
     return
 
 
@@ -376,13 +385,13 @@ class ICC2LogComparator:
       return
 
     if len(v1.info) > 1000 or len(v2.info) > 1000:
-      print "Warning: There are more than 1000 lines of results. Finding best match may be slow"
+      print("Warning: There are more than 1000 lines of results. Finding best match may be slow")
 
     # determine column width and window width of each side
     self.determine_width(v1, v2)
 
     # print header
-    print
+    print()
     self.cprint_header()
 
     # find best match
@@ -437,9 +446,9 @@ class ICC2LogComparator:
 
       left = self.compose_line(m1)
       right = self.compose_line(m2)
-      print left + self.get_sep() + right
+      print(left + self.get_sep() + right)
 
-    print
+    print()
     return
 
 
@@ -448,6 +457,7 @@ class ICC2LogComparator:
 # Author: Deyuan Guo
 def icc2_log_comparator():
   sys.tracebacklimit = 0
+  sys.stdout.reconfigure(errors='surrogateescape') # log bytes are written unchanged
   comparator = ICC2LogComparator()
   comparator.run()
   return
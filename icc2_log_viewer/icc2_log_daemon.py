@@ -0,0 +1,341 @@
+#!/remote/us01home46/dguo/bin/python3
+# -*- coding: utf-8 -*-
+"""
+File: icc2_log_daemon.py
+Brief:
+  A resident server of icc2_log_viewer and icc2_log_comparator on a local
+  Unix domain socket. Parsed logs are kept in memory, least recently used
+  ones are dropped beyond -max-memory, so repeated queries on the same logs
+  pay neither interpreter startup nor parsing. icc2_log_client.py sends the
+  command lines and falls back to running them itself without a daemon
+  Usage: python3 icc2_log_daemon.py [-max-memory MB] [-status] [-stop]
+
+Author:  Deyuan Guo <dguo@synopsys.com>
+Manager: Jeng-Liang Tsai <jengt@synopsys.com>
+Team:    ICC2 Optimization Team @ Synopsys, Inc.
+
+SYNOPSYS CONFIDENTIAL - This is an unpublished, proprietary work of
+Synopsys, Inc., and is fully protected under copyright and trade
+secret laws. You may not view, use, disclose, copy, or distribute this
+file or any information contained herein except pursuant to a valid
+written license from Synopsys.
+
+File history:
+  10/18/2026 Created
+"""
+
+import sys
+import os
+import socket
+import collections
+import time
+try:
+  from . import icc2_log_viewer as V
+  from . import icc2_log_comparator as C
+  from .icc2_log_client import DaemonClient
+except ImportError: # run as a script, not from the icc2_log_viewer package
+  import icc2_log_viewer as V
+  import icc2_log_comparator as C
+  from icc2_log_client import DaemonClient
+
+Version = '20261018'
+
+
+##############################################################################
+
+# Author: Deyuan Guo
+# In-memory ParseCache entries (file_info, info) of parsed logs, the parse
+# result of an ICC2LogViewer, with the same keys as the on-disk cache. Least
+# recently used entries are dropped beyond max_bytes
+class MemoryCache:
+
+  # Constructor
+  def __init__(self, max_bytes):
+    self.max_bytes = max_bytes
+    self.num_bytes = 0
+    self.entries = collections.OrderedDict() # key -> (entry, size)
+    return
+
+
+  # Entry of key, None if it is not kept
+  def get(self, key):
+    item = self.entries.get(key)
+    if item == None:
+      return None
+    self.entries.move_to_end(key)
+    return item[0]
+
+
+  # Keep entry of key, return False if it is larger than max_bytes
+  def put(self, key, entry):
+    old = self.entries.pop(key, None)
+    if old != None:
+      self.num_bytes -= old[1]
+    size = MemoryCache.get_size(entry)
+    if size > self.max_bytes:
+      return False
+    self.entries[key] = (entry, size)
+    self.num_bytes += size
+    while self.num_bytes > self.max_bytes:
+      key, (entry, size) = self.entries.popitem(last=False)
+      self.num_bytes -= size
+    return True
+
+
+  # Approximate bytes of an entry: data models, their attributes and the
+  # first lines of the log. Objects held by attributes are not counted
+  @staticmethod
+  def get_size(entry):
+    file_info, info = entry
+    num_lines, head, complete = file_info
+    size = sys.getsizeof(info) + sys.getsizeof(head) + sum([sys.getsizeof(line) for line in head])
+    for m in info.values():
+      size += sys.getsizeof(m)
+      for attr in m.__slots__:
+        size += sys.getsizeof(getattr(m, attr, None))
+    return size
+
+
+# Author: Deyuan Guo
+# Output of a request, in place of sys.stdout or sys.stderr. Text is sent to
+# the client in frames of up to BUFFER_SIZE bytes, when flushed or at the end
+# of the request
+class DaemonStream:
+  BUFFER_SIZE = 1 << 16
+
+  # Constructor
+  def __init__(self, conn, channel, tty):
+    self.conn = conn
+    self.channel = channel
+    self.tty = tty       # stdout of the client is a terminal
+    self.parts = []
+    self.size = 0
+    self.pid = os.getpid() # processes forked by -jobs never send
+    return
+
+
+  def write(self, text):
+    data = text.encode('utf-8', 'surrogateescape') # log bytes are written unchanged
+    self.parts.append(data)
+    self.size += len(data)
+    if self.size >= DaemonStream.BUFFER_SIZE:
+      self.flush()
+    return len(text)
+
+
+  def flush(self):
+    if self.size == 0 or os.getpid() != self.pid:
+      return
+    data = b''.join(self.parts)
+    self.parts = []
+    self.size = 0
+    self.conn.sendall(DaemonClient.pack(self.channel, data))
+    return
+
+
+  def isatty(self):
+    return self.tty
+
+
+##############################################################################
+
+# Author: Deyuan Guo
+# ICC2 Log Daemon. Requests are served one at a time, each in the working
+# directory and with the argv of its client
+class ICC2LogDaemon:
+  REQUEST_TIMEOUT = 10 # seconds to receive a request
+
+  # Constructor
+  def __init__(self):
+    self.parser = self.create_argparse()
+    self.max_memory = 1024 # MB
+    self.status = False
+    self.stop = False
+    self.stopping = False
+    self.memory = None
+    self.start_time = time.time()
+    self.num_requests = 0
+    return
+
+
+  # Run
+  def run(self):
+    args = self.parser.parse_args(list(filter(len, sys.argv[1:])))
+    self.max_memory = args.max_memory
+    self.status = args.status
+    self.stop = args.stop
+
+    if self.status or self.stop:
+      program = 'stop' if self.stop else 'status'
+      if DaemonClient.request(program, [sys.argv[0]]) == None:
+        print('Info: No ICC2 Log Daemon is running on ' + DaemonClient.SOCKET)
+      return
+
+    print('Info: ICC2 Log Daemon (ver.' + Version + ')')
+    if DaemonClient.SOCKET == '':
+      print('Error: ICC2_LOG_VIEWER_SOCKET is empty')
+      return
+    server = self.listen(DaemonClient.SOCKET)
+    if server == None:
+      return
+    print('Info: Listening on ' + DaemonClient.SOCKET + ', up to ' + str(self.max_memory) + ' MB of parsed logs')
+    sys.stdout.flush()
+
+    self.memory = MemoryCache(self.max_memory << 20)
+    V.ParseCache.memory = self.memory
+    try:
+      while not self.stopping:
+        conn, addr = server.accept()
+        try:
+          self.serve(conn)
+        except OSError: # the client is gone, e.g. Ctrl-C
+          pass
+        finally:
+          conn.close()
+    finally:
+      server.close()
+      os.remove(DaemonClient.SOCKET)
+    print('Info: ICC2 Log Daemon stopped after ' + str(self.num_requests) + ' requests')
+    return
+
+
+  # Create argparse object
+  def create_argparse(self):
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-max-memory', help='MB of parsed logs kept in memory (default: 1024)', type=int, default=1024, metavar='MB')
+    parser.add_argument('-status',     help='show the status of the running daemon', action='store_true')
+    parser.add_argument('-stop',       help='stop the running daemon', action='store_true')
+    return parser
+
+
+  # Listening socket at path, None if another daemon is running there. Only
+  # the user can connect, as requests read files with the user's permission
+  def listen(self, path):
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+      probe.connect(path)
+      print('Error: An ICC2 Log Daemon is already running on ' + path)
+      return None
+    except OSError: # not running, remove a stale socket
+      if os.path.exists(path):
+        os.remove(path)
+    finally:
+      probe.close()
+
+    directory = os.path.dirname(path)
+    if directory != '' and not os.path.isdir(directory):
+      os.makedirs(directory, 0o700)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o077)
+    try:
+      server.bind(path)
+    finally:
+      os.umask(umask)
+    server.listen(16)
+    return server
+
+
+  # Serve a request on connection conn
+  def serve(self, conn):
+    conn.settimeout(ICC2LogDaemon.REQUEST_TIMEOUT)
+    blocks = []
+    while True:
+      block = conn.recv(1 << 16)
+      if block == b'':
+        break
+      blocks.append(block)
+    conn.settimeout(None)
+    fields = b''.join(blocks).split(b'\0')
+    if len(fields) < 4:
+      return False
+    program = fields[0].decode('ascii', 'replace')
+    cwd = os.fsdecode(fields[1])
+    argv = [os.fsdecode(arg) for arg in fields[3:]]
+    self.num_requests += 1
+
+    out = DaemonStream(conn, DaemonClient.STDOUT, fields[2] == b'1')
+    err = DaemonStream(conn, DaemonClient.STDERR, False)
+    saved = (sys.stdout, sys.stderr, sys.argv, os.getcwd())
+    sys.stdout, sys.stderr, sys.argv = out, err, argv
+    try:
+      os.chdir(cwd)
+      status = self.run_program(program)
+    except (BrokenPipeError, ConnectionResetError, KeyboardInterrupt):
+      raise # the client is gone, or the daemon is stopped
+    except SystemExit as e: # e.g. argparse errors
+      status = e.code
+      if status == None:
+        status = 0
+      elif not isinstance(status, int):
+        print(status, file=sys.stderr)
+        status = 1
+    except Exception as e: # shown as with sys.tracebacklimit = 0
+      print(e.__class__.__name__ + ': ' + str(e), file=sys.stderr)
+      status = 1
+    finally:
+      sys.stdout, sys.stderr, sys.argv = saved[:3]
+      os.chdir(saved[3])
+    out.flush()
+    err.flush()
+    conn.sendall(DaemonClient.pack(DaemonClient.EXIT, str(status).encode('ascii')))
+    return True
+
+
+  # Run program of a request, return the exit status
+  def run_program(self, program):
+    if program == 'viewer':
+      viewer = V.ICC2LogViewer()
+      try:
+        viewer.run()
+      finally:
+        ICC2LogDaemon.close_files([viewer.log])
+    elif program == 'comparator':
+      comparator = C.ICC2LogComparator()
+      try:
+        comparator.run()
+      finally:
+        ICC2LogDaemon.close_files([comparator.log1, comparator.log2])
+    elif program == 'status':
+      self.show_status()
+    elif program == 'stop':
+      self.stopping = True
+      print('Info: Stopping ICC2 Log Daemon on ' + DaemonClient.SOCKET)
+    else:
+      print('Error: Unknown program ' + program)
+      return 1
+    return 0
+
+
+  # Close log files opened by argparse, the daemon outlives them
+  @staticmethod
+  def close_files(files):
+    for f in files:
+      if f != None and f is not sys.stdin:
+        f.close()
+    return
+
+
+  # Show the daemon status
+  def show_status(self):
+    print('Info: ICC2 Log Daemon (ver.' + Version + ') on ' + DaemonClient.SOCKET + ', pid ' + str(os.getpid()))
+    print('Info: Up ' + str(int(time.time() - self.start_time)) + ' seconds, served ' + str(self.num_requests) + ' requests')
+    print('Info: ' + str(len(self.memory.entries)) + ' parsed logs in memory, about ' +
+          str(self.memory.num_bytes >> 20) + ' of ' + str(self.max_memory) + ' MB')
+    return
+
+
+##############################################################################
+
+# Author: Deyuan Guo
+def icc2_log_daemon():
+  sys.tracebacklimit = 0
+  sys.stdout.reconfigure(errors='surrogateescape') # log paths are printed as they are
+  daemon = ICC2LogDaemon()
+  daemon.run()
+  return
+
+
+# Entry
+if __name__ ==  '__main__' :
+  icc2_log_daemon()
@@ -0,0 +1,231 @@
+#!/remote/us01home46/dguo/bin/python3
+# -*- coding: utf-8 -*-
+"""
+File: icc2_log_recompressor.py
+Brief:
+  A script to recompress the ICC2 logs of a flow directory into seekable
+  zstd or lz4 files, which icc2_log_viewer.py reads faster than gzip and
+  decompresses only from the frame holding -from-line, or to save a
+  checkpoint index next to each .gz log to seek in it
+  Usage: python3 icc2_log_recompressor.py <args>
+
+Author:  Deyuan Guo <dguo@synopsys.com>
+Manager: Jeng-Liang Tsai <jengt@synopsys.com>
+Team:    ICC2 Optimization Team @ Synopsys, Inc.
+
+SYNOPSYS CONFIDENTIAL - This is an unpublished, proprietary work of
+Synopsys, Inc., and is fully protected under copyright and trade
+secret laws. You may not view, use, disclose, copy, or distribute this
+file or any information contained herein except pursuant to a valid
+written license from Synopsys.
+
+File history:
+  10/18/2026 Created
+  10/18/2026 Add -index to save checkpoint indexes of .gz logs
+  10/18/2026 Port to Python 3 as a package with console scripts
+"""
+
+import sys
+import os
+import fnmatch
+import zlib
+try:
+  from . import icc2_log_viewer as V
+except ImportError: # run as a script, not from the icc2_log_viewer package
+  import icc2_log_viewer as V
+
+Version = '20261018'
+
+
+##############################################################################
+
+# Author: Deyuan Guo
+# ICC2 Log Recompressor
+class ICC2LogRecompressor:
+  EXTENSIONS = {V.Compression.ZSTD: '.zst', V.Compression.LZ4: '.lz4'}
+
+  # Constructor
+  def __init__(self):
+    self.parser = self.create_argparse()
+    self.flow_dir = None
+    self.pattern = '*opt.out.gz'
+    self.format = V.Compression.ZSTD
+    self.frame_size = 4 << 20 # bytes of log text per frame
+    self.level = None
+    self.force = False
+    self.index = False
+    self.compress = None
+    return
+
+
+  # Run
+  def run(self):
+    if len(list(filter(len, sys.argv))) <= 1:
+      print('--------------------------------------')
+      print(' ICC2 Log Recompressor (ver.' + Version + ') ')
+      print(' Deyuan Guo <dguo@synopsys.com> ')
+      print('--------------------------------------')
+      print()
+      self.parser.print_help()
+      print()
+      return
+
+    print('Info: ICC2 Log Recompressor (ver.' + Version + ')')
+    if not self.parse_args():
+      return
+    logs = self.find_logs()
+    if len(logs) == 0:
+      print('Info: No ' + self.pattern + ' log in ' + self.flow_dir)
+    for log in logs:
+      if self.index:
+        self.save_index(log)
+      else:
+        self.recompress(log)
+    return
+
+
+  # Create argparse object
+  def create_argparse(self):
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('flow_dir',     help='flow directory, logs are searched in flow_dir/*/*')
+    parser.add_argument('-pattern',     help='file name pattern of logs (default: *opt.out.gz)', type=str, default='*opt.out.gz')
+    parser.add_argument('-format',      help='compression format (default: zstd)', choices=[V.Compression.ZSTD, V.Compression.LZ4], default=V.Compression.ZSTD)
+    parser.add_argument('-frame-size',  help='MB of log text per seekable frame (default: 4)', type=int, default=4, metavar='MB')
+    parser.add_argument('-level',       help='compression level (default: format default)', type=int)
+    parser.add_argument('-force',       help='recompress or index logs that are already done', action='store_true')
+    parser.add_argument('-index',       help='save a checkpoint index next to each .gz log instead of recompressing it', action='store_true')
+    return parser
+
+
+  # Parse command line auguments
+  def parse_args(self):
+    args = self.parser.parse_args(list(filter(len, sys.argv[1:])))
+    self.flow_dir = args.flow_dir
+    self.pattern = args.pattern
+    self.format = args.format
+    self.frame_size = max(1, args.frame_size) << 20
+    self.level = args.level
+    self.force = args.force
+    self.index = args.index
+
+    if self.index:
+      return True
+    module = V.Compression.get_module(self.format)
+    if module == None:
+      print('Error: Python module ' + V.Compression.MODULES[self.format].split('.')[0] + ' is needed for -format ' + self.format)
+      return False
+    if self.format == V.Compression.ZSTD:
+      if self.level == None:
+        compressor = module.ZstdCompressor()
+      else:
+        compressor = module.ZstdCompressor(level=self.level)
+      self.compress = compressor.compress
+    else:
+      level = self.level or 0
+      self.compress = lambda text: module.compress(text, compression_level=level)
+    return True
+
+
+  # Logs matching the pattern in flow_dir and two levels below, the same
+  # logs as log_traverser_*.csh
+  def find_logs(self):
+    logs = []
+    top = self.flow_dir.rstrip(os.sep).count(os.sep)
+    for root, dirs, files in os.walk(self.flow_dir, followlinks=True):
+      if root.rstrip(os.sep).count(os.sep) - top >= 1:
+        del dirs[:] # no deeper than flow_dir/*/*
+      logs += [os.path.join(root, f) for f in fnmatch.filter(files, self.pattern)]
+    return sorted(logs)
+
+
+  # Recompressed file name, e.g. place_opt.out.gz -> place_opt.out.zst
+  def get_output_path(self, path):
+    base = path
+    for ext, kind in V.Compression.EXTENSIONS:
+      if base.endswith(ext):
+        base = base[:-len(ext)]
+        break
+    return base + ICC2LogRecompressor.EXTENSIONS[self.format]
+
+
+  # Recompress a log into frames of whole lines followed by a FrameIndex.
+  # The original log is kept
+  def recompress(self, path):
+    out = self.get_output_path(path)
+    if out == path:
+      print('Info: Skip ' + path + ', it is already ' + self.format + ' compressed')
+      return False
+    if not self.force and os.path.isfile(out) and os.path.getmtime(out) >= os.path.getmtime(path):
+      print('Info: Skip ' + path + ', ' + out + ' is up to date')
+      return False
+
+    tmp = out + '.tmp'
+    try:
+      with open(path, 'rb') as raw:
+        f = V.Compression.open(raw, V.Compression.detect(path))
+        with open(tmp, 'wb') as w:
+          entries = []
+          partial = b''
+          while True:
+            data = f.read(self.frame_size)
+            text = partial + data
+            cut = len(text) if data == b'' else text.rfind(b'\n') + 1
+            partial = text[cut:]
+            if cut > 0:
+              frame = self.compress(text[:cut])
+              w.write(frame)
+              entries.append((len(frame), cut, text.count(b'\n', 0, cut)))
+            if data == b'':
+              break
+          w.write(V.FrameIndex.pack(entries))
+      os.rename(tmp, out)
+    except (EnvironmentError, RuntimeError) as e: # e.g. a bad gzip file
+      if os.path.exists(tmp):
+        os.remove(tmp)
+      print('Error: Cannot recompress ' + path + ': ' + str(e))
+      return False
+
+    print('Info: ' + path + ' -> ' + out + ' (' + str(len(entries)) + ' frames, ' +
+          str(os.path.getsize(path) >> 10) + ' KB -> ' + str(os.path.getsize(out) >> 10) + ' KB)')
+    return True
+
+
+  # Save a GzipIndex next to a .gz log, for icc2_log_viewer.py to seek in it
+  def save_index(self, path):
+    if V.Compression.detect(path) != V.Compression.GZIP:
+      print('Info: Skip ' + path + ', it is not gzip compressed')
+      return False
+    if not self.force and V.GzipIndex.load(path) != None:
+      print('Info: Skip ' + path + ', ' + path + V.GzipIndex.EXT + ' is up to date')
+      return False
+
+    try:
+      index = V.GzipIndex.build(path)
+      if len(index.offsets) <= 1:
+        print('Info: Skip ' + path + ', it is too small to need checkpoints')
+        return False
+      index.save(path)
+    except (EnvironmentError, zlib.error) as e:
+      print('Error: Cannot index ' + path + ': ' + str(e))
+      return False
+
+    print('Info: ' + path + ' -> ' + path + V.GzipIndex.EXT + ' (' + str(len(index.offsets)) + ' checkpoints, ' +
+          str(index.num_lines) + ' lines)')
+    return True
+
+
+##############################################################################
+
+# Author: Deyuan Guo
+def icc2_log_recompressor():
+  sys.tracebacklimit = 0
+  sys.stdout.reconfigure(errors='surrogateescape') # log paths are printed as they are
+  recompressor = ICC2LogRecompressor()
+  recompressor.run()
+  return
+
+
+# Entry
+if __name__ ==  '__main__' :
+  icc2_log_recompressor()
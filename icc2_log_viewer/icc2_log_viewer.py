@@ -1,10 +1,10 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 File: icc2_log_viewer.py
 Brief:
   A script to help to quickly understand ICC2 opto flow
-  Usage: python-2.7 icc2_log_viewer.py <args>
+  Usage: python3 icc2_log_viewer.py <args>
 
 Author:  Deyuan Guo <dguo@synopsys.com>
 Manager: Jeng-Liang Tsai <jengt@synopsys.com>
@@ -37,15 +37,58 @@ File history:
   01/10/2018 Fix for longer NPO/NRO heartbeats
   01/31/2018 Show advanced receiver model timer setting
   02/01/2018 Show parsing progress and improve performance
+  10/18/2026 Parse all enabled information in a single pass over the log
+  10/18/2026 Add -stream to parse huge logs with bounded memory
+  10/18/2026 Map uncompressed logs into memory instead of reading them
+  10/18/2026 Add parse cache for unchanged logs, --no-cache to bypass it
+  10/18/2026 Add -follow to show information of a running job as it is written
+  10/18/2026 Add -jobs to parse a log with several processes
+  10/18/2026 Add -from-line, -to-line, -stop-after-cmd and -max-records to parse part of a log
+  10/18/2026 Add -tui to browse information and log lines interactively
+  10/18/2026 Support repeated -regex and -regex-file, searched as one combined pattern
+  10/18/2026 Gunzip compressed logs while parsing, with -jobs for multi-member .gz logs
+  10/18/2026 Read zstd and lz4 compressed logs, seek in logs of icc2_log_recompressor.py
+  10/18/2026 Seek in .gz logs with a checkpoint index of icc2_log_recompressor.py -index
+  10/18/2026 Port to Python 3 as a package with console scripts, import modules when first used
+  10/18/2026 Keep parsed logs in memory of a resident icc2_log_daemon.py
+  10/18/2026 Add parse() to get the extracted information as data models
 """
 
 import sys
 import os
-import gzip
 import re
-import argparse
+import bisect
+import mmap
+import array
+import time
+import zlib
+import struct
+import collections
+import importlib
+# Modules that only some options need (argparse, hashlib, threading, queue,
+# multiprocessing, curses, zstandard, lz4) are imported where they are
+# used, so that a quick query does not pay for them at startup
+curses = None # imported by ICC2LogViewer.browse, see -tui
+
+Version = '20261018'
 
-Version = '20180201'
+##############################################################################
+
+# Author: Deyuan Guo
+# Log text is read as bytes and parsed as str. A byte is decoded to one
+# character: ASCII as is, other bytes as lone surrogates. Offsets in the text
+# are offsets in the file, and the bytes are written back unchanged
+def decode_text(data):
+  return data.decode('ascii', 'surrogateescape')
+
+
+def encode_text(text):
+  return text.encode('ascii', 'surrogateescape')
+
+
+# Command line argument as log text, e.g. a pattern to match with lines
+def decode_arg(arg):
+  return decode_text(os.fsencode(arg))
 
 
 ##############################################################################
@@ -69,11 +112,1353 @@ class ANSI:
 
 ##############################################################################
 
+# Author: Deyuan Guo
+# Compiled regex with a substring every match contains. Lines without the
+# substring are rejected by a cheap 'in' test before the regex engine runs
+class Pattern:
+
+  def __init__(self, key, regex):
+    self.key = key
+    self.regex = re.compile(regex)
+    return
+
+
+  def search(self, line):
+    if self.key not in line:
+      return None
+    return self.regex.search(line)
+
+##############################################################################
+
+# Author: Deyuan Guo
+# Patterns of log information, compiled once and shared by all controllers
+# and log utilities
+class Patterns:
+  ELAPSE =        Pattern('ELAPSE:', r'ELAPSE:\s+(\d+) s')
+  MEM_PEAK =      Pattern('MEM-PEAK:', r'MEM-PEAK:\s+(\d+) Mb')
+  CMD =           Pattern('CMD:', r'CMD:\s(.*)\sCPU:')
+  QOR_SETUP =     Pattern('(Setup)', r'Design\s+\(Setup\)\s+(\S+)\s+(\S+)\s+(\S+)')
+  QOR_HOLD =      Pattern('(Hold)', r'Design\s+\(Hold\)\s+(\S+)\s+(\S+)\s+(\S+)')
+  CTS_FUNC =      Pattern('ctsInterf::', r'START_FUNC: ctsInterf::(.*)\sCPU:')
+  CUS_SETUP =     Pattern('WNS(setup)=', r'\s+WNS\(setup\)=(\S+) TNS\(setup\)=(\S+) .*')
+  CUS_HOLD =      Pattern('WNS(hold)=', r'\s+WNS\(hold\)=(\S+) TNS\(hold\)=(\S+) .*')
+  GR_PHASE =      Pattern('Start GR phase ', r'Start GR phase (\d+)')
+  DR_ITER =       Pattern('Start DR iteration ', r'Start DR iteration (\d+):')
+  GR_OVERFLOW =   Pattern('Both Dirs: Overflow =', r'Both Dirs: Overflow =(\s+)(\d+) Max =(\s+)(\d+) GRCs =(\s+)(\d+) \((\S+)%')
+  COARSE_PLACE =  Pattern('coarse place ', r'coarse place (\d+)% done.')
+  UTILIZATION =   Pattern('(OPT-055)', r"Information: Current block utilization is '(.*)', effective utilization is '(.*)'. \(OPT-055\)")
+  HEARTBEAT_LN =  Pattern('*', r'^\s+\d+\s+\*\s+')
+  # NPO/NRO phase banner prefix -> optimization phase pattern
+  PHASE_ITER = dict((prefix, Pattern(prefix + ' optimization ', prefix + r' optimization (.*) Iter\s+1'))
+                    for prefix in ('npo-place-opt', 'npo-clock-opt', 'Route-opt'))
+
+##############################################################################
+
+# Author: Deyuan Guo
+# Line prefix index: a line is looked up by its first character, so a line
+# that cannot match any prefix costs one dict lookup
+class TriggerIndex:
+
+  def __init__(self, items=[]):
+    self.table = {} # first char -> (prefixes, stripped prefixes, [(prefix, stripped, value)])
+    for prefix, value in items:
+      self.add(prefix, value)
+    return
+
+
+  # Register a prefix. A stripped prefix is matched after removing leading
+  # spaces of the line
+  def add(self, prefix, value, stripped=False):
+    keys = [prefix[0]]
+    if stripped:
+      keys += [' ', '\t']
+    for key in keys:
+      prefixes, stripped_prefixes, items = self.table.get(key, ((), (), []))
+      if stripped:
+        stripped_prefixes += (prefix,)
+      else:
+        prefixes += (prefix,)
+      self.table[key] = (prefixes, stripped_prefixes, items + [(prefix, stripped, value)])
+    return
+
+
+  # Return values of all prefixes matching the line, in registration order
+  def match(self, line):
+    entry = self.table.get(line[:1])
+    if entry == None:
+      return []
+    prefixes, stripped_prefixes, items = entry
+    text = line
+    if len(stripped_prefixes) > 0:
+      text = line.lstrip()
+    if not (line.startswith(prefixes) or text.startswith(stripped_prefixes)):
+      return []
+    values = []
+    for prefix, stripped, value in items:
+      if stripped:
+        matched = text.startswith(prefix)
+      else:
+        matched = line.startswith(prefix)
+      if matched and value not in values:
+        values.append(value)
+    return values
+
+
+  # Bytes regex finding the lines that match a prefix in a buffer, as a
+  # newline followed by the prefix. None if there is no prefix. Like match(),
+  # only a line starting with a space or tab is stripped
+  def get_line_pattern(self):
+    prefixes = set()
+    stripped_prefixes = set()
+    for entry in self.table.values():
+      for prefix, stripped, value in entry[2]:
+        if stripped:
+          stripped_prefixes.add(prefix)
+        else:
+          prefixes.add(prefix)
+    alternatives = []
+    if len(prefixes) > 0:
+      alternatives.append('|'.join(re.escape(prefix) for prefix in sorted(prefixes)))
+    if len(stripped_prefixes) > 0:
+      alternatives.append('(?:[ \\t][ \\t\\r\\x0b\\x0c]*)?(?:' +
+                          '|'.join(re.escape(prefix) for prefix in sorted(stripped_prefixes)) + ')')
+    if len(alternatives) == 0:
+      return None
+    return re.compile(encode_text('\\n(?:' + '|'.join(alternatives) + ')'))
+
+##############################################################################
+
+# Author: Deyuan Guo
+# Time stamp index: ELAPSE and MEM-PEAK of START_CMD/END_CMD/START_FUNC/END_FUNC
+# lines sorted by line number, so that the nearest time stamp before or after
+# a line is a bisect instead of a scan of the lines in between
+class TimeIndex:
+  PREFIXES = ('START_CMD:', 'END_CMD:', 'START_FUNC:', 'END_FUNC:')
+
+  def __init__(self):
+    self.lns = []       # line indexes
+    self.elapsed = []   # elapsed time in seconds
+    self.peak_mem = []  # peak memory in Mb as shown in the log, None if not shown
+    self.watched = TriggerIndex() # stamp prefix -> TimeIndex of these stamps
+    return
+
+
+  # Time stamps of all lines
+  @staticmethod
+  def build(lines):
+    index = TimeIndex()
+    for i in range(len(lines)):
+      if lines[i].startswith(TimeIndex.PREFIXES):
+        index.add(i, lines[i])
+    return index
+
+
+  # Keep another index of the stamps starting with prefix, see get()
+  def watch(self, prefix):
+    if self.get(prefix) == None:
+      self.watched.add(prefix, (prefix, TimeIndex()))
+    return
+
+
+  # Index of stamps starting with a watched prefix
+  def get(self, prefix):
+    for watched_prefix, index in self.watched.match(prefix):
+      if watched_prefix == prefix:
+        return index
+    return None
+
+
+  # Add line i if it has a time stamp. Lines are added in increasing order
+  def add(self, i, line):
+    match = Patterns.ELAPSE.search(line)
+    if not match:
+      return False
+    peak_mem = None
+    match2 = Patterns.MEM_PEAK.search(line)
+    if match2:
+      peak_mem = match2.group(1)
+    self.lns.append(i)
+    self.elapsed.append(int(match.group(1)))
+    self.peak_mem.append(peak_mem)
+    for prefix, index in self.watched.match(line):
+      index.add(i, line)
+    return True
+
+
+  # Position of the last stamp in (lo, ln], -1 if none
+  def find_prev(self, ln, lo=-1):
+    k = bisect.bisect_right(self.lns, ln) - 1
+    if k >= 0 and self.lns[k] > lo:
+      return k
+    return -1
+
+
+  # Position of the first stamp in [ln, hi), -1 if none
+  def find_next(self, ln, hi=None):
+    k = bisect.bisect_left(self.lns, ln)
+    if k < len(self.lns) and (hi == None or self.lns[k] < hi):
+      return k
+    return -1
+
+##############################################################################
+
+# Author: Deyuan Guo
+# Per-parse state of a data controller, owned by LogDispatcher
+class ParseState:
+  def __init__(self):
+    self.m_vec = []   # extracted data models
+    self.cur = None   # data model whose section is still open
+
+
+# Author: Deyuan Guo
+# Compression formats of logs, detected by magic bytes, or by extension if
+# the log cannot be read twice (e.g. a pipe)
+class Compression:
+  GZIP = 'gzip'
+  ZSTD = 'zstd'
+  LZ4 = 'lz4'
+  MAGICS = ((b'\x1f\x8b', GZIP), (b'\x28\xb5\x2f\xfd', ZSTD), (b'\x04\x22\x4d\x18', LZ4))
+  EXTENSIONS = (('.gz', GZIP), ('.zst', ZSTD), ('.lz4', LZ4))
+  MODULES = {ZSTD: 'zstandard', LZ4: 'lz4.frame'}
+
+  # Compression of a log file, None if it is not compressed
+  @staticmethod
+  def detect(path):
+    if os.path.isfile(path):
+      try:
+        with open(path, 'rb') as f:
+          head = f.read(4)
+        for magic, kind in Compression.MAGICS:
+          if head.startswith(magic):
+            return kind
+        return None
+      except EnvironmentError:
+        pass
+    for ext, kind in Compression.EXTENSIONS:
+      if path.endswith(ext):
+        return kind
+    return None
+
+
+  # Python module of a compression format other than gzip, None if it is not
+  # installed. It is imported the first time a log of the format is read
+  @staticmethod
+  def get_module(kind):
+    try:
+      return importlib.import_module(Compression.MODULES[kind])
+    except ImportError:
+      return None
+
+
+  # Decompressed file object of a compressed file object
+  @staticmethod
+  def open(raw, kind, jobs=1):
+    if kind == Compression.GZIP:
+      return GzipReader(raw, jobs)
+    if kind == None:
+      return raw
+    module = Compression.get_module(kind)
+    if module == None:
+      raise IOError('Python module ' + Compression.MODULES[kind].split('.')[0] + ' is needed to read ' + raw.name)
+    if kind == Compression.ZSTD:
+      return module.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    return module.LZ4FrameFile(raw)
+
+
+# Author: Deyuan Guo
+# Index of a seekable log written by icc2_log_recompressor.py: independent
+# zstd or lz4 frames of whole lines, then a skippable frame, which readers
+# ignore, with the compressed size, text size and newlines of each frame
+class FrameIndex:
+  SKIPPABLE = 0x184D2A5E # skippable frame magic of both zstd and lz4
+  MAGIC = b'ILVF'
+  ENTRY = struct.Struct('<III')  # compressed size, text size, newlines
+  FOOTER = struct.Struct('<I4s') # number of frames, MAGIC
+
+  def __init__(self, entries):
+    self.offsets = [] # compressed offset of each frame
+    self.lines = []   # line number of the first line of each frame
+    offset = 0
+    ln = 0
+    for size, text_size, newlines in entries:
+      self.offsets.append(offset)
+      self.lines.append(ln)
+      offset += size
+      ln += newlines
+    self.num_lines = ln + 1 # as split('\n')
+    return
+
+
+  # Frame holding line ln
+  def find(self, ln):
+    return max(0, bisect.bisect_right(self.lines, ln) - 1)
+
+
+  # Skippable frame with the index of frames
+  @staticmethod
+  def pack(entries):
+    table = b''.join(FrameIndex.ENTRY.pack(*entry) for entry in entries)
+    table += FrameIndex.FOOTER.pack(len(entries), FrameIndex.MAGIC)
+    return struct.pack('<II', FrameIndex.SKIPPABLE, len(table)) + table
+
+
+  # Index at the end of a compressed log file, None if there is none. The
+  # file is read again from the beginning afterwards
+  @staticmethod
+  def load(raw):
+    if not os.path.isfile(getattr(raw, 'name', '')):
+      return None
+    try:
+      raw.seek(0, 2)
+      size = raw.tell()
+      if size < 8 + FrameIndex.FOOTER.size:
+        return None
+      raw.seek(size - FrameIndex.FOOTER.size)
+      num_frames, magic = FrameIndex.FOOTER.unpack(raw.read(FrameIndex.FOOTER.size))
+      table_size = num_frames * FrameIndex.ENTRY.size + FrameIndex.FOOTER.size
+      if magic != FrameIndex.MAGIC or table_size + 8 > size:
+        return None
+      raw.seek(size - table_size - 8)
+      if struct.unpack('<II', raw.read(8)) != (FrameIndex.SKIPPABLE, table_size):
+        return None
+      table = raw.read(table_size)
+      return FrameIndex([FrameIndex.ENTRY.unpack_from(table, k * FrameIndex.ENTRY.size)
+                         for k in range(num_frames)])
+    except (EnvironmentError, struct.error):
+      return None
+    finally:
+      raw.seek(0)
+
+
+# Author: Deyuan Guo
+# Checkpoint index of a .gz log, saved next to it by icc2_log_recompressor.py
+# -index. Checkpoints are at least CHECKPOINT_SIZE bytes of text apart, at
+# gzip members that start a line, or inside a member at the start of a
+# dynamic Huffman block of deflate. Such a block is inflated on its own
+# from its first bit, which may be inside a byte, with the last WINDOW bytes
+# of text before it as zdict, as zran.c of zlib does. Python's zlib does not
+# report block starts, so they are found by GzipIndex.find_block
+class GzipIndex:
+  EXT = '.idx'
+  MAGIC = b'ILVW'
+  CHECKPOINT_SIZE = 1 << 22
+  WINDOW = 1 << 15       # deflate window, text a block can refer to
+  SEARCH_SIZE = 1 << 20  # compressed bytes to look for a block start in
+  STEP = 8               # compressed bytes inflated at a time while looking
+  HEADER_SIZE = 320      # compressed bytes of the largest block header
+  VERIFY_SIZE = 1 << 12  # compressed bytes inflated from a block start to check it
+  CL_ORDER = (16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15)
+  HEADER = struct.Struct('<4sQdQI') # MAGIC, log size, log mtime, newlines, checkpoints
+  ENTRY = struct.Struct('<QBQIQI')  # compressed offset, bit shift, line number,
+                                    # text bytes to skip, member end, window size
+
+  # checkpoints are (offset, shift, ln, skip, end, window). Line ln starts
+  # skip bytes after the text of the checkpoint. end is the compressed offset
+  # after the member of a checkpoint inside it, 0 at the start of a member
+  def __init__(self, checkpoints, newlines):
+    self.offsets = [c[0] for c in checkpoints]
+    self.shifts = [c[1] for c in checkpoints]
+    self.lines = [c[2] for c in checkpoints]
+    self.skips = [c[3] for c in checkpoints]
+    self.ends = [c[4] for c in checkpoints]
+    self.windows = [c[5] for c in checkpoints]
+    self.newlines = newlines
+    self.num_lines = newlines + 1 # as split('\n')
+    return
+
+
+  # Checkpoint before line ln
+  def find(self, ln):
+    return max(0, bisect.bisect_right(self.lines, ln) - 1)
+
+
+  # Gunzip'ed file object of raw from checkpoint k, starting at line lines[k]
+  def open(self, raw, k):
+    raw.seek(self.offsets[k])
+    if self.ends[k] == 0:
+      return GzipReader(raw)
+    return GzipReader(raw, checkpoint=(self.shifts[k], self.windows[k], self.skips[k], self.ends[k]))
+
+
+  # Index of a log, None if there is none or the log has changed since
+  @staticmethod
+  def load(path):
+    try:
+      with open(path + GzipIndex.EXT, 'rb') as f:
+        data = f.read()
+      magic, size, mtime, newlines, num = GzipIndex.HEADER.unpack_from(data)
+      st = os.stat(path)
+      if magic != GzipIndex.MAGIC or size != st.st_size or mtime != st.st_mtime:
+        return None
+      checkpoints = []
+      pos = GzipIndex.HEADER.size + num * GzipIndex.ENTRY.size
+      for k in range(num):
+        entry = GzipIndex.ENTRY.unpack_from(data, GzipIndex.HEADER.size + k * GzipIndex.ENTRY.size)
+        window = zlib.decompress(data[pos:pos + entry[5]])
+        pos += entry[5]
+        checkpoints.append(entry[:5] + (window,))
+      return GzipIndex(checkpoints, newlines)
+    except (EnvironmentError, struct.error, zlib.error):
+      return None
+
+
+  def save(self, path):
+    st = os.stat(path)
+    windows = [zlib.compress(window) for window in self.windows]
+    with open(path + GzipIndex.EXT, 'wb') as f:
+      f.write(GzipIndex.HEADER.pack(GzipIndex.MAGIC, st.st_size, st.st_mtime, self.newlines, len(self.offsets)))
+      for k in range(len(self.offsets)):
+        f.write(GzipIndex.ENTRY.pack(self.offsets[k], self.shifts[k], self.lines[k], self.skips[k],
+                                     self.ends[k], len(windows[k])))
+      f.write(b''.join(windows))
+    return
+
+
+  # Gunzip a log once to find its checkpoints
+  @staticmethod
+  def build(path):
+    checkpoints = [(0, 0, 0, 0, 0, b'')]
+    members = 1    # checkpoints before the current member
+    newlines = 0
+    text_size = 0  # bytes of text since the last checkpoint, may be negative
+    history = b''  # last WINDOW bytes of text
+    last = b'\n'   # last byte of the text
+    search = 0     # compressed offset to look for a block start from
+    offset = 0     # compressed offset of data
+    size = os.path.getsize(path)
+    if size == 0:
+      return GzipIndex(checkpoints, newlines)
+    with open(path, 'rb') as raw:
+      data = mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ)
+      try:
+        d = zlib.decompressobj(GzipReader.WBITS)
+        while offset < size:
+          if d == None: # between members, skip zero padding
+            while offset < size and data[offset] == 0:
+              offset += 1
+            if offset == size:
+              break
+            checkpoints[members:] = [c[:4] + (offset,) + c[5:] for c in checkpoints[members:]]
+            if text_size >= GzipIndex.CHECKPOINT_SIZE and last == b'\n':
+              checkpoints.append((offset, 0, newlines, 0, 0, b''))
+              text_size = 0
+            members = len(checkpoints)
+            search = offset # find_block stops at the end of a member
+            d = zlib.decompressobj(GzipReader.WBITS)
+          if text_size >= GzipIndex.CHECKPOINT_SIZE and offset >= search:
+            checkpoint = GzipIndex.find_block(data, offset, d, history, newlines)
+            if checkpoint != None:
+              checkpoints.append(checkpoint[:5] + (checkpoint[6],))
+              text_size = -checkpoint[5]
+            else: # no block start in these bytes, do not search them again
+              search = offset + GzipIndex.SEARCH_SIZE
+          block = data[offset:offset + GzipReader.BLOCK_SIZE]
+          text = d.decompress(block)
+          if text != b'':
+            newlines += text.count(b'\n')
+            text_size += len(text)
+            history = (history + text[-GzipIndex.WINDOW:])[-GzipIndex.WINDOW:]
+            last = text[-1:]
+          offset += len(block) - len(d.unused_data)
+          if d.eof:
+            d = None
+        if d != None and not GzipReader.is_complete(d):
+          raise IOError('Compressed log ends in the middle of a gzip member')
+        checkpoints[members:] = [c[:4] + (size,) + c[5:] for c in checkpoints[members:]]
+      finally:
+        data.close()
+    return GzipIndex(checkpoints, newlines)
+
+
+  # Look for the start of a dynamic Huffman block in compressed bytes
+  # [offset, offset + SEARCH_SIZE) of data, where decompressor d is. No output
+  # is inflated while a block header is read, so bytes are inflated STEP at
+  # a time until a step has no output, then byte by byte from before it to
+  # know the text position of each byte. A block start found in these bytes
+  # must inflate the same text with the window before it. Return (offset,
+  # shift, ln, skip, 0, text bytes from offset to the checkpoint, window),
+  # None if there is none
+  @staticmethod
+  def find_block(data, offset, d, history, newlines):
+    d = d.copy()
+    states = collections.deque(maxlen=GzipIndex.HEADER_SIZE // 64 + 2) # (offset, copy of d, text size)
+    texts = []     # text inflated from offset
+    text_size = 0
+    end = min(len(data), offset + GzipIndex.SEARCH_SIZE)
+    pos = offset
+    flat = True # no output in the last step
+    while pos < end and not d.eof:
+      if (pos - offset) % 64 == 0:
+        states.append((pos, d.copy(), text_size))
+      text = d.decompress(data[pos:pos + GzipIndex.STEP])
+      pos += GzipIndex.STEP
+      if text != b'' or flat:
+        texts.append(text)
+        text_size += len(text)
+        flat = text == b''
+        continue
+      flat = True
+      # a block header, find where it starts
+      begin, dd, size = states[0]
+      sizes = [] # text size after each byte from begin
+      for b in range(begin, pos):
+        size += len(dd.decompress(data[b:b + 1]))
+        sizes.append(size)
+      after = d.copy().decompress(data[pos:pos + GzipIndex.VERIFY_SIZE])
+      text = b''.join(texts) + after
+      for b in range(begin, pos):
+        x = int.from_bytes(data[b:b + GzipIndex.HEADER_SIZE], 'little')
+        t = sizes[b - begin]
+        for shift in range(8):
+          if GzipIndex.is_block_header(x >> shift) and GzipIndex.is_block_start(data, b, shift, text, t, history):
+            window = (history + text[:t])[-GzipIndex.WINDOW:]
+            ln = newlines + text.count(b'\n', 0, t)
+            skip = 0
+            if window[-1:] != b'\n':
+              eol = text.find(b'\n', t)
+              if eol < 0:
+                continue # a long line, no line to start at
+              ln += 1
+              skip = eol + 1 - t
+            return (b, shift, ln, skip, 0, t, window)
+    return None
+
+
+  # True if the block starting shift bits into byte b of data inflates to
+  # text[t:] with the window of text before t
+  @staticmethod
+  def is_block_start(data, b, shift, text, t, history):
+    window = (history + text[:t])[-GzipIndex.WINDOW:]
+    n = len(text) - t
+    if n < GzipIndex.VERIFY_SIZE // 2:
+      return False
+    try:
+      d = zlib.decompressobj(-zlib.MAX_WBITS, zdict=window)
+      block = GzipIndex.shift_bits(data[b:b + GzipIndex.VERIFY_SIZE + 1], shift)
+      out = d.decompress(block, n)
+    except zlib.error:
+      return False
+    return len(out) >= GzipIndex.VERIFY_SIZE // 2 and out == text[t:t + len(out)]
+
+
+  # Bytes of data from bit shift of its first byte on. The last byte is held
+  # back, its high bits are in the next bytes of the stream
+  @staticmethod
+  def shift_bits(data, shift):
+    if shift == 0:
+      return data[:-1]
+    return (int.from_bytes(data, 'little') >> shift).to_bytes(len(data), 'little')[:-1]
+
+
+  # True if int x, the bits of deflate data from a position, starts with a
+  # dynamic Huffman block header whose code lengths make valid codes
+  @staticmethod
+  def is_block_header(x):
+    if (x >> 1) & 3 != 2:
+      return False
+    nlen = ((x >> 3) & 31) + 257
+    ndist = ((x >> 8) & 31) + 1
+    ncode = ((x >> 13) & 15) + 4
+    if nlen > 286 or ndist > 30:
+      return False
+    lengths = [0] * 19
+    for k in range(ncode):
+      lengths[GzipIndex.CL_ORDER[k]] = (x >> (17 + 3 * k)) & 7
+    codes = GzipIndex.huffman_codes(lengths, True)
+    if codes == None:
+      return False
+
+    # code lengths of the literal/length and distance codes
+    pos = 17 + 3 * ncode
+    lengths = []
+    while len(lengths) < nlen + ndist:
+      code = 1
+      n = 0
+      while (n, code) not in codes:
+        if n == 7:
+          return False
+        code = (code << 1) | ((x >> pos) & 1)
+        pos += 1
+        n += 1
+      symbol = codes[(n, code)]
+      if symbol < 16:
+        lengths.append(symbol)
+        continue
+      if symbol == 16:
+        if len(lengths) == 0:
+          return False
+        repeat = [lengths[-1]] * (3 + ((x >> pos) & 3))
+        pos += 2
+      elif symbol == 17:
+        repeat = [0] * (3 + ((x >> pos) & 7))
+        pos += 3
+      else:
+        repeat = [0] * (11 + ((x >> pos) & 127))
+        pos += 7
+      lengths += repeat
+    if len(lengths) > nlen + ndist or lengths[256] == 0:
+      return False
+    return (GzipIndex.huffman_codes(lengths[:nlen], False) != None and
+            GzipIndex.huffman_codes(lengths[nlen:], False) != None)
+
+
+  # Canonical Huffman codes of code lengths as {(length, code): symbol},
+  # None if the lengths are over-subscribed, or incomplete where inflate
+  # rejects it. code has a leading 1 bit, as built bit by bit when decoding
+  @staticmethod
+  def huffman_codes(lengths, complete):
+    top = max(lengths)
+    if top == 0:
+      return {}
+    left = 1
+    for n in range(1, 16):
+      left = (left << 1) - lengths.count(n)
+      if left < 0:
+        return None
+    if left > 0 and (complete or top != 1):
+      return None
+    codes = {}
+    code = 0
+    for n in range(1, top + 1):
+      for symbol in range(len(lengths)):
+        if lengths[symbol] == n:
+          codes[(n, (1 << n) | code)] = symbol
+          code += 1
+      code <<= 1
+    return codes
+
+
+# Author: Deyuan Guo
+# Gunzip'ed file object of a .gz log. A thread gunzips a few blocks ahead of
+# the reader, so decompression overlaps with parsing and the whole text is
+# never held. With jobs > 1, the members of a multi-member log are gunzip'ed
+# by a pool of threads (zlib runs without the GIL). With a checkpoint of a
+# GzipIndex, raw is read from inside a member, see inflate_member
+class GzipReader:
+  BLOCK_SIZE = 1 << 18  # compressed bytes gunzip'ed at a time
+  TASK_SIZE = 1 << 20   # compressed bytes per parallel task, at least
+  PROBE_SIZE = 1 << 12  # compressed bytes to check a member header
+  QUEUE_SIZE = 4        # gunzip'ed blocks kept ahead of the reader
+  MAGIC = b'\x1f\x8b\x08'
+  WBITS = 16 + zlib.MAX_WBITS # gzip header and trailer
+
+  def __init__(self, raw, jobs=1, checkpoint=None):
+    import queue
+    self.raw = raw      # compressed file object, read from its position
+    self.jobs = jobs
+    self.checkpoint = checkpoint # (shift, window, skip, end) of a GzipIndex
+    self.pos = 0        # compressed bytes read by the reader
+    self.block = b''    # gunzip'ed block being read
+    self.offset = 0     # read position in self.block
+    self.done = False
+    self.closed = False
+    self.queue = queue.Queue(GzipReader.QUEUE_SIZE)
+    self.thread = None  # started by the first read
+    try:
+      self.pos = raw.tell()
+    except EnvironmentError: # e.g. a pipe
+      pass
+    return
+
+
+  # Compressed position, for progress
+  def tell(self):
+    return self.pos
+
+
+  # Stop the gunzip thread
+  def close(self):
+    import queue
+    self.closed = True
+    self.done = True
+    try:
+      while True:
+        self.queue.get_nowait() # unblock the thread
+    except queue.Empty:
+      pass
+    return
+
+
+  def read(self, size=-1):
+    if self.thread == None:
+      import threading
+      self.thread = threading.Thread(target=self.run, args=(self.jobs,))
+      self.thread.daemon = True # may be left blocked if parsing stops early
+      self.thread.start()
+    parts = []
+    n = 0
+    while size < 0 or n < size:
+      if self.offset >= len(self.block):
+        if self.done:
+          break
+        item = self.queue.get()
+        if isinstance(item, Exception):
+          self.done = True
+          raise item
+        if item == None:
+          self.done = True
+          break
+        self.pos, self.block = item
+        self.offset = 0
+        continue
+      if size < 0:
+        part = self.block[self.offset:]
+      else:
+        part = self.block[self.offset:self.offset + size - n]
+      self.offset += len(part)
+      n += len(part)
+      parts.append(part)
+    return b''.join(parts)
+
+
+  # Gunzip thread, blocks are passed to the reader through self.queue
+  def run(self, jobs):
+    try:
+      pos = self.pos
+      path = getattr(self.raw, 'name', '')
+      if self.checkpoint != None:
+        pos = self.inflate_member(pos)
+        if pos != None:
+          self.raw.seek(pos)
+      elif jobs > 1 and pos == 0 and os.path.isfile(path):
+        pos = self.gunzip_members(path, jobs)
+        if pos != None:
+          self.raw.seek(pos)
+      if pos != None:
+        self.gunzip(pos)
+      self.queue.put(None)
+    except zlib.error as e:
+      self.queue.put(IOError('Cannot gunzip ' + path + ': ' + str(e)))
+    except Exception as e:
+      self.queue.put(e)
+    return
+
+
+  # Pass a gunzip'ed block to the reader, False if the reader is closed
+  def put(self, pos, text):
+    self.queue.put((pos, text))
+    return not self.closed
+
+
+  # Gunzip from compressed position pos to the end, member by member
+  def gunzip(self, pos):
+    d = zlib.decompressobj(GzipReader.WBITS)
+    begin = pos
+    while True:
+      data = self.raw.read(GzipReader.BLOCK_SIZE)
+      if data == b'':
+        if pos > begin and not GzipReader.is_complete(d):
+          raise IOError('Compressed log ends in the middle of a gzip member')
+        break
+      pos += len(data)
+      while True:
+        text = d.decompress(data)
+        if text != b'' and not self.put(pos, text):
+          return
+        data = d.unused_data.lstrip(b'\x00') # next member, skip zero padding
+        if data == b'':
+          break
+        d = zlib.decompressobj(GzipReader.WBITS)
+    return
+
+
+  # Inflate the rest of a member from a checkpoint at its position pos: raw
+  # deflate from bit shift of the byte at pos, with the window of text before
+  # it, and skip bytes of text dropped. Return the compressed position of the
+  # next member, None if the reader is closed
+  def inflate_member(self, pos):
+    shift, window, skip, end = self.checkpoint
+    d = zlib.decompressobj(-zlib.MAX_WBITS, zdict=window)
+    held = b'' # last byte read, see GzipIndex.shift_bits
+    while not d.eof:
+      data = self.raw.read(GzipReader.BLOCK_SIZE)
+      if data == b'':
+        raise IOError('Compressed log ends in the middle of a gzip member')
+      pos += len(data)
+      data = held + data
+      held = data[-1:]
+      text = d.decompress(GzipIndex.shift_bits(data, shift))
+      if skip > 0:
+        n = min(skip, len(text))
+        text = text[n:]
+        skip -= n
+      if text != b'' and not self.put(min(pos, end), text):
+        return None
+    return end
+
+
+  # Gunzip ranges of whole members in parallel. Return the compressed
+  # position to gunzip the rest from, None if the whole log is gunzip'ed
+  def gunzip_members(self, path, jobs):
+    import multiprocessing.pool
+    ranges = GzipReader.find_member_ranges(path)
+    if len(ranges) <= 1:
+      return 0 # single member
+    pending = collections.deque()
+    pool = multiprocessing.pool.ThreadPool(jobs)
+    try:
+      k = 0
+      while k < len(ranges) or len(pending) > 0:
+        while k < len(ranges) and len(pending) < jobs * 2:
+          begin, end = ranges[k]
+          pending.append((begin, end, pool.apply_async(GzipReader.gunzip_range, (path, begin, end))))
+          k += 1
+        begin, end, result = pending.popleft()
+        text = result.get()
+        if text == None:
+          return begin # not a member boundary, gunzip the rest serially
+        if not self.put(end, text):
+          return None
+    finally:
+      pool.terminate()
+    return None
+
+
+  # Compressed byte ranges (begin, end) that start with a gzip member header,
+  # about TASK_SIZE apart. A member header found inside compressed data is
+  # usually rejected by a probe, otherwise by gunzip_range
+  @staticmethod
+  def find_member_ranges(path):
+    size = os.path.getsize(path)
+    if size == 0:
+      return []
+    starts = [0]
+    with open(path, 'rb') as f:
+      data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+      try:
+        pos = data.find(GzipReader.MAGIC, GzipReader.TASK_SIZE)
+        while pos >= 0:
+          if GzipReader.is_member(data[pos:pos + GzipReader.PROBE_SIZE]):
+            starts.append(pos)
+            pos = data.find(GzipReader.MAGIC, pos + GzipReader.TASK_SIZE)
+          else:
+            pos = data.find(GzipReader.MAGIC, pos + 1)
+      finally:
+        data.close()
+    return list(zip(starts, starts[1:] + [size]))
+
+
+  # zlib stops quietly at the end of a cut member, but a byte after a whole
+  # member is left unused
+  @staticmethod
+  def is_complete(d):
+    try:
+      d.decompress(b'\x00')
+    except zlib.error:
+      return False
+    return d.unused_data != b''
+
+
+  @staticmethod
+  def is_member(probe):
+    try:
+      zlib.decompressobj(GzipReader.WBITS).decompress(probe)
+    except zlib.error:
+      return False
+    return True
+
+
+  # Gunzip the members in bytes [begin, end) of a file, None if the range
+  # does not end with a whole member
+  @staticmethod
+  def gunzip_range(path, begin, end):
+    with open(path, 'rb') as f:
+      f.seek(begin)
+      data = f.read(end - begin)
+    texts = []
+    try:
+      while True:
+        d = zlib.decompressobj(GzipReader.WBITS)
+        texts.append(d.decompress(data))
+        if d.unused_data == b'':
+          break
+        data = d.unused_data
+    except zlib.error:
+      return None
+    # zlib stops quietly at the end of a cut member: check the trailer
+    if len(data) < 18 or struct.unpack('<II', data[-8:]) != (zlib.crc32(texts[-1]) & 0xffffffff, len(texts[-1]) & 0xffffffff):
+      return None
+    return b''.join(texts)
+
+
+# Author: Deyuan Guo
+# Log file read chunk by chunk. Lines are the same as f.read().split('\n')
+class LogStream:
+  CHUNK_SIZE = 1 << 22
+  FOLLOW_INTERVAL = 2 # seconds
+
+  def __init__(self, f, raw, kind=None, index=None):
+    self.f = f          # file object to read, maybe decompressed
+    self.raw = raw      # underlying file object, for progress
+    self.size = os.fstat(raw.fileno()).st_size
+    self.kind = kind    # compression of raw
+    self.index = index  # FrameIndex or GzipIndex of a seekable log
+    self.first_ln = 0   # line number of the first line read
+    self.num_lines = 0  # lines read so far, including skipped lines
+    self.head = []      # first lines, for the ICC2 banner
+    return
+
+
+  # Open a log file object, decompressed while it is read if needed
+  @staticmethod
+  def open(raw, kind, jobs=1):
+    index = None
+    if kind == Compression.GZIP:
+      index = GzipIndex.load(raw.name)
+    elif kind != None:
+      index = FrameIndex.load(raw)
+    return LogStream(Compression.open(raw, kind, jobs), raw, kind, index)
+
+
+  # First lines of a compressed log file
+  @staticmethod
+  def read_head(path, kind):
+    with open(path, 'rb') as raw:
+      f = Compression.open(raw, kind)
+      head = f.read(1 << 16)
+      if isinstance(f, GzipReader):
+        f.close()
+    return decode_text(head).split('\n')[:12]
+
+
+  # Start reading at the frame holding line ln of a seekable log, so frames
+  # before it are not decompressed. Lines are numbered as in the whole log
+  def skip_to(self, ln):
+    if self.index == None or self.num_lines > 0:
+      return
+    k = self.index.find(ln)
+    if k == 0:
+      return
+    self.head = LogStream.read_head(self.raw.name, self.kind)
+    if self.kind == Compression.GZIP:
+      self.f = self.index.open(self.raw, k)
+    else:
+      self.raw.seek(self.index.offsets[k])
+      self.f = Compression.open(self.raw, self.kind)
+    self.first_ln = self.num_lines = self.index.lines[k]
+    return
+
+
+  # Stop decompressing, e.g. when no more lines are needed
+  def close(self):
+    if isinstance(self.f, GzipReader):
+      self.f.close()
+    return
+
+
+  # Yield lists of lines. The last line is yielded once the file ends. In
+  # follow mode the file ends when Ctrl-C is pressed while waiting for more
+  # lines to be written
+  def read_chunks(self, follow=False):
+    partial = ''
+    while True:
+      data = self.f.read(LogStream.CHUNK_SIZE)
+      if data == b'' and follow:
+        try:
+          time.sleep(LogStream.FOLLOW_INTERVAL)
+        except KeyboardInterrupt:
+          follow = False
+        self.f.seek(0, 1) # clear EOF
+        continue
+      if data == b'':
+        break
+      lines = (partial + decode_text(data)).split('\n')
+      partial = lines.pop()
+      self.add_lines(lines)
+      yield lines
+    self.add_lines([partial])
+    yield [partial]
+
+
+  def add_lines(self, lines):
+    if len(self.head) < 12:
+      self.head += lines[:12 - len(self.head)]
+    self.num_lines += len(lines)
+    return
+
+
+  # Percentage of the file read so far, -1 if unknown (e.g. pipe)
+  def progress(self):
+    if self.size == 0:
+      return -1
+    if isinstance(self.f, GzipReader):
+      return self.f.tell() * 100 // self.size # raw is read ahead
+    return self.raw.tell() * 100 // self.size
+
+
+# Author: Deyuan Guo
+# Sliding window of a streamed log, indexed by line number like a list of
+# all lines. Lines before the window have been discarded
+class LineWindow:
+  def __init__(self, base=0):
+    self.buf = []     # lines in the window
+    self.base = base  # line number of buf[0]
+
+  def __len__(self):
+    return self.base + len(self.buf)
+
+  def __getitem__(self, i):
+    if i < self.base:
+      raise IndexError('line %d is out of the log window' % i)
+    return self.buf[i - self.base]
+
+  # Append lines at the end
+  def extend(self, lines):
+    self.buf += lines
+    return
+
+  # Drop lines before line i
+  def discard(self, i):
+    if i > self.base:
+      del self.buf[:i - self.base]
+      self.base = i
+    return
+
+
+# Author: Deyuan Guo
+# Memory-mapped log file with an index of line start offsets. It behaves like
+# f.read().split('\n'), but a line is only sliced from the mapping when it is
+# accessed, so memory scales with the number of lines instead of bytes.
+# Read-only mappings of the same file share pages through the page cache, and
+# the viewers of one process (e.g. the comparator) share one LogBuffer. The
+# file is unmapped when no viewer holds its LogBuffer any more
+class LogBuffer:
+  shared = None # weak (st_dev, st_ino, st_size, st_mtime) -> LogBuffer
+
+  # data is a mmap of the log, or the log contents as bytes
+  def __init__(self, data):
+    self.data = data
+    self.offsets = array.array('Q')
+
+    # offsets[i] is the start of line i, the last one is the file size + 1
+    find = self.data.find
+    append = self.offsets.append
+    append(0)
+    pos = find(b'\n')
+    while pos >= 0:
+      append(pos + 1)
+      pos = find(b'\n', pos + 1)
+    append(len(self.data) + 1)
+    return
+
+
+  # Map file f, or return the LogBuffer of the same file mapped before.
+  # Return None if f cannot be mapped (e.g. pipe or empty file)
+  @staticmethod
+  def open(f):
+    try:
+      st = os.fstat(f.fileno())
+      key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime)
+      if LogBuffer.shared == None:
+        import weakref
+        LogBuffer.shared = weakref.WeakValueDictionary()
+      buf = LogBuffer.shared.get(key)
+      if buf == None:
+        buf = LogBuffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        LogBuffer.shared[key] = buf
+      return buf
+    except (EnvironmentError, ValueError, mmap.error):
+      return None
+
+
+  def __len__(self):
+    return len(self.offsets) - 1
+
+
+  # Line i, or a list of lines for a slice
+  def __getitem__(self, i):
+    offsets = self.offsets
+    if isinstance(i, slice):
+      start, stop, step = i.indices(len(self))
+      if step != 1:
+        return [self[k] for k in range(start, stop, step)]
+      if start >= stop:
+        return []
+      return decode_text(self.data[offsets[start]:offsets[stop] - 1]).split('\n')
+    if i < 0:
+      i += len(self)
+    if i < 0 or i >= len(self):
+      raise IndexError('line index out of range')
+    return decode_text(self.data[offsets[i]:offsets[i + 1] - 1])
+
+
+  # Line numbers in [begin, end) starting with a match of a bytes pattern
+  # which starts with a newline, see TriggerIndex.get_line_pattern. The lines
+  # are searched in the buffer, so no string is decoded for the other lines
+  def find_lines_starting(self, pattern, begin, end):
+    start = self.offsets[begin] - 1 # newline before line begin
+    stop = self.offsets[end] - 1
+    if start < 0:
+      text = b'\n' + self.data[0:stop]
+    else:
+      text = self.data[start:stop]
+    lns = []
+    ln = begin - 1
+    pos = 0
+    for match in pattern.finditer(text):
+      k = match.start()
+      ln += text.count(b'\n', pos, k + 1)
+      pos = k + 1
+      lns.append(ln)
+    return lns
+
+
+# Author: Deyuan Guo
+# Lines matching a regex, found by searching a whole bytes buffer instead of
+# every line. A match is mapped back to its line, and the search goes on from
+# the next line. A match across lines is checked again on its own line.
+# Literal patterns are searched with find()
+class LineSearch:
+  SPECIAL = set('.^$*+?{}[]|()\\')
+  # searching a buffer gives other matches than a line for these
+  INEXACT = ('\\A', '\\Z', '(?=', '(?!', '(?<')
+
+  def __init__(self, pattern):
+    self.pattern = pattern  # compiled regex searched in a line
+    flags = pattern.flags & ~re.UNICODE # str patterns are always unicode
+    self.text_pattern = re.compile(encode_text(pattern.pattern), flags | re.MULTILINE)
+    self.literal = None
+    if flags == 0 and len(LineSearch.SPECIAL & set(pattern.pattern)) == 0:
+      self.literal = encode_text(pattern.pattern)
+    return
+
+
+  # Return a LineSearch of a compiled regex, None if lines must be searched
+  # one by one to get the same matches
+  @staticmethod
+  def create(pattern):
+    for token in LineSearch.INEXACT:
+      if token in pattern.pattern:
+        return None
+    try:
+      return LineSearch(pattern)
+    except (re.error, ValueError): # e.g. (?u) is not allowed for bytes
+      return None
+
+
+  # (start, end, lastgroup) of the first match in data[pos:stop], None if
+  # no match
+  def search(self, data, pos, stop):
+    if self.literal != None:
+      k = data.find(self.literal, pos, stop)
+      if k < 0:
+        return None
+      return (k, k + len(self.literal), None)
+    match = self.text_pattern.search(data, pos, stop)
+    if match == None:
+      return None
+    return match.span() + (match.lastgroup,)
+
+
+  # (line number, lastgroup) of lines in [begin, end) of a LogBuffer with a
+  # match
+  def find_lines(self, buf, begin, end):
+    offsets = buf.offsets
+    hits = []
+    pos = offsets[begin]
+    stop = offsets[end] - 1
+    while pos <= stop:
+      span = self.search(buf.data, pos, stop)
+      if span == None:
+        break
+      i = bisect.bisect_right(offsets, span[0], begin, end) - 1
+      if span[1] < offsets[i + 1]:
+        hits.append((i, span[2]))
+      else: # the match goes on after the line
+        match = self.pattern.search(buf[i])
+        if match:
+          hits.append((i, match.lastgroup))
+      pos = offsets[i + 1]
+    return hits
+
+
+  # Line numbers of text.split(b'\n') with a match, text is bytes
+  def find_text_lines(self, text):
+    hits = []
+    ln = 0
+    pos = 0
+    stop = len(text)
+    while pos <= stop:
+      span = self.search(text, pos, stop)
+      if span == None:
+        break
+      ln += text.count(b'\n', pos, span[0])
+      line_end = text.find(b'\n', span[0])
+      if line_end < 0:
+        line_end = stop
+      if span[1] <= line_end or self.pattern.search(decode_text(text[text.rfind(b'\n', 0, span[0]) + 1:line_end])):
+        hits.append(ln)
+      pos = line_end + 1
+      ln += 1
+    return hits
+
+
+# Author: Deyuan Guo
+# Log file split into byte ranges of whole lines, parsed by -jobs workers.
+# Lines are the same as f.read().split('\n')
+class LogChunks:
+  MIN_CHUNK_SIZE = 1 << 22
+
+  def __init__(self, path, jobs):
+    self.path = os.path.abspath(path)
+    self.num_lines = 0  # known after parsing
+    self.head = []      # first lines, for the ICC2 banner
+
+    # a few chunks per job to balance the load, aligned after a newline
+    size = os.path.getsize(self.path)
+    num_chunks = max(1, min(jobs * 4, size // LogChunks.MIN_CHUNK_SIZE))
+    self.bounds = [0]
+    with open(self.path, 'rb') as f:
+      for k in range(1, num_chunks):
+        f.seek(size * k // num_chunks)
+        f.readline()
+        if self.bounds[-1] < f.tell() < size:
+          self.bounds.append(f.tell())
+    self.bounds.append(size)
+    return
+
+
+  # Byte ranges as (begin, end), the last one may not end with a newline
+  def get_ranges(self):
+    return list(zip(self.bounds[:-1], self.bounds[1:]))
+
+
+# Author: Deyuan Guo
+# Lines of a log kept by -jobs workers, indexed by line number like a list
+# of all lines. Lines that were not kept are blank
+class SparseLines:
+  def __init__(self, num_lines, lines):
+    self.num_lines = num_lines
+    self.lines = lines  # line number -> line
+
+  def __len__(self):
+    return self.num_lines
+
+  def __getitem__(self, i):
+    if i < 0 or i >= self.num_lines:
+      raise IndexError('line index out of range')
+    return self.lines.get(i, '')
+
+
+# Author: Deyuan Guo
+# Data Controller: common interface used by LogDispatcher
+#   TRIGGERS          - line prefixes routed to on_line(), None for every line
+#   STRIPPED_TRIGGERS - prefixes matched after stripping leading spaces
+#   LOOKAHEAD/BEHIND  - bound of logs[] access around the current line, so that
+#                       a streamed log only keeps a window of lines in memory.
+#                       With -jobs, lines before the current line are blank
+#                       unless they are trigger lines
+#   LOOKAHEAD_TRIGGERS - triggers whose on_line() reads lookahead lines, None
+#                        for all. -jobs workers keep lookahead lines only for them
+#   TIME_STAMPS       - stamp prefixes watched in state.time_index, () for none
+#                        but all stamps, None if no TimeIndex is used
+#   ALL_TIME_STAMPS   - state.time_index has the ELAPSE of every line, not only
+#                       of TimeIndex.PREFIXES lines, see C_elapse
+#   FIELDS            - optional data model fields, computed only if they are
+#                       in state.fields
+#   TIME_FIELDS       - fields that need TIME_STAMPS, () for all fields
+class C_base:
+  TRIGGERS = ()
+  STRIPPED_TRIGGERS = ()
+  LOOKAHEAD = 0   # lines after the current line read by on_line()
+  LOOKBEHIND = 0  # lines before the current line read by on_line()
+  LOOKAHEAD_TRIGGERS = None
+  TIME_STAMPS = None
+  ALL_TIME_STAMPS = False
+  FIELDS = ()
+  TIME_FIELDS = ()
+
+  @classmethod
+  def collect_data(cls, logs):
+    dispatcher = LogDispatcher()
+    dispatcher.add(cls)
+    return dispatcher.collect_data(logs)
+
+  @staticmethod
+  def create_state():
+    return ParseState()
+
+  @staticmethod
+  def on_line(state, logs, i, line):
+    return
+
+  @staticmethod
+  def on_finish(state, logs):
+    return
+
+  # Finish data models that cannot change once the lines before end_ln are
+  # parsed, used by -follow. Return the number of settled models, which are
+  # the first ones of state.m_vec
+  @staticmethod
+  def settle(state, logs, end_ln):
+    return len(state.m_vec)
+
+
+# Author: Deyuan Guo
+# Data Controller: time stamps shared by other data controllers, no data model
+class C_time(C_base):
+  TRIGGERS = TimeIndex.PREFIXES
+
+  @staticmethod
+  def create_state():
+    state = ParseState()
+    state.index = TimeIndex()
+    return state
+
+  @staticmethod
+  def on_line(state, logs, i, line):
+    state.index.add(i, line)
+    return
+
+
+# Author: Deyuan Guo
+# Data Controller: time stamps of every line with ELAPSE, as heartbeats of
+# C_qor take the nearest ELAPSE of any line, no data model
+class C_elapse(C_base):
+  TRIGGERS = None # every line is tested by state.search
+
+  @staticmethod
+  def create_state():
+    state = ParseState()
+    state.index = TimeIndex()
+    state.pattern = Patterns.ELAPSE.regex
+    state.search = Patterns.ELAPSE.search
+    return state
+
+  @staticmethod
+  def on_line(state, logs, i, line, group=None):
+    state.index.add(i, line)
+    return
+
+
+# Author: Deyuan Guo
+# Data Controller: end of the first run of a command, where -stop-after-cmd
+# stops parsing, no data model
+class C_stop(C_base):
+  TRIGGERS = ('END_CMD: ',)
+
+  @staticmethod
+  def create_state(cmd):
+    state = ParseState()
+    state.cmd = cmd
+    state.stop_ln = None  # line of the first END_CMD of cmd
+    return state
+
+  @staticmethod
+  def on_line(state, logs, i, line):
+    tokens = line.split()
+    if state.stop_ln == None and len(tokens) > 1 and tokens[1] == state.cmd:
+      state.stop_ln = i
+    return
+
+##############################################################################
+
 # Author: Deyuan Guo
 # Data Model: cellMap
-class M_cmap:
+class M_cmap(object):
   TAG = 'CMAP'
   COLOR = ANSI.BLUE
+  __slots__ = ('ln', 'tag', 'info')
 
   def __init__(self):
     self.ln = 0
@@ -92,32 +1477,31 @@ class M_cmap:
 
 # Author: Deyuan Guo
 # Data Controller: cellMap
-class C_cmap:
-  @staticmethod
-  def collect_data(logs):
-    m_vec = []
-    for i in range(0, len(logs)):
-      line = logs[i]
-      if line.startswith('START_FUNC: bool nplCellMap::initInstancesLegal'):
-        m = M_cmap()
-        m.ln = i + 1
-        m.info = 'initInstancesLegal'
-        m_vec.append(m)
-      elif line.startswith('START_FUNC: bool nplCellMap::initInstances'):
-        m = M_cmap()
-        m.ln = i + 1
-        m.info = 'initInstances'
-        m_vec.append(m)
+class C_cmap(C_base):
+  TRIGGERS = ('START_FUNC: bool nplCellMap::initInstances',)
 
-    return m_vec
+  @staticmethod
+  def on_line(state, logs, i, line):
+    if line.startswith('START_FUNC: bool nplCellMap::initInstancesLegal'):
+      m = M_cmap()
+      m.ln = i + 1
+      m.info = 'initInstancesLegal'
+      state.m_vec.append(m)
+    elif line.startswith('START_FUNC: bool nplCellMap::initInstances'):
+      m = M_cmap()
+      m.ln = i + 1
+      m.info = 'initInstances'
+      state.m_vec.append(m)
+    return
 
 ##############################################################################
 
 # Author: Deyuan Guo
 # Data Model: ICC2 command
-class M_cmd:
+class M_cmd(object):
   TAG = 'CMD'
   COLOR = ANSI.BLUE
+  __slots__ = ('ln', 'tag', 'cmd', 'compact', 'num_repeated')
 
   def __init__(self):
     self.ln = 0
@@ -142,60 +1526,61 @@ class M_cmd:
 
 # Author: Deyuan Guo
 # Data Controller: ICC2 command
-class C_cmd:
+class C_cmd(C_base):
+  TRIGGERS = ('START_CMD:', 'Design             (Setup) ', 'The tool has just encountered a fatal error:')
+  LOOKAHEAD = 100
+  LOOKAHEAD_TRIGGERS = ('Design             (Setup) ',)
+
   @staticmethod
-  def collect_data(logs):
-    m_vec = []
-    for i in range(0, len(logs)):
-      line = logs[i]
-      if line.startswith('START_CMD:'):
-        match = re.search('CMD:\s(.*)\sCPU:', line)
-        if match:
-          cmd = match.group(1).strip()
-          if cmd == 'route_opt_cmd':
-            continue # ignore route_opt_cmd for now
-          m = M_cmd()
-          m.ln = i + 1
-          m.cmd = cmd
-          m_vec.append(m)
-      elif line.startswith('Design             (Setup) '): # report_qor -summary
-        match = re.search('Design\s+\(Setup\)\s+(\S+)\s+(\S+)\s+(\S+)', line)
-        if match:
-          cmd = 'report_qor -summary'
-          wns = match.group(1)
-          tns = match.group(2)
-          nsv = match.group(3)
-
-          # look for hold timing in the same section
-          for j in range(i, min(i + 100, len(logs))):
-            if logs[j].startswith('----------'):
-              break
-            if logs[j].startswith('Design             (Hold)'):
-              match = re.search('Design\s+\(Hold\)\s+(\S+)\s+(\S+)\s+(\S+)', logs[j])
-              if match:
-                whs = match.group(1)
-                ths = match.group(2)
-                nhv = match.group(3)
-                m = M_cmd()
-                m.ln = i + 1
-                m.cmd = '%s {WNS = %s, TNS = %s, NSV = %s, WHS = %s, THS = %s, NHV = %s}' % (cmd, wns, tns, nsv, whs, ths, nhv)
-                m.compact = '%s {S: %s, %s, %s; H: %s, %s, %s}' % (cmd, wns, tns, nsv, whs, ths, nhv)
-                m_vec.append(m)
-      elif line == 'The tool has just encountered a fatal error:':
+  def on_line(state, logs, i, line):
+    if line.startswith('START_CMD:'):
+      match = Patterns.CMD.search(line)
+      if match:
+        cmd = match.group(1).strip()
+        if cmd == 'route_opt_cmd':
+          return # ignore route_opt_cmd for now
         m = M_cmd()
         m.ln = i + 1
-        m.cmd = 'FATAL'
-        m_vec.append(m)
-
-    return m_vec
+        m.cmd = cmd
+        state.m_vec.append(m)
+    elif line.startswith('Design             (Setup) '): # report_qor -summary
+      match = Patterns.QOR_SETUP.search(line)
+      if match:
+        cmd = 'report_qor -summary'
+        wns = match.group(1)
+        tns = match.group(2)
+        nsv = match.group(3)
+
+        # look for hold timing in the same section
+        for j in range(i, min(i + 100, len(logs))):
+          if logs[j].startswith('----------'):
+            break
+          if logs[j].startswith('Design             (Hold)'):
+            match = Patterns.QOR_HOLD.search(logs[j])
+            if match:
+              whs = match.group(1)
+              ths = match.group(2)
+              nhv = match.group(3)
+              m = M_cmd()
+              m.ln = i + 1
+              m.cmd = '%s {WNS = %s, TNS = %s, NSV = %s, WHS = %s, THS = %s, NHV = %s}' % (cmd, wns, tns, nsv, whs, ths, nhv)
+              m.compact = '%s {S: %s, %s, %s; H: %s, %s, %s}' % (cmd, wns, tns, nsv, whs, ths, nhv)
+              state.m_vec.append(m)
+    elif line == 'The tool has just encountered a fatal error:':
+      m = M_cmd()
+      m.ln = i + 1
+      m.cmd = 'FATAL'
+      state.m_vec.append(m)
+    return
 
 ##############################################################################
 
 # Author: Deyuan Guo
 # Data Model: CTS/CCD
-class M_cts:
+class M_cts(object):
   TAG = 'CTS'
   COLOR = ANSI.BLUE
+  __slots__ = ('ln', 'tag', 'info')
 
   def __init__(self):
     self.ln = 0
@@ -214,72 +1599,74 @@ class M_cts:
 
 # Author: Deyuan Guo
 # Data Controller: CTS/CCD
-class C_cts:
+class C_cts(C_base):
+  TRIGGERS = ('START_FUNC: ctsInterf::', 'START_FUNC: Concurrent Clock Data Optimization',
+              'Initial QoR', 'Final optimized QoR (commit with resolution)', 'INFO: CUS found no')
+  LOOKAHEAD = 2
+  LOOKAHEAD_TRIGGERS = ('Initial QoR', 'Final optimized QoR (commit with resolution)')
+
   @staticmethod
-  def collect_data(logs):
-    m_vec = []
-    for i in range(0, len(logs)):
-      line = logs[i]
-      if line.startswith('START_FUNC: ctsInterf::'):
-        match = re.search('START_FUNC: ctsInterf::(.*)\sCPU:', line)
-        if match:
-          cts = match.group(1).strip()
-          if cts == 'ccd':
-            continue # capture it in another way
-          m = M_cts()
-          m.ln = i + 1
-          m.info = cts
-          m_vec.append(m)
-      elif line.startswith('START_FUNC: Concurrent Clock Data Optimization'):
+  def on_line(state, logs, i, line):
+    if line.startswith('START_FUNC: ctsInterf::'):
+      match = Patterns.CTS_FUNC.search(line)
+      if match:
+        cts = match.group(1).strip()
+        if cts == 'ccd':
+          return # capture it in another way
         m = M_cts()
         m.ln = i + 1
-        m.info = 'CCD'
-        m_vec.append(m)
-      elif line.startswith('Initial QoR'):
-        wns = tns = whs = ths = '--'
-        match = re.search('\s+WNS\(setup\)=(\S+) TNS\(setup\)=(\S+) .*', logs[i + 1])
-        if match:
-          wns = match.group(1)
-          tns = match.group(2)
-        match = re.search('\s+WNS\(hold\)=(\S+) TNS\(hold\)=(\S+) .*', logs[i + 2])
-        if match:
-          whs = match.group(1)
-          ths = match.group(2)
-        if wns != '--' or tns != '--' or whs != '--' or ths != '--':
-          m = M_cts()
-          m.ln = i + 1
-          m.info = 'CUS {initial wns %s, tns %s, whs %s, ths %s}' % (wns, tns, whs, ths)
-          m_vec.append(m)
-      elif line.startswith('Final optimized QoR (commit with resolution)'):
-        wns = tns = whs = ths = '--'
-        match = re.search('\s+WNS\(setup\)=(\S+) TNS\(setup\)=(\S+) .*', logs[i + 1])
-        if match:
-          wns = match.group(1)
-          tns = match.group(2)
-        match = re.search('\s+WNS\(hold\)=(\S+) TNS\(hold\)=(\S+) .*', logs[i + 2])
-        if match:
-          whs = match.group(1)
-          ths = match.group(2)
-        if wns != '--' or tns != '--' or whs != '--' or ths != '--':
-          m = M_cts()
-          m.ln = i + 1
-          m.info = 'CUS {estimated wns %s, tns %s, whs %s, ths %s}' % (wns, tns, whs, ths)
-          m_vec.append(m)
-      elif line.startswith('INFO: CUS found no'):
+        m.info = cts
+        state.m_vec.append(m)
+    elif line.startswith('START_FUNC: Concurrent Clock Data Optimization'):
+      m = M_cts()
+      m.ln = i + 1
+      m.info = 'CCD'
+      state.m_vec.append(m)
+    elif line.startswith('Initial QoR'):
+      wns = tns = whs = ths = '--'
+      match = Patterns.CUS_SETUP.search(logs[i + 1])
+      if match:
+        wns = match.group(1)
+        tns = match.group(2)
+      match = Patterns.CUS_HOLD.search(logs[i + 2])
+      if match:
+        whs = match.group(1)
+        ths = match.group(2)
+      if wns != '--' or tns != '--' or whs != '--' or ths != '--':
         m = M_cts()
         m.ln = i + 1
-        m.info = line[6:]
-        m_vec.append(m)
-
-    return m_vec
+        m.info = 'CUS {initial wns %s, tns %s, whs %s, ths %s}' % (wns, tns, whs, ths)
+        state.m_vec.append(m)
+    elif line.startswith('Final optimized QoR (commit with resolution)'):
+      wns = tns = whs = ths = '--'
+      match = Patterns.CUS_SETUP.search(logs[i + 1])
+      if match:
+        wns = match.group(1)
+        tns = match.group(2)
+      match = Patterns.CUS_HOLD.search(logs[i + 2])
+      if match:
+        whs = match.group(1)
+        ths = match.group(2)
+      if wns != '--' or tns != '--' or whs != '--' or ths != '--':
+        m = M_cts()
+        m.ln = i + 1
+        m.info = 'CUS {estimated wns %s, tns %s, whs %s, ths %s}' % (wns, tns, whs, ths)
+        state.m_vec.append(m)
+    elif line.startswith('INFO: CUS found no'):
+      m = M_cts()
+      m.ln = i + 1
+      m.info = line[6:]
+      state.m_vec.append(m)
+    return
 
 ##############################################################################
 
 # Author: Deyuan Guo
 # Data Model: GR
-class M_gr:
+class M_gr(object):
   TAG = 'GR'
   COLOR = ANSI.MAGENTA
+  __slots__ = ('ln', 'tag', 'info', 'phase', 'compact')
 
   def __init__(self):
     self.ln = 0
@@ -304,113 +1691,122 @@ class M_gr:
 
 # Author: Deyuan Guo
 # Data Controller: GR
-class C_gr:
+class C_gr(C_base):
+  TRIGGERS = ('Start Global Route ...', 'Start GR phase ', 'Start track assignment',
+              'Start DR iteration ', 'Initial.', 'phase')
+
   @staticmethod
-  def collect_data(logs):
-    m_vec = []
-    for i in range(0, len(logs)):
-      line = logs[i]
-      if line.startswith('Start Global Route ...'):
-        m = M_gr()
-        m.ln = i + 1
-        m.info = 'GR'
-        m_vec.append(m)
-    C_gr.discover_gr_data(logs, m_vec)
-    return m_vec
+  def on_line(state, logs, i, line):
+    if line.startswith('Start Global Route ...'):
+      C_gr.on_finish(state, logs)
+      m = M_gr()
+      m.ln = i + 1
+      m.info = 'GR'
+      state.m_vec.append(m)
+      state.cur = m
+      state.phase = [] # list of tuples
+      return
+
+    # Extract GR/TA/DR phase and GRC information of the current GR
+    if state.cur == None or i <= state.cur.ln:
+      return
+    if line.startswith('Start GR phase '):
+      match = Patterns.GR_PHASE.search(line)
+      if match:
+        state.phase.append(('GR', match.group(1)))
+    elif line == 'Start track assignment':
+      state.phase.append(('TA',))
+    elif line.startswith('Start DR iteration '):
+      match = Patterns.DR_ITER.search(line)
+      if match:
+        state.phase.append(('DR', match.group(1)))
+    elif line.startswith('Initial.') or line.startswith('phase'):
+      match = Patterns.GR_OVERFLOW.search(line)
+      if match:
+        state.phase.append(('GRC', match.group(7)))
+    return
 
   @staticmethod
-  def discover_gr_data(logs, m_vec):
-    for k in range(0, len(m_vec)):
-      m = m_vec[k]
-      ln = m.ln
-      next_ln = len(logs)
-      if k + 1 < len(m_vec):
-        next_ln = m_vec[k + 1].ln
+  def on_finish(state, logs):
+    if state.cur != None:
+      C_gr.compose_phase(state.cur, state.phase)
+      state.cur = None
+    return
 
-      # Extract GR/TA/DR phase and GRC information
-      phase = [] # list of tuples
-      for i in range(ln + 1, next_ln):
-        line = logs[i]
-        if line.startswith('Start GR phase '):
-          match = re.search('Start GR phase (\d+)', line)
-          if match:
-            phase.append(('GR', match.group(1)))
-        elif line == 'Start track assignment':
-          phase.append(('TA',))
-        elif line.startswith('Start DR iteration '):
-          match = re.search('Start DR iteration (\d+):', line)
-          if match:
-            phase.append(('DR', match.group(1)))
-        elif line.startswith('Initial.') or line.startswith('phase'):
-          match = re.search('Both Dirs: Overflow =(\s+)(\d+) Max =(\s+)(\d+) GRCs =(\s+)(\d+) \((\S+)%', line)
-          if match:
-            phase.append(('GRC', match.group(7)))
-
-      # Compose the phase string
-      phase_str = ''
-      compact = ''
-      prev_phase = ''
-      i = 0
-      while i < len(phase):
-        if phase[i][0] == 'GR': ### GR
-          ph, it = phase[i]
-          i += 1
-          if prev_phase != ph:
-            phase_str += ' : GR'
-            compact += ' : GR'
-          phase_str += ' [' + it + ']'
-          compact += ' [' + it + ']'
-          # Append GRC
-          grc_str = ''
+  @staticmethod
+  def settle(state, logs, end_ln):
+    if state.cur != None:
+      return len(state.m_vec) - 1
+    return len(state.m_vec)
+
+  @staticmethod
+  def compose_phase(m, phase):
+    # Compose the phase string
+    phase_str = ''
+    compact = ''
+    prev_phase = ''
+    i = 0
+    j = 0
+    while i < len(phase):
+      if phase[i][0] == 'GR': ### GR
+        ph, it = phase[i]
+        i += 1
+        if prev_phase != ph:
+          phase_str += ' : GR'
+          compact += ' : GR'
+        phase_str += ' [' + it + ']'
+        compact += ' [' + it + ']'
+        # Append GRC
+        grc_str = ''
+        for j in range(i, len(phase)):
+          if phase[j][0] != 'GRC':
+            break
+          ph, grc = phase[j]
+          grc_str += ' ' + grc + '%'
+        if j > i:
+          i = j
+        grc_str = grc_str.strip()
+        if grc_str != '':
+          phase_str += ' GRC={' + grc_str + '}'
+          compact += ' ' + grc_str.split(' ')[0]
+        prev_phase = 'GR'
+      elif phase[i][0] == 'TA': ### TA
+        i += 1
+        phase_str += ' : TA'
+        compact += ' : TA'
+        prev_phase = 'TA'
+      elif phase[i][0] == 'DR': ### DR
+        ph, it = phase[i]
+        i += 1
+        dr_str = ''
+        if prev_phase != ph:
+          dr_str += ' : DR'
+        # Find range of DR iter
+        if it.isdigit():
+          it_start = int(it)
+          prev_it = it_start
           for j in range(i, len(phase)):
-            if phase[j][0] != 'GRC':
+            if phase[j][0] == 'DR' and phase[j][1].isdigit() and int(phase[j][1]) == prev_it + 1:
+              prev_it += 1
+              i = j + 1
+            else:
+              i = j
               break
-            ph, grc = phase[j]
-            grc_str += ' ' + grc + '%'
-          if j > i:
-            i = j
-          grc_str = grc_str.strip()
-          if grc_str != '':
-            phase_str += ' GRC={' + grc_str + '}'
-            compact += ' ' + grc_str.split(' ')[0]
-          prev_phase = 'GR'
-        elif phase[i][0] == 'TA': ### TA
-          i += 1
-          phase_str += ' : TA'
-          compact += ' : TA'
-          prev_phase = 'TA'
-        elif phase[i][0] == 'DR': ### DR
-          ph, it = phase[i]
-          i += 1
-          dr_str = ''
-          if prev_phase != ph:
-            dr_str += ' : DR'
-          # Find range of DR iter
-          if it.isdigit():
-            it_start = int(it)
-            prev_it = it_start
-            for j in range(i, len(phase)):
-              if phase[j][0] == 'DR' and phase[j][1].isdigit() and int(phase[j][1]) == prev_it + 1:
-                prev_it += 1
-                i = j + 1
-              else:
-                i = j
-                break
-            dr_str += ' [' + it
-            if prev_it > it_start:
-              dr_str += '-' + str(prev_it)
-            dr_str += ']'
-          else:
-            dr_str += ' [' + it + ']'
-          phase_str += dr_str
-          compact += dr_str
-          prev_phase = 'DR'
-        else: ### GRC, etc. intermediate values
-          i += 1
-
-      if phase_str != '':
-        m.phase = phase_str
-        m.compact = compact
+          dr_str += ' [' + it
+          if prev_it > it_start:
+            dr_str += '-' + str(prev_it)
+          dr_str += ']'
+        else:
+          dr_str += ' [' + it + ']'
+        phase_str += dr_str
+        compact += dr_str
+        prev_phase = 'DR'
+      else: ### GRC, etc. intermediate values
+        i += 1
+
+    if phase_str != '':
+      m.phase = phase_str
+      m.compact = compact
 
     return
 
@@ -418,9 +1814,11 @@ class C_gr:
 
 # Author: Deyuan Guo
 # Data Model: LGL
-class M_lgl:
+class M_lgl(object):
   TAG = 'LGL'
   COLOR = ANSI.MAGENTA
+  __slots__ = ('ln', 'tag', 'info', 'lgl_moved', 'lgl_total', 'lgl_avg',
+               'lgl_max', 'lgl_large', 'place_pct', 'runtime')
 
   def __init__(self):
     self.ln = 0
@@ -463,58 +1861,80 @@ class M_lgl:
 
 # Author: Deyuan Guo
 # Data Controller: LGL
-class C_lgl:
+class C_lgl(C_base):
+  TRIGGERS = ('Starting legalizer.', 'Running placement using ',
+              'number of cells aggregated:', 'max cell displacement:', 'avg cell displacement:',
+              'number of cells moved:', 'number of large displacements:')
+  LOOKAHEAD = 50
+  LOOKAHEAD_TRIGGERS = ('Running placement using ',)
+  TIME_STAMPS = ('START_FUNC: legalize_placement', 'END_FUNC: legalize_placement')
+  FIELDS = ('runtime',)
+  TIME_FIELDS = ('runtime',)
+
   @staticmethod
-  def collect_data(logs):
-    m_vec = []
-    for i in range(0, len(logs)):
-      line = logs[i]
-      if line.startswith('Starting legalizer.'):
-        m = M_lgl()
-        m.ln = i + 1
-        m.info = 'LGL'
-        m_vec.append(m)
-      elif line.startswith('Running placement using '):
-        m = M_lgl()
-        m.ln = i + 1
-        m.info = 'PLACE'
-        m_vec.append(m)
+  def create_state():
+    state = ParseState()
+    state.done = 0    # data models with runtime discovered
+    return state
 
-    C_lgl.discover_lgl_data(logs, m_vec)
-    C_lgl.discover_place_data(logs, m_vec)
-    if ICC2LogViewer.verbose:
-      C_lgl.discover_lgl_runtime(logs, m_vec)
-    return m_vec
+  @staticmethod
+  def on_line(state, logs, i, line):
+    if line.startswith('Starting legalizer.'):
+      m = M_lgl()
+      m.ln = i + 1
+      m.info = 'LGL'
+      state.m_vec.append(m)
+      state.cur = m
+    elif line.startswith('Running placement using '):
+      m = M_lgl()
+      m.ln = i + 1
+      m.info = 'PLACE'
+      state.m_vec.append(m)
+      state.cur = None
+      C_lgl.discover_place_data(logs, m)
+    elif state.cur != None and i > state.cur.ln:
+      C_lgl.discover_lgl_data(state, line)
+    return
 
   @staticmethod
-  def discover_lgl_data(logs, m_vec):
-    for k in range(0, len(m_vec)):
-      m = m_vec[k]
-      if m.info != 'LGL':
-        continue
-      ln = m.ln
-      if k == len(m_vec) - 1:
-        next_ln = len(logs)
-      else:
-        next_ln = m_vec[k + 1].ln
-      for i in range(ln + 1, next_ln):
-        line = logs[i]
-        if line.startswith('number of cells aggregated:'):
-          m.lgl_total = (line.split())[4].strip()
-        elif line.startswith('max cell displacement:'):
-          m.lgl_max = (line.split())[3].strip()
-        elif line.startswith('avg cell displacement:'):
-          m.lgl_avg = (line.split())[3].strip()
-        elif line.startswith('number of cells moved:'):
-          m.lgl_moved = (line.split())[4].strip()
-        elif line.startswith('number of large displacements:'):
-          m.lgl_large = (line.split())[4].strip()
-          break
+  def on_finish(state, logs):
+    state.cur = None
+    if 'runtime' in state.fields:
+      C_lgl.discover_lgl_runtime(state, logs, len(state.m_vec))
+    return
+
+  @staticmethod
+  def settle(state, logs, end_ln):
+    # LGL data ends with its section, runtime is searched up to the next model
+    n = len(state.m_vec)
+    if n > 0 and (state.cur != None or 'runtime' in state.fields):
+      n -= 1
+    if 'runtime' in state.fields:
+      C_lgl.discover_lgl_runtime(state, logs, n)
+    return n
+
+  @staticmethod
+  def discover_lgl_data(state, line):
+    m = state.cur
+    if line.startswith('number of cells aggregated:'):
+      m.lgl_total = (line.split())[4].strip()
+    elif line.startswith('max cell displacement:'):
+      m.lgl_max = (line.split())[3].strip()
+    elif line.startswith('avg cell displacement:'):
+      m.lgl_avg = (line.split())[3].strip()
+    elif line.startswith('number of cells moved:'):
+      m.lgl_moved = (line.split())[4].strip()
+    elif line.startswith('number of large displacements:'):
+      m.lgl_large = (line.split())[4].strip()
+      state.cur = None
     return
 
   @staticmethod
-  def discover_lgl_runtime(logs, m_vec):
-    for k in range(0, len(m_vec)):
+  def discover_lgl_runtime(state, logs, end):
+    m_vec = state.m_vec
+    begins = state.time_index.get('START_FUNC: legalize_placement')
+    ends = state.time_index.get('END_FUNC: legalize_placement')
+    for k in range(state.done, end):
       m = m_vec[k]
       if m.info != 'LGL':
         continue
@@ -530,22 +1950,15 @@ class C_lgl:
       else:
         next_ln = m_vec[k + 1].ln
 
+      # nearest begin in (prev_ln, ln] and nearest end in [ln, next_ln)
       elapsed_begin = -1
       elapsed_end = -1
-      for i in range(ln, prev_ln, -1):
-        line = logs[i]
-        if line.startswith('START_FUNC: legalize_placement'):
-          match = re.search('ELAPSE:\s+(\d+) s', line)
-          if match:
-            elapsed_begin = int(match.group(1))
-            break;
-      for i in range(ln, next_ln):
-        line = logs[i]
-        if line.startswith('END_FUNC: legalize_placement'):
-          match = re.search('ELAPSE:\s+(\d+) s', line)
-          if match:
-            elapsed_end = int(match.group(1))
-            break;
+      b = begins.find_prev(ln, prev_ln)
+      if b >= 0:
+        elapsed_begin = begins.elapsed[b]
+      e = ends.find_next(ln, next_ln)
+      if e >= 0:
+        elapsed_end = ends.elapsed[e]
 
       if elapsed_begin != -1 and elapsed_end != -1 and elapsed_begin < elapsed_end:
         elapsed = elapsed_end - elapsed_begin
@@ -559,30 +1972,28 @@ class C_lgl:
         hh, mm = divmod(mm, 60)
         m.runtime = 'end %d:%02d:%02d' % (hh, mm, ss)
 
+    state.done = max(state.done, end)
     return
 
   @staticmethod
-  def discover_place_data(logs, m_vec):
-    for k in range(0, len(m_vec)):
-      m = m_vec[k]
-      if m.info != 'PLACE':
-        continue
-      ln = m.ln
-      for i in range(ln + 1, min(ln + 50, len(logs))):
-        line = logs[i]
-        match = re.search('coarse place (\d+)% done.', line)
-        if match:
-          m.place_pct = match.group(1)
-          break
+  def discover_place_data(logs, m):
+    ln = m.ln
+    for i in range(ln + 1, min(ln + 50, len(logs))):
+      line = logs[i]
+      match = Patterns.COARSE_PLACE.search(line)
+      if match:
+        m.place_pct = match.group(1)
+        break
     return
 
 ##############################################################################
 
 # Author: Deyuan Guo
 # Data Model: DFT
-class M_dft:
+class M_dft(object):
   TAG = 'DFT'
   COLOR = ANSI.MAGENTA
+  __slots__ = ('ln', 'tag', 'info')
 
   def __init__(self):
     self.ln = 0
@@ -601,36 +2012,42 @@ class M_dft:
 
 # Author: Deyuan Guo
 # Data Controller: DFT
-class C_dft:
-  @staticmethod
-  def collect_data(logs):
-    m_vec = []
-    info = ''
-    for i in range(0, len(logs)):
-      line = logs[i]
-      if line.startswith('DFT: pre-opt wirelength:'):
-        next_line = logs[i + 1]
-        if (next_line.startswith('DFT: post-opt wirelength:')):
-          preWireLen = line.split(' ')[-1]
-          postWireLen = next_line.split(' ')[-1]
-          info = 'DFT : wirelength ' + preWireLen + ' -> ' + postWireLen
-
-      if info != '':
-        m = M_dft()
-        m.ln = i + 1
-        m.info = info
-        m_vec.append(m)
-        info = ''
+class C_dft(C_base):
+  TRIGGERS = ('DFT: pre-opt wirelength:',)
+  LOOKAHEAD = 1
 
-    return m_vec
+  @staticmethod
+  def on_line(state, logs, i, line):
+    next_line = logs[i + 1]
+    if (next_line.startswith('DFT: post-opt wirelength:')):
+      preWireLen = line.split(' ')[-1]
+      postWireLen = next_line.split(' ')[-1]
+      m = M_dft()
+      m.ln = i + 1
+      m.info = 'DFT : wirelength ' + preWireLen + ' -> ' + postWireLen
+      state.m_vec.append(m)
+    return
 
 ##############################################################################
 
 # Author: Deyuan Guo
 # Data Model: QoR Heartbeat
-class M_qor:
+class M_qor(object):
   TAG = 'QOR'
   COLOR = ANSI.GREEN
+  __slots__ = ('ln', 'tag', 'line', 'valid', 'name', 'elapsed', 'wns', 'tns',
+               'nsv', 'whv', 'thv', 'nhv', 'max_tran', 'max_tran_v', 'max_cap',
+               'max_cap_v', 'area', 'num_inst', 'num_buf', 'num_inv',
+               'num_lvth', 'pct_lvth', 'leakage', 'peak_mem', 'delta_elapsed',
+               'elapsed_sec', 'numbers')
+
+  # Numeric fields, converted once into M_qor.numbers when a heartbeat is
+  # complete. The strings are kept as they are shown in the log
+  NUMBERS = ('wns', 'tns', 'nsv', 'whv', 'thv', 'nhv', 'max_tran', 'max_tran_v',
+             'max_cap', 'max_cap_v', 'area', 'num_inst', 'num_buf', 'num_inv',
+             'num_lvth', 'pct_lvth', 'leakage', 'peak_mem')
+  NUMBER_INDEX = dict((field, k) for k, field in enumerate(NUMBERS))
+  SUFFIXES = {'K': 1e3, 'M': 1e6, 'G': 1e9}
 
   def __init__(self):
     self.ln = 0
@@ -658,6 +2075,8 @@ class M_qor:
     self.leakage = '--'
     self.peak_mem = '--'
     self.delta_elapsed = 0
+    self.elapsed_sec = None # elapsed time in seconds, None if unknown
+    self.numbers = ()       # values of NUMBERS, None if not a number
 
   def to_string(self):
     if not self.valid:
@@ -689,6 +2108,55 @@ class M_qor:
   def get_tag(self):
     return (self.tag + ' ' + self.name)[:10]
 
+  # Return the value of field as int or float, None if it is not a number
+  def get_number(self, field):
+    if field == 'elapsed':
+      return self.elapsed_sec
+    if len(self.numbers) == 0:
+      return None
+    return self.numbers[M_qor.NUMBER_INDEX[field]]
+
+  def set_numbers(self):
+    if self.elapsed_sec == None:
+      self.elapsed_sec = M_qor.to_seconds(self.elapsed)
+    self.numbers = tuple([M_qor.to_number(getattr(self, field)) for field in M_qor.NUMBERS])
+    return
+
+  # '1:02:03' -> 3723, None for '--' and negative time
+  @staticmethod
+  def to_seconds(text):
+    fields = text.split(':')
+    if len(fields) != 3 or text[0] == '-':
+      return None
+    try:
+      return int(fields[0]) * 3600 + int(fields[1]) * 60 + int(fields[2])
+    except ValueError:
+      return None
+
+  # '12' -> 12, '-0.5' -> -0.5, '1.2K' -> 1200.0, '4485Mb' -> 4485,
+  # None for '--', 'inf', 'nan' and other text
+  @staticmethod
+  def to_number(text):
+    try:
+      return int(text)
+    except ValueError:
+      pass
+    try:
+      number = float(text)
+      if number - number != 0: # inf and nan do not sort or subtract
+        return None
+      return number
+    except ValueError:
+      pass
+    digits = text.rstrip('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ%')
+    if digits == '' or digits == text:
+      return None
+    scale = M_qor.SUFFIXES.get(text[len(digits):])
+    number = M_qor.to_number(digits)
+    if number == None or scale == None:
+      return number
+    return number * scale
+
   @staticmethod
   def header():
     if not ICC2LogViewer.verbose:
@@ -715,25 +2183,103 @@ class M_qor:
 
 # Author: Deyuan Guo
 # Data Controller: QoR Heartbeat
-class C_qor:
+class C_qor(C_base):
+  TRIGGERS = ('    *   * ', 'npo-place-opt', 'npo-clock-opt', 'Route-opt',
+              'START_FUNC: ', 'END_FUNC: ')
+  STRIPPED_TRIGGERS = ('ELAPSED  WORST NEG TOTAL NEG',)
+  LOOKAHEAD = 3     # APS heartbeat
+  LOOKAHEAD_TRIGGERS = ('ELAPSED  WORST NEG TOTAL NEG',)
+  TIME_STAMPS = ()
+  ALL_TIME_STAMPS = True # as the heartbeat time of the first versions
+  FIELDS = ('name', 'elapsed', 'numbers') # elapsed also gives peak_mem and delta_elapsed
+  TIME_FIELDS = ('elapsed',)
+
+  # Phase banners naming NPO/NRO heartbeats
+  PHASE_BANNERS = TriggerIndex([('npo-place-opt', 'npo-place-opt'),
+                                ('npo-clock-opt', 'npo-clock-opt'),
+                                ('Route-opt', 'Route-opt')])
+
+  # Functions naming APS heartbeats, other functions are 'FUNC'
+  APS_FUNCS = TriggerIndex([('START_FUNC: APS_S_DRC', 'DRC'),
+                            ('START_FUNC: psynopt_delay_opto', 'DELAY_OPTO'),
+                            ('START_FUNC: APS_S_HOLD', 'HOLD')])
+
   @staticmethod
-  def collect_data(logs):
-    m_vec = []
-    for i in range(0, len(logs)):
-      line = logs[i]
-      if line.strip().startswith('ELAPSED  WORST NEG TOTAL NEG'):
-        if i + 3 < len(logs):
-          m_vec.append(C_qor.collect_aps_qor(logs, i + 3))
-      elif line.startswith('    *   * '):
-        if len(line.split()) >= 16:
-          m_vec.append(C_qor.collect_npo_qor(logs, i))
-        elif len(line.split()) >= 13:
-          m_vec.append(C_qor.collect_nro_qor(logs, i))
+  def create_state():
+    state = ParseState()
+    state.banners = [] # (line index, heartbeat name) of NPO/NRO phase banners
+    state.banner_idx = [] # line indexes of state.banners, for bisect
+    state.funcs = []      # APS_FUNCS kind of START_FUNC/END_FUNC lines
+    state.func_idx = []   # line indexes of state.funcs, for bisect
+    state.done = 0          # data models with time/mem and name discovered
+    state.elapse_ln = 0     # line of the last data model without elapsed time
+    state.heartbeat_ln = {} # tag -> line of the last data model, m_vec[0] excluded
+    return state
 
+  @staticmethod
+  def on_line(state, logs, i, line):
+    if line.strip().startswith('ELAPSED  WORST NEG TOTAL NEG'):
+      if i + 3 < len(logs):
+        state.m_vec.append(C_qor.collect_aps_qor(logs, i + 3))
+    elif line.startswith('    *   * '):
+      if len(line.split()) >= 16:
+        state.m_vec.append(C_qor.collect_npo_qor(logs, i))
+      elif len(line.split()) >= 13:
+        state.m_vec.append(C_qor.collect_nro_qor(logs, i))
+    elif 'name' not in state.fields:
+      return
+    elif line.startswith('START_FUNC: ') or line.startswith('END_FUNC: '):
+      kinds = C_qor.APS_FUNCS.match(line)
+      if len(kinds) > 0:
+        state.funcs.append(kinds[0])
+      else:
+        state.funcs.append('FUNC')
+      state.func_idx.append(i)
+    else:
+      C_qor.collect_banner(state, i, line)
+    return
+
+  @staticmethod
+  def on_finish(state, logs):
     # Discover more information from logs
-    C_qor.discover_time_mem(logs, m_vec)
-    C_qor.discover_heartbeat_name(logs, m_vec)
-    return m_vec
+    C_qor.settle(state, logs, len(logs) + 1)
+    return
+
+  @staticmethod
+  def settle(state, logs, end_ln):
+    # time stamps, functions and phase banners of a heartbeat are found
+    # before its line
+    n = state.done
+    while n < len(state.m_vec) and state.m_vec[n].ln < end_ln:
+      n += 1
+    if 'elapsed' in state.fields:
+      C_qor.discover_time_mem(state, n)
+    if 'name' in state.fields:
+      C_qor.discover_heartbeat_name(state, n)
+    if 'numbers' in state.fields:
+      for m in state.m_vec[state.done:n]:
+        m.set_numbers()
+    state.done = n
+    return n
+
+  @staticmethod
+  def collect_banner(state, i, line):
+    name = ''
+    for prefix in C_qor.PHASE_BANNERS.match(line):
+      if line == prefix + ' initial QoR':
+        name = 'START'
+      elif line == prefix + ' final QoR':
+        name = 'END'
+      elif line.startswith(prefix + ' optimization'):
+        match = Patterns.PHASE_ITER[prefix].search(line)
+        if match:
+          name = match.group(1).strip()
+          if name.startswith('Phase '):
+            name = 'Ph.' + name.split(' ')[1]
+    if name != '':
+      state.banners.append((i, name))
+      state.banner_idx.append(i)
+    return
 
   @staticmethod
   def collect_aps_qor(logs, ln):
@@ -815,105 +2361,67 @@ class C_qor:
     return m
 
   @staticmethod
-  def discover_time_mem(logs, m_vec):
-    prev_ln = 0
-    for m in m_vec:
-      if m.elapsed != "--":
-        continue
-      ln = m.ln
-      for i in range(ln, prev_ln, -1):
-        line = logs[i]
-        match = re.search('ELAPSE:\s+(\d+) s ', line)
-        if match:
-          elapsed = int(match.group(1))
+  def discover_time_mem(state, end):
+    m_vec = state.m_vec
+    time_index = state.time_index
+    prev_ln = state.elapse_ln
+    for m in m_vec[state.done:end]:
+      if m.elapsed == "--":
+        # nearest time stamp in (prev_ln, ln]
+        k = time_index.find_prev(m.ln, prev_ln)
+        if k >= 0:
+          elapsed = time_index.elapsed[k]
+          peak_mem = time_index.peak_mem[k]
           mm, ss = divmod(elapsed, 60)
           hh, mm = divmod(mm, 60)
           m.elapsed = '%d:%02d:%02d' % (hh, mm, ss)
-          if m.peak_mem == '--':
-            match = re.search('MEM-PEAK:\s+(\d+) Mb', line)
-            if match:
-              m.peak_mem = match.group(1)
-          break
-      prev_ln = ln
+          if m.peak_mem == '--' and peak_mem != None:
+            m.peak_mem = peak_mem
+        prev_ln = m.ln
+      m.elapsed_sec = M_qor.to_seconds(m.elapsed)
+    state.elapse_ln = prev_ln
+
+    # calculate delta elapsed, unknown elapsed time counts as 0
+    for i in range(state.done, end):
+      t0 = 0
+      if i > 0:
+        t0 = m_vec[i - 1].elapsed_sec or 0
+      m_vec[i].delta_elapsed = (m_vec[i].elapsed_sec or 0) - t0
 
-    # calculate delta elapsed
-    for i in range(len(m_vec)):
-      if i == 0:
-        elapsed_1 = m_vec[i].elapsed
-        t1 = 0
-        if len(elapsed_1.split(':')) == 3 and elapsed_1[0] != '-':
-          hh, mm, ss = elapsed_1.split(':')
-          t1 = int(hh) * 3600 + int(mm) * 60 + int(ss)
-        m_vec[i].delta_elapsed = t1
-      else:
-        elapsed_0 = m_vec[i - 1].elapsed
-        elapsed_1 = m_vec[i].elapsed
-        t0 = 0
-        t1 = 0
-        if len(elapsed_0.split(':')) == 3 and elapsed_0[0] != '-':
-          hh, mm, ss = elapsed_0.split(':')
-          t0 = int(hh) * 3600 + int(mm) * 60 + int(ss)
-        if len(elapsed_1.split(':')) == 3 and elapsed_1[0] != '-':
-          hh, mm, ss = elapsed_1.split(':')
-          t1 = int(hh) * 3600 + int(mm) * 60 + int(ss)
-        m_vec[i].delta_elapsed = t1 - t0
+    return
 
+  @staticmethod
+  def discover_aps_name(state, m):
+    # last function in the 500 lines up to the heartbeat, and the one before
+    lo = max(0, m.ln - 500)
+    k = bisect.bisect_right(state.func_idx, m.ln) - 1
+    if k < 0 or state.func_idx[k] <= lo:
+      return
+    if state.funcs[k] == 'DRC':
+      m.name = 'DRC'
+    elif state.funcs[k] == 'DELAY_OPTO' and k > 0 and state.func_idx[k - 1] > lo:
+      if state.funcs[k - 1] == 'HOLD':
+        m.name = 'HOLD'
+      else:
+        m.name = 'OPT'
     return
 
   @staticmethod
-  def discover_heartbeat_name(logs, m_vec):
-    for i in range(len(m_vec)):
-      m = m_vec[i]
-      if m.name != '':
-        continue
-      if m.tag == 'APS':
-        ln = m.ln
-        met_start = False
-        for j in range(ln, max(0, ln-500), -1):
-          line = logs[j]
-          if not met_start:
-            if line.startswith('START_FUNC: APS_S_DRC'):
-              m.name = 'DRC'
-              break
-            elif line.startswith('START_FUNC: psynopt_delay_opto'):
-              met_start = True
-            elif line.startswith('START_FUNC: ') or line.startswith('END_FUNC: '):
-              break
-          else:
-            if line.startswith('START_FUNC: APS_S_HOLD'):
-              m.name = 'HOLD'
-              break
-            elif line.startswith('START_FUNC: ') or line.startswith('END_FUNC: '):
-              m.name = 'OPT'
-              break
-      elif m.tag == 'NPO' or m.tag == 'NRO':
-        ln = m.ln
-        prev_ln = 0
-        for j in range(i - 1, 0, -1):
-          if m_vec[j].tag == m.tag:
-            prev_ln = m_vec[j].ln
-            break
-        for j in range(ln, prev_ln, -1):
-          line = logs[j]
-          for prefix in ['npo-place-opt', 'npo-clock-opt', 'Route-opt']:
-            if line.startswith(prefix):
-              if line == prefix + ' initial QoR':
-                m.name = 'START'
-                break
-              elif line == prefix + ' final QoR':
-                m.name = 'END'
-                break
-              elif line.startswith(prefix + ' optimization'):
-                match = re.search(prefix + ' optimization (.*) Iter\s+1', line)
-                if match:
-                  name = match.group(1).strip()
-                  if name.startswith('Phase '):
-                    m.name = 'Ph.' + name.split(' ')[1]
-                  else:
-                    m.name = name
-                  break
-              if m.name != '':
-                break
+  def discover_heartbeat_name(state, end):
+    m_vec = state.m_vec
+    banner_idx = state.banner_idx
+    prev_ln = state.heartbeat_ln
+    for i in range(state.done, end):
+      m = m_vec[i]
+      if m.name == '' and m.tag == 'APS':
+        C_qor.discover_aps_name(state, m)
+      elif m.name == '' and (m.tag == 'NPO' or m.tag == 'NRO'):
+        # first named phase banner in (prev_ln, ln]
+        k = bisect.bisect_right(banner_idx, prev_ln.get(m.tag, 0))
+        if k < len(banner_idx) and banner_idx[k] <= m.ln:
+          m.name = state.banners[k][1]
+      if i > 0:
+        prev_ln[m.tag] = m.ln
 
     return
 
@@ -921,9 +2429,10 @@ class C_qor:
 
 # Author: Deyuan Guo
 # Data Model: Flow information
-class M_flow:
+class M_flow(object):
   TAG = 'FLOW'
   COLOR = ANSI.CYAN
+  __slots__ = ('ln', 'tag', 'info', 'compact')
 
   def __init__(self):
     self.ln = 0
@@ -945,91 +2454,75 @@ class M_flow:
 
 # Author: Deyuan Guo
 # Data Controller: Flow information
-class C_flow:
+class C_flow(C_base):
+  TRIGGERS = ('Running', 'Information: Current block utilization is', 'Timer Settings:')
+  LOOKAHEAD = 10
+  LOOKAHEAD_TRIGGERS = ('Timer Settings:',)
+
+  # Timer settings reported after 'Timer Settings:'
+  TIMER_SETTINGS = TriggerIndex([('Delay Calculation Style: ', 'delay'),
+                                 ('Signal Integrity Analysis: ', 'SI'),
+                                 ('Timing Window Analysis: ', 'TW'),
+                                 ('Advanced Waveform Propagation:', 'AWP'),
+                                 ('Variation Type: ', 'variation'),
+                                 ('Clock Reconvergence Pessimism Removal: ', 'CRPR'),
+                                 ('Advanced Receiver Model: ', 'CCS-RCV')])
+
   @staticmethod
-  def collect_data(logs):
-    m_vec = []
+  def on_line(state, logs, i, line):
     info = ''
     compact = ''
-    for i in range(0, len(logs)):
-      line = logs[i]
-
-      if line.startswith('Running'):
-        if line == 'Running initial placement':
-          info = 'initial_place'
-        elif line == 'Running initial HFS and DRC step.':
-          info = 'initial_drc'
-        elif line == 'Running initial optimization step.':
-          info = 'initial_opto'
-        elif line == 'Running final (timing-driven) placement step.':
-          info = 'final_place'
-        elif line == 'Running final optimization step.':
-          info = 'final_opto'
-        elif line == 'Running clock synthesis step.':
-          info = 'build_clock'
-        elif line == 'Running clock routing step.':
-          info = 'route_clock'
-        elif line == 'Running congestion-aware direct-timing-driven placement':
-          info = 'DTDP'
-      elif line.startswith('Information: Current block utilization is'):
-        match = re.search("Information: Current block utilization is \'(.*)\', effective utilization is \'(.*)\'. \(OPT-055\)", line)
-        if match:
-          ndmUtil = match.group(1)
-          cmapUtil = match.group(2)
-          info = 'utilization: raw = %s, effective = %s' % (ndmUtil, cmapUtil)
-      elif line.startswith('Timer Settings:'):
-        info = 'timer settings:'
-        compact = info
-        for j in range(i + 1, min(i + 10, len(logs))):
-          line2 = logs[j]
-          if line2.startswith('Delay Calculation Style: '):
-            delayCalc = line2.split(':')[1].strip()
-            info += ' delay = ' + delayCalc + ','
-            compact += ' ' + delayCalc + ','
-          elif line2.startswith('Signal Integrity Analysis: '):
-            SI = line2.split(':')[1].strip()
-            info += ' SI = ' + SI + ','
-            compact += ' ' + SI + ','
-          elif line2.startswith('Timing Window Analysis: '):
-            TW = line2.split(':')[1].strip()
-            info += ' TW = ' + TW + ','
-            compact += ' ' + TW + ','
-          elif line2.startswith('Advanced Waveform Propagation:'):
-            AWP = line2.split(':')[1].strip()
-            info += ' AWP = ' + AWP + ','
-            compact += ' ' + AWP + ','
-          elif line2.startswith('Variation Type: '):
-            Variation = line2.split(':')[1].strip()
-            info += ' variation = ' + Variation + ','
-            compact += ' ' + Variation + ','
-          elif line2.startswith('Clock Reconvergence Pessimism Removal: '):
-            CRPR = line2.split(':')[1].strip()
-            info += ' CRPR = ' + CRPR + ','
-            compact += ' ' + CRPR + ','
-          elif line2.startswith('Advanced Receiver Model: '):
-            rcv = line2.split(':')[1].strip()
-            info += ' CCS-RCV = ' + rcv + ','
-            compact += ' ' + rcv + ','
-        info = info[:-1] # remove the last comma
-        compact = compact[:-1] # remove the last comma
-
-      if info != '':
-        m = M_flow()
-        m.ln = i + 1
-        m.info = info
-        m.compact = compact
-        m_vec.append(m)
-        info = ''
-        compact = ''
-    return m_vec
+    if line.startswith('Running'):
+      if line == 'Running initial placement':
+        info = 'initial_place'
+      elif line == 'Running initial HFS and DRC step.':
+        info = 'initial_drc'
+      elif line == 'Running initial optimization step.':
+        info = 'initial_opto'
+      elif line == 'Running final (timing-driven) placement step.':
+        info = 'final_place'
+      elif line == 'Running final optimization step.':
+        info = 'final_opto'
+      elif line == 'Running clock synthesis step.':
+        info = 'build_clock'
+      elif line == 'Running clock routing step.':
+        info = 'route_clock'
+      elif line == 'Running congestion-aware direct-timing-driven placement':
+        info = 'DTDP'
+    elif line.startswith('Information: Current block utilization is'):
+      match = Patterns.UTILIZATION.search(line)
+      if match:
+        ndmUtil = match.group(1)
+        cmapUtil = match.group(2)
+        info = 'utilization: raw = %s, effective = %s' % (ndmUtil, cmapUtil)
+    elif line.startswith('Timer Settings:'):
+      info = 'timer settings:'
+      compact = info
+      for j in range(i + 1, min(i + 10, len(logs))):
+        line2 = logs[j]
+        for label in C_flow.TIMER_SETTINGS.match(line2):
+          setting = line2.split(':')[1].strip()
+          info += ' ' + label + ' = ' + setting + ','
+          compact += ' ' + setting + ','
+      info = info[:-1] # remove the last comma
+      compact = compact[:-1] # remove the last comma
+
+    if info != '':
+      m = M_flow()
+      m.ln = i + 1
+      m.info = info
+      m.compact = compact
+      state.m_vec.append(m)
+    return
 
 ##############################################################################
 
 # Author: Deyuan Guo
 # Data Model: RegEx
-class M_regex:
+class M_regex(object):
   TAG = 'REGEX'
   COLOR = ANSI.BLUE
+  __slots__ = ('ln', 'tag', 'info')
 
   def __init__(self):
     self.ln = 0
@@ -1048,28 +2541,565 @@ class M_regex:
 
 # Author: Deyuan Guo
 # Data Controller: RegEx
-class C_regex:
+class C_regex(C_base):
+  TRIGGERS = None # every line is tested by state.search
+  GROUP = '_regex' # group name prefix of each pattern in the alternation
+  # Backreferences and inline flags change meaning inside an alternation
+  UNSAFE = re.compile(r'\\[1-9]|\(\?P=|\(\?[iLmsux]')
+
   @staticmethod
-  def collect_data(logs, regex, show_progress):
-    m_vec = []
-    nfa = re.compile(regex)
-    ln = 0
+  def collect_data(logs, regexes, show_progress):
+    dispatcher = LogDispatcher()
+    dispatcher.add(C_regex, *regexes)
+    return dispatcher.collect_data(logs, show_progress)
+
+  # Check if several patterns can be searched as one alternation
+  @staticmethod
+  def can_combine(regexes):
+    return len(regexes) <= 1 or not any(C_regex.UNSAFE.search(r) for r in regexes)
+
+  # Several patterns are joined into one alternation of named groups, so a
+  # single search tells which pattern matched a line
+  @staticmethod
+  def combine(regexes):
+    if len(regexes) == 1:
+      return regexes[0]
+    return '|'.join(['(?P<' + C_regex.GROUP + str(k) + '>' + regex + ')'
+                     for k, regex in enumerate(regexes)])
+
+  @staticmethod
+  def create_state(*regexes):
+    state = ParseState()
+    state.tags = {}
+    if len(regexes) > 1:
+      for k in range(len(regexes)):
+        state.tags[C_regex.GROUP + str(k)] = M_regex.TAG + str(k + 1)
+    state.pattern = re.compile(C_regex.combine(regexes))
+    state.search = state.pattern.search
+    return state
+
+  # group is the lastgroup of the match of line, the dispatcher has searched
+  # it already
+  @staticmethod
+  def on_line(state, logs, i, line, group=None):
+    m = M_regex()
+    m.ln = i + 1
+    m.info = line
+    if len(state.tags) > 0:
+      m.tag = state.tags[group]
+    state.m_vec.append(m)
+    return
+
+##############################################################################
+
+# Author: Deyuan Guo
+# Single-pass dispatcher: every log line is read once and only routed to the
+# data controllers whose triggers match it
+class LogDispatcher:
+
+  def __init__(self):
+    self.controllers = [] # list of (controller, state)
+    self.routes = []      # list of (controller, state) reached through self.index
+    self.searches = []    # list of (controller, state) with state.search
+    self.line_searches = [] # LineSearch of each search, None if not possible
+    self.index = TriggerIndex() # trigger prefix -> position in self.routes
+    self.lookahead_index = TriggerIndex() # trigger prefix -> LOOKAHEAD, for -jobs
+    self.lookahead = 0    # max LOOKAHEAD of registered controllers
+    self.lookbehind = 0   # max LOOKBEHIND of registered controllers
+    self.settled = []     # number of settled data models of each controller
+    self.time_index = None # TimeIndex shared by controllers, see C_time
+    self.all_time_index = None # TimeIndex of every ELAPSE line, see C_elapse
+    self.begin_ln = 0     # first line to dispatch
+    self.end_ln = None    # line after the last one to dispatch, None for all
+    self.max_records = None # stop after this many data models, None for all
+    self.stop = None      # state of C_stop, None if no stop command
+    self.stop_ln = None   # line parsing stopped at, None if not stopped early
+    self.num_records = 0  # data models returned by settle() or finish()
+    self.unsettled = []   # (controller position, data model) settled after the bound
+    return
+
+
+  # Parse lines [begin_ln, end_ln) only, and stop after max_records data
+  # models or after the first run of command stop_cmd. Reading stops as soon
+  # as a limit is reached, and data models after it are dropped
+  def set_limits(self, begin_ln=0, end_ln=None, max_records=None, stop_cmd=None):
+    self.begin_ln = begin_ln
+    self.end_ln = end_ln
+    self.max_records = max_records
+    if stop_cmd != None:
+      self.stop = self.add(C_stop, stop_cmd)
+    return
+
+
+  # Line numbers in [ln, end_ln) to dispatch
+  def get_range(self, ln, end_ln):
+    if self.end_ln != None:
+      end_ln = min(end_ln, self.end_ln)
+    return range(max(ln, self.begin_ln), end_ln)
+
+
+  # Return True if a limit is reached when lines before ln are parsed
+  def is_stopped(self, ln):
+    if self.stop_ln == None:
+      if self.end_ln != None and ln >= self.end_ln:
+        self.stop_ln = self.end_ln
+      elif self.stop != None and self.stop.stop_ln != None:
+        self.stop_ln = self.stop.stop_ln + 1
+      elif (self.max_records != None and
+            sum([len(state.m_vec) for controller, state in self.controllers]) >= self.max_records):
+        self.stop_ln = ln
+    return self.stop_ln != None
+
+
+  # Return True if data model m is within the limits
+  def is_kept(self, m):
+    if self.end_ln != None and m.ln > self.end_ln:
+      return False
+    if self.stop != None and self.stop.stop_ln != None and m.ln > self.stop.stop_ln + 1:
+      return False
+    return True
+
+
+  # Register a data controller, args are passed to its create_state().
+  # Option fields lists the optional fields to compute, None for all.
+  # Return the state of the controller
+  def add(self, controller, *args, **options):
+    state = controller.create_state(*args)
+    fields = options.get('fields')
+    if fields == None:
+      state.fields = set(controller.FIELDS)
+    else:
+      state.fields = set(controller.FIELDS) & set(fields)
+    uses_time = len(controller.TIME_FIELDS) == 0 or len(state.fields & set(controller.TIME_FIELDS)) > 0
+    if controller.TIME_STAMPS != None and uses_time and controller.ALL_TIME_STAMPS:
+      if self.all_time_index == None:
+        self.all_time_index = self.add(C_elapse).index
+      for prefix in controller.TIME_STAMPS:
+        self.all_time_index.watch(prefix)
+      state.time_index = self.all_time_index
+    elif controller.TIME_STAMPS != None and uses_time:
+      if self.time_index == None:
+        self.time_index = self.add(C_time).index
+      for prefix in controller.TIME_STAMPS:
+        self.time_index.watch(prefix)
+      state.time_index = self.time_index
+    self.controllers.append((controller, state))
+    self.settled.append(0)
+    self.lookahead = max(self.lookahead, controller.LOOKAHEAD)
+    self.lookbehind = max(self.lookbehind, controller.LOOKBEHIND)
+    if controller.TRIGGERS == None:
+      self.searches.append((controller, state))
+      line_search = None
+      if hasattr(state, 'pattern'):
+        line_search = LineSearch.create(state.pattern)
+      self.line_searches.append(line_search)
+      return state
+    for prefix in controller.TRIGGERS:
+      self.index.add(prefix, len(self.routes))
+    for prefix in controller.STRIPPED_TRIGGERS:
+      self.index.add(prefix, len(self.routes), stripped=True)
+    self.routes.append((controller, state))
+
+    lookahead_triggers = controller.LOOKAHEAD_TRIGGERS
+    if lookahead_triggers == None:
+      lookahead_triggers = controller.TRIGGERS + controller.STRIPPED_TRIGGERS
+    for prefix in lookahead_triggers:
+      self.lookahead_index.add(prefix, controller.LOOKAHEAD,
+                               stripped=prefix in controller.STRIPPED_TRIGGERS)
+    return state
+
+
+  # Route one line to the controllers it triggers
+  def dispatch(self, logs, i, line):
+    for r in self.index.match(line):
+      controller, state = self.routes[r]
+      controller.on_line(state, logs, i, line)
+    return
+
+
+  # Feed every line once to all registered controllers, return data models
+  def collect_data(self, logs, show_progress=False):
+    ln = self.begin_ln
     batch_size = max(10000, len(logs) // 10 + 1)
-    while (ln < len(logs)):
-      start_ln = ln
+    if self.end_ln != None or self.max_records != None or self.stop != None:
+      batch_size = 10000 # check limits often
+    line_pattern = self.index.get_line_pattern()
+    while ln < len(logs) and not self.is_stopped(ln):
       end_ln = min(len(logs), ln + batch_size)
-      target_lines = filter(lambda x: nfa.search(logs[x]), range(start_ln, end_ln))
-      for i in target_lines:
-        m = M_regex()
-        m.ln = i + 1
-        m.info = logs[i]
-        m_vec.append(m)
+      indexes = self.get_range(ln, end_ln)
+      search_hits = self.find_search_lines(logs, indexes)
+      if (isinstance(logs, LogBuffer) and len(indexes) > 0 and
+          (len(self.searches) == 0 or search_hits != None)):
+        # only lines starting with a trigger are read from the buffer
+        trigger_lines = []
+        if line_pattern != None:
+          trigger_lines = logs.find_lines_starting(line_pattern, indexes[0], indexes[-1] + 1)
+        self.scan(logs, logs, 0, trigger_lines, search_hits)
+      else:
+        self.scan(logs, logs[ln:end_ln], ln, indexes, search_hits)
       ln = end_ln
       if show_progress:
-        print str(int(ln * 100 / len(logs))) + '%',
+        print(' ' + str(ln * 100 // len(logs)) + '%', end='')
+        sys.stdout.flush()
+    return self.finish(logs)
+
+
+  # Same as collect_data, for a LogStream. Only a window of lookbehind and
+  # lookahead lines around the line being parsed is kept in memory
+  def collect_stream(self, stream, show_progress=False):
+    stream.skip_to(self.begin_ln - self.lookbehind)
+    window = LineWindow(stream.first_ln)
+    ln = stream.first_ln
+    pct = 0
+    for lines in stream.read_chunks():
+      ln = self.feed(window, lines, ln)
+      if self.is_stopped(ln):
+        break # stop reading the log
+      if show_progress and stream.progress() >= pct + 10:
+        pct = stream.progress() // 10 * 10
+        print(' ' + str(pct) + '%', end='')
         sys.stdout.flush()
+    if not self.is_stopped(ln):
+      self.scan(window, window.buf, window.base, self.get_range(ln, len(window)))
+    if show_progress and pct < 100:
+      print(' 100%', end='')
+      sys.stdout.flush()
+    return self.finish(window)
+
+
+  # Same as collect_stream, but yield (data models, bound) of settle() after
+  # every chunk of lines, so data models are known before the whole log is
+  # read. The last bound is after the last line. In follow mode a running log
+  # is read until Ctrl-C, see LogStream.read_chunks
+  def settle_stream(self, stream, follow=False):
+    stream.skip_to(self.begin_ln - self.lookbehind)
+    window = LineWindow(stream.first_ln)
+    ln = stream.first_ln
+    for lines in stream.read_chunks(follow):
+      ln = self.feed(window, lines, ln)
+      yield self.settle(window, ln)
+      if self.is_stopped(ln):
+        break # stop reading the log
+    if not self.is_stopped(ln):
+      self.scan(window, window.buf, window.base, self.get_range(ln, len(window)))
+    m_vec, bound = self.settle(window, len(window), final=True)
+    yield (m_vec, len(window) + 1)
+
+
+  # Same as collect_data, for LogChunks parsed by a pool of jobs processes.
+  # Workers find the lines to dispatch and keep them with their lookahead
+  # lines, the dispatcher then replays them in order, so the data models are
+  # the same as collect_data
+  def collect_chunks(self, chunks, jobs, show_progress=False):
+    import multiprocessing
+    searches = [(state.pattern, controller.LOOKAHEAD) for controller, state in self.searches]
+    ranges = chunks.get_ranges()
+    tasks = []
+    for k in range(len(ranges)):
+      begin, end = ranges[k]
+      tasks.append((chunks.path, begin, end, k == len(ranges) - 1,
+                    self.index.table, self.lookahead_index.table, searches,
+                    max(12, self.lookahead)))
+
+    lines = {}      # line number -> line
+    indexes = []    # line numbers to dispatch
+    base = 0        # line number of the chunk
+    pct = 0
+    pool = multiprocessing.Pool(jobs)
+    try:
+      for k, (num_lines, chunk_indexes, chunk_lines) in enumerate(pool.imap(scan_chunk, tasks)):
+        for i, line in chunk_lines.items():
+          lines[base + i] = line
+        indexes += [base + i for i in chunk_indexes]
+        base += num_lines
+        if show_progress and (k + 1) * 100 // len(tasks) >= pct + 10:
+          pct = (k + 1) * 100 // len(tasks) // 10 * 10
+          print(' ' + str(pct) + '%', end='')
+          sys.stdout.flush()
+    finally:
+      pool.terminate()
+
+    logs = SparseLines(base, lines)
+    chunks.num_lines = base
+    chunks.head = [logs[i] for i in range(min(12, base))]
+    if self.begin_ln > 0 or self.end_ln != None:
+      indexes = [i for i in indexes if i >= self.begin_ln and (self.end_ln == None or i < self.end_ln)]
+    self.scan(logs, logs, 0, indexes)
+    return self.finish(logs)
+
+
+  # Append lines to a LineWindow and dispatch the lines followed by enough
+  # lookahead lines. ln is the next line to dispatch, return the new one
+  def feed(self, window, lines, ln):
+    window.extend(lines)
+    end_ln = len(window) - self.lookahead
+    if end_ln > ln:
+      self.scan(window, window.buf, window.base, self.get_range(ln, end_ln))
+      ln = end_ln
+      window.discard(ln - self.lookbehind)
+    return ln
+
+
+  # Lines of indexes matching each search, found in the whole buffer of a
+  # LogBuffer. None if some search has to test lines one by one
+  def find_search_lines(self, logs, indexes):
+    if (len(self.searches) == 0 or None in self.line_searches or
+        not isinstance(logs, LogBuffer) or len(indexes) == 0):
+      return None
+    return [line_search.find_lines(logs, indexes[0], indexes[-1] + 1)
+            for line_search in self.line_searches]
+
+
+  # Dispatch lines of logs in the order of indexes, where buf[0] is line base.
+  # search_hits are (line, lastgroup) matching each search if they are known, see
+  # find_search_lines. Controllers have separate states, so they can get
+  # their lines one after another
+  def scan(self, logs, buf, base, indexes, search_hits=None):
+    get = self.index.table.get
+    searches = self.searches
+    if search_hits != None:
+      searches = []
+    if len(self.index.table) > 0 or len(searches) > 0:
+      for i in indexes:
+        line = buf[i - base]
+        entry = get(line[:1])
+        if entry != None and (line.startswith(entry[0]) or
+                              (entry[1] and line.lstrip().startswith(entry[1]))):
+          self.dispatch(logs, i, line)
+        for controller, state in searches:
+          match = state.search(line)
+          if match:
+            controller.on_line(state, logs, i, line, match.lastgroup)
+    if search_hits != None:
+      for (controller, state), hits in zip(self.searches, search_hits):
+        for i, group in hits:
+          controller.on_line(state, logs, i, buf[i - base], group)
+    return
+
+
+  # Return data models settled since the last call as a list of (controller
+  # position, data model) in line order, and the smallest line a data model
+  # can still be added or changed at. Only data models before that line are
+  # returned, later ones wait for the next call. With final, all controllers
+  # are finished
+  def settle(self, logs, end_ln, final=False):
+    m_vec = list(self.unsettled)
+    bound = end_ln + 1 # a line dispatched later makes models after itself
+    for k in range(len(self.controllers)):
+      controller, state = self.controllers[k]
+      if final:
+        controller.on_finish(state, logs)
+        n = len(state.m_vec)
+      else:
+        n = controller.settle(state, logs, end_ln)
+      m_vec += [(k, m) for m in state.m_vec[self.settled[k]:n] if self.is_kept(m)]
+      self.settled[k] = n
+      for m in state.m_vec[n:]:
+        bound = min(bound, m.ln)
+    if final:
+      self.unsettled = []
+    else:
+      self.unsettled = [(k, m) for k, m in m_vec if m.ln >= bound]
+      m_vec = [(k, m) for k, m in m_vec if m.ln < bound]
+    return (self.take_records(m_vec), bound)
+
+
+  # Finish all controllers, return data models in line order. Data models at
+  # the same line are in registration order
+  def finish(self, logs):
+    m_vec = []
+    for k in range(len(self.controllers)):
+      controller, state = self.controllers[k]
+      controller.on_finish(state, logs)
+      m_vec += [(k, m) for m in state.m_vec if self.is_kept(m)]
+    return [m for k, m in self.take_records(m_vec)]
+
+
+  # Sort (controller position, data model) pairs in line order and keep the
+  # first ones, so that settle() and finish() return max_records data models
+  # at most in all. The sort is stable, so data models at the same line stay
+  # in registration order
+  def take_records(self, m_vec):
+    m_vec = sorted(m_vec, key=lambda km: km[1].ln)
+    if self.max_records != None:
+      m_vec = m_vec[:max(0, self.max_records - self.num_records)]
+    self.num_records += len(m_vec)
     return m_vec
 
+# Author: Deyuan Guo
+# Worker of LogDispatcher.collect_chunks: find lines to dispatch in a byte
+# range of the log. Return the number of lines, the line numbers to dispatch,
+# and a dict of the lines to keep: lines to dispatch with their lookahead
+# lines, and the first head_size lines read by lookahead of the last chunk
+def scan_chunk(task):
+  path, begin, end, last, table, lookahead_table, searches, head_size = task
+  with open(path, 'rb') as f:
+    f.seek(begin)
+    text = f.read(end - begin)
+  lines = decode_text(text).split('\n')
+  if not last:
+    lines.pop() # the chunk ends with a newline
+
+  # searches that can run over the whole chunk give their lines first
+  lookaheads = {} # line to dispatch -> lookahead
+  line_searches = [(LineSearch.create(pattern), pattern, lookahead) for pattern, lookahead in searches]
+  searches = [(pattern.search, lookahead) for line_search, pattern, lookahead in line_searches
+              if line_search == None]
+  for line_search, pattern, lookahead in line_searches:
+    if line_search != None:
+      for i in line_search.find_text_lines(text):
+        if i < len(lines):
+          lookaheads[i] = max(lookaheads.get(i, -1), lookahead)
+
+  lookahead_index = TriggerIndex()
+  lookahead_index.table = lookahead_table
+  get = table.get
+  if len(table) > 0 or len(searches) > 0:
+    for i in range(len(lines)):
+      line = lines[i]
+      lookahead = -1
+      entry = get(line[:1])
+      if entry != None and (line.startswith(entry[0]) or
+                            (entry[1] and line.lstrip().startswith(entry[1]))):
+        lookahead = max([0] + lookahead_index.match(line))
+      for search, search_lookahead in searches:
+        if search(line):
+          lookahead = max(lookahead, search_lookahead)
+      if lookahead >= 0:
+        lookaheads[i] = max(lookaheads.get(i, -1), lookahead)
+
+  indexes = sorted(lookaheads.keys())
+  kept = {}
+  for i in indexes:
+    for j in range(i, min(i + lookaheads[i] + 1, len(lines))):
+      kept[j] = lines[j]
+  for j in range(min(head_size, len(lines))):
+    kept[j] = lines[j]
+  return (len(lines), indexes, kept)
+
+##############################################################################
+
+# Author: Deyuan Guo
+# On-disk cache of extracted info, keyed by log path, size, mtime, Version
+# and parse options. A log that grows or a new Version misses the cache.
+# Least recently used entries are removed beyond MAX_ENTRIES. A resident
+# icc2_log_daemon.py also keeps entries in memory, see MemoryCache.
+# Entries are plain data written by marshal, and are only read from a
+# directory and files of the user that no one else can write
+class ParseCache:
+  DIR = os.environ.get('ICC2_LOG_VIEWER_CACHE',
+                       os.path.join(os.path.expanduser('~'), '.cache', 'icc2_log_viewer'))
+  MAX_ENTRIES = 200
+  FORMAT = 4 # increase when attributes of data models change
+  memory = None # MemoryCache of icc2_log_daemon.py, None in other processes
+
+
+  # Cache key of log file f, None if f is not a regular file
+  @staticmethod
+  def get_key(f, flags):
+    if f.name.startswith('<'): # <stdin>
+      return None
+    try:
+      st = os.fstat(f.fileno())
+    except (EnvironmentError, ValueError):
+      return None
+    return repr((os.path.abspath(f.name), st.st_size, st.st_mtime, Version,
+                 ParseCache.FORMAT, flags))
+
+
+  @staticmethod
+  def get_path(key):
+    import hashlib
+    return os.path.join(ParseCache.DIR, hashlib.md5(key.encode('utf-8')).hexdigest() + '.cache')
+
+
+  # Return (file_info, info) saved for key, None if not cached
+  @staticmethod
+  def load(key):
+    if key == None:
+      return None
+    if ParseCache.memory != None:
+      entry = ParseCache.memory.get(key)
+      if entry != None:
+        return entry
+    import marshal
+    path = ParseCache.get_path(key)
+    try:
+      if not ParseCache.is_private(os.stat(ParseCache.DIR)):
+        return None
+      with open(path, 'rb') as f:
+        if not ParseCache.is_private(os.fstat(f.fileno())):
+          return None
+        saved_key, file_info, records = marshal.load(f)
+      if saved_key != key:
+        return None
+      os.utime(path, None) # mark as recently used
+    except Exception: # missing, truncated or from an incompatible version
+      return None
+
+    # Data models are saved as (class name, attributes), so that a cache
+    # written by the viewer can be read by the comparator and vice versa
+    info = {}
+    for name, attrs in records:
+      model = globals().get(name) if name.startswith('M_') else None
+      if not isinstance(model, type):
+        return None
+      m = model()
+      for attr, value in attrs.items():
+        setattr(m, attr, value)
+      info[m.ln] = m
+    if ParseCache.memory != None:
+      ParseCache.memory.put(key, (file_info, info))
+    return (file_info, info)
+
+
+  # Save (file_info, info) for key, return True if saved
+  @staticmethod
+  def save(key, entry):
+    if key == None:
+      return False
+    if ParseCache.memory != None:
+      ParseCache.memory.put(key, entry)
+    import marshal
+    file_info, info = entry
+    records = [(m.__class__.__name__, to_dict(m)) for m in info.values()]
+    path = ParseCache.get_path(key)
+    tmp_path = path + '.' + str(os.getpid())
+    try:
+      if not os.path.isdir(ParseCache.DIR):
+        os.makedirs(ParseCache.DIR, 0o700)
+      if not ParseCache.is_private(os.stat(ParseCache.DIR)):
+        return False
+      fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+      with os.fdopen(fd, 'wb') as f:
+        marshal.dump((key, file_info, records), f)
+      os.rename(tmp_path, path) # other viewers never see a partial entry
+      ParseCache.evict()
+    except (EnvironmentError, ValueError): # ValueError: not marshallable
+      return False
+    return True
+
+
+  # Return True if the file of stat st is owned by the user and cannot be
+  # written by group or others, so no one else can plant a cache entry
+  @staticmethod
+  def is_private(st):
+    return st.st_uid == os.getuid() and st.st_mode & 0o022 == 0
+
+
+  # Remove least recently used entries
+  @staticmethod
+  def evict():
+    entries = []
+    for name in os.listdir(ParseCache.DIR):
+      if name.endswith('.cache'):
+        path = os.path.join(ParseCache.DIR, name)
+        entries.append((os.path.getmtime(path), path))
+    entries.sort(reverse=True)
+    for mtime, path in entries[ParseCache.MAX_ENTRIES:]:
+      os.remove(path)
+    return
+
 ##############################################################################
 
 # Author: Deyuan Guo
@@ -1079,14 +3109,30 @@ class ICC2LogViewer:
   # static data members
   colored = True
   verbose = False
+  row_formats = {}  # color -> format of a colored row, see get_row_format()
+  ROWS_PER_WRITE = 1000
+  CATEGORIES = ('cmd', 'cts', 'gr', 'lgl', 'dft', 'qor', 'flow', 'cmap') # see get_controllers
+  ALL = ('cmd', 'cts', 'gr', 'lgl', 'dft', 'qor') # enabled by -all
 
 
   # Constructor
   def __init__(self):
-    self.parser = self.create_argparse()
-    self.logs = []    # log file contents
+    self.parser = None  # created by run()
+    self.logs = []    # log file contents, list of lines or LogBuffer
     self.info = {}    # extracted info
     self.show_progress = True
+    self.show_info = True # print information of the log file, see parse()
+    self.file_info = None # (number of lines, first lines, complete) of the log
+    self.use_cache = True # reuse extracted info of an unchanged log, see ParseCache
+    self.stream = False # parse with bounded memory, see LogStream
+    self.follow = False # parse lines appended to a running log
+    self.jobs = 1       # number of processes to parse the log, see LogChunks
+    self.fields = None  # optional fields to compute, None for fields shown
+    self.from_line = None # first line to parse, counted from 1
+    self.to_line = None   # last line to parse
+    self.stop_cmd = None  # stop after the first run of this command
+    self.max_records = None # stop after this many records
+    self.tui = False    # browse information interactively, see LogBrowser
 
     # commandline args
     self.log = None
@@ -1105,28 +3151,93 @@ class ICC2LogViewer:
 
   # Run
   def run(self):
-    if len(filter(len, sys.argv)) <= 1:
-      print '--------------------------------'
-      print ' ICC2 Log Viewer (ver.' + Version + ') '
-      print ' Deyuan Guo <dguo@synopsys.com> '
-      print '--------------------------------'
-      print
+    self.parser = self.create_argparse()
+    if len(list(filter(len, sys.argv))) <= 1:
+      print('--------------------------------')
+      print(' ICC2 Log Viewer (ver.' + Version + ') ')
+      print(' Deyuan Guo <dguo@synopsys.com> ')
+      print('--------------------------------')
+      print()
       self.parser.print_help()
-      print
+      print()
       return
 
-    print 'Info: ICC2 Log Viewer (ver.' + Version + ')'
+    print('Info: ICC2 Log Viewer (ver.' + Version + ')')
     self.parse_args()
-    self.load_file()
-    self.parse_log_file()
-    self.show()
+    if self.follow:
+      self.follow_log_file()
+      return
+    self.load_info()
+    if self.tui:
+      self.browse()
+    else:
+      self.show()
+    self.release_logs()
+    return
+
+
+  # Drop the log contents after the information is extracted and shown. A
+  # mapped log is unmapped once no other viewer shares its LogBuffer
+  def release_logs(self):
+    self.logs = []
+    return
+
+
+  # Patterns of -regex and -regex-file as log text, None if there is no
+  # pattern
+  @staticmethod
+  def get_regexes(parser, regexes, regex_file):
+    regexes = [decode_arg(regex) for regex in regexes or []]
+    if regex_file != None:
+      try:
+        with open(regex_file, 'rb') as f:
+          for line in decode_text(f.read()).split('\n'):
+            line = line.rstrip('\r')
+            if line.strip() != '' and not line.startswith('#'):
+              regexes.append(line)
+      except EnvironmentError as e:
+        parser.error('cannot read -regex-file: ' + str(e))
+    if len(regexes) == 0:
+      return None
+    error = ICC2LogViewer.check_regexes(regexes)
+    if error != None:
+      parser.error(error)
+    return regexes
+
+
+  # Error message of patterns that cannot be searched, None if they are valid
+  @staticmethod
+  def check_regexes(regexes):
+    for regex in regexes:
+      try:
+        re.compile(regex)
+      except re.error as e:
+        return 'invalid RegEx pattern ' + repr(regex) + ': ' + str(e)
+    if not C_regex.can_combine(regexes):
+      return 'RegEx patterns with backreferences or inline flags cannot be combined with other patterns'
+    try:
+      re.compile(C_regex.combine(regexes))
+    except re.error as e: # e.g. a group name used by two patterns
+      return 'RegEx patterns cannot be combined: ' + str(e)
+    return None
+
+
+  # Show customized RegEx patterns with the tag of their lines
+  @staticmethod
+  def show_regexes(regexes):
+    if len(regexes) == 1:
+      print('Info: Customized RegEx pattern:', regexes[0])
+      return
+    for k, regex in enumerate(regexes):
+      print('Info: Customized RegEx pattern ' + M_regex.TAG + str(k + 1) + ':', regex)
     return
 
 
   # Create argparse object
   def create_argparse(self):
+    import argparse
     parser = argparse.ArgumentParser()
-    parser.add_argument('log',    help='ICC2 log file', type=argparse.FileType('r'))
+    parser.add_argument('log',    help='ICC2 log file', type=argparse.FileType('rb'))
     parser.add_argument('-cmd',   help='show ICC2 command information', action='store_true')
     parser.add_argument('-cts',   help='show CTS/CCD information', action='store_true')
     parser.add_argument('-gr',    help='show GR information', action='store_true')
@@ -1138,14 +3249,24 @@ class ICC2LogViewer:
     #parser.add_argument('-scn',   help='show scenario information', action='store_true')
     parser.add_argument('-cmap',  help='show cellMap information', action='store_true')
     parser.add_argument('-flow',  help='show opto flow information', action='store_true')
-    parser.add_argument('-regex', help='show lines that can match with a RegEx expression', type=str)
+    parser.add_argument('-regex', help='show lines that can match with a RegEx expression (repeatable)', type=str, action='append')
+    parser.add_argument('-regex-file', help='show lines that can match with RegEx expressions in FILE, one per line', type=str, metavar='FILE')
+    parser.add_argument('-follow', help='keep reading a running log and show new information as it is written', action='store_true')
+    parser.add_argument('-jobs',  help='parse an uncompressed log with JOBS processes, or gunzip a multi-member .gz log with JOBS threads', type=int, default=1)
+    parser.add_argument('-stream', help='read the log while parsing to keep memory low on huge logs', action='store_true')
+    parser.add_argument('-tui',   help='browse information and the log interactively', action='store_true')
+    parser.add_argument('-from-line', help='parse the log from line N', type=int, metavar='N')
+    parser.add_argument('-to-line', help='parse the log up to line N', type=int, metavar='N')
+    parser.add_argument('-stop-after-cmd', help='stop parsing after the first run of ICC2 command CMD', type=str, metavar='CMD')
+    parser.add_argument('-max-records', help='stop parsing after N records, counted before identical commands in a row are combined', type=int, metavar='N')
+    parser.add_argument('--no-cache', help='do not read or write the parse cache (' + ParseCache.DIR + ')', action='store_true')
     parser.add_argument('--no-color', help='turn off color decorations for output redirection', action='store_true')
     return parser
 
 
   # Parse command line auguments
   def parse_args(self):
-    args = self.parser.parse_args(filter(len, sys.argv[1:]))
+    args = self.parser.parse_args(list(filter(len, sys.argv[1:])))
 
     self.log = args.log
     self.cmd = args.cmd
@@ -1157,11 +3278,21 @@ class ICC2LogViewer:
     self.all = args.all
     self.flow = args.flow
     self.cmap = args.cmap
-    self.regex = args.regex
+    self.regex = ICC2LogViewer.get_regexes(self.parser, args.regex, args.regex_file)
+    self.stream = args.stream
+    self.follow = args.follow
+    self.jobs = args.jobs
+    self.from_line = args.from_line
+    self.to_line = args.to_line
+    if args.stop_after_cmd != None:
+      self.stop_cmd = decode_arg(args.stop_after_cmd)
+    self.max_records = args.max_records
+    self.tui = args.tui
     if self.regex != None:
-      print 'Info: Customized RegEx pattern:', self.regex
+      ICC2LogViewer.show_regexes(self.regex)
 
-    ICC2LogViewer.colored = not args.no_color
+    self.use_cache = not args.no_cache
+    ICC2LogViewer.colored = not args.no_color and sys.stdout.isatty()
     ICC2LogViewer.verbose = args.more
 
     # Enable -all if no other option is provided
@@ -1179,116 +3310,142 @@ class ICC2LogViewer:
     return
 
 
+  # Enable categories of information, named as their command line options,
+  # and customized RegEx patterns (None for no pattern)
+  def set_categories(self, categories, regex=None):
+    for name in categories:
+      if name not in ICC2LogViewer.CATEGORIES:
+        raise ValueError('unknown category ' + repr(name) + ', expected one of ' +
+                         ', '.join(ICC2LogViewer.CATEGORIES))
+      setattr(self, name, True)
+    self.regex = regex
+    return
+
+
   # Load file contents
   def load_file(self):
     if self.log == None:
       return False
-    if self.log.name.endswith('.gz'):
-      decompressedFile = gzip.GzipFile(fileobj=self.log) #gunzip
-      self.logs = decompressedFile.read().split('\n')
-    else:
-      self.logs = self.log.read().split('\n')
+    kind = Compression.detect(self.log.name)
+    if self.stream or self.has_stop() or kind != None:
+      # read no further than needed, compressed logs are decompressed while parsing
+      self.logs = LogStream.open(self.log, kind, self.jobs)
+      return True
+    if self.jobs > 1 and os.path.isfile(self.log.name):
+      self.logs = LogChunks(self.log.name, self.jobs)
+      return True
+
+    # Uncompressed logs are mapped instead of read
+    buf = LogBuffer.open(self.log)
+    if buf == None:
+      buf = LogBuffer(self.log.read()) # e.g. stdin
+    self.logs = buf
+    self.show_file_info(len(self.logs), self.logs[:12])
+    return True
+
+
+  # Return True if parsing may stop before the end of the log
+  def has_stop(self):
+    return self.to_line != None or self.stop_cmd != None or self.max_records != None
 
-    print 'Info: File ' + self.log.name + ' has ' + str(len(self.logs)) + ' lines'
-    if len(self.logs) > 1000000:
-      print 'Warning: Log file contains more than 1 million lines. This script may be slow'
+
+  # Show number of lines and ICC2 banner found in the first lines. A file is
+  # not complete if reading stopped before its end
+  def show_file_info(self, num_lines, head, complete=True):
+    self.file_info = (num_lines, head, complete)
+    if not self.show_info:
+      return
+    if complete:
+      print('Info: File ' + self.log.name + ' has ' + str(num_lines) + ' lines')
+    else:
+      print('Info: Read ' + str(num_lines) + ' lines of file ' + self.log.name)
+    if num_lines > 1000000 and not self.stream:
+      print('Warning: Log file contains more than 1 million lines. This script may be slow')
 
     banner = 'No ICC2 banner'
-    for i in range(0, min(10, len(self.logs))):
-      if self.logs[i].strip() == 'IC Compiler II (TM)':
+    for i in range(0, min(10, len(head))):
+      if head[i].strip() == 'IC Compiler II (TM)':
         banner = 'IC Compiler II (TM)'
-        if i + 2 < len(self.logs) and self.logs[i + 2].strip().startswith('Version'):
-          banner += ' ' + self.logs[i + 2].strip()
+        if i + 2 < len(head) and head[i + 2].strip().startswith('Version'):
+          banner += ' ' + head[i + 2].strip()
     if banner != '':
-      print 'Info:', banner
+      print('Info:', banner)
 
-    return True
+    return
+
+
+  # Enabled data controllers as (name, controller, create_state args)
+  def get_controllers(self):
+    controllers = []
+    for enabled, name, controller in [(self.cmap, 'cmap', C_cmap),
+                                      (self.cmd,  'cmd',  C_cmd),
+                                      (self.cts,  'cts',  C_cts),
+                                      (self.gr,   'gr',   C_gr),
+                                      (self.lgl,  'lgl',  C_lgl),
+                                      (self.dft,  'dft',  C_dft),
+                                      (self.qor,  'qor',  C_qor),
+                                      (self.flow, 'flow', C_flow)]:
+      if enabled:
+        controllers.append((name, controller, ()))
+    if self.regex != None:
+      controllers.append(('regex', C_regex, tuple(self.regex)))
+    return controllers
+
+
+  # Dispatcher of enabled data controllers
+  def create_dispatcher(self):
+    dispatcher = LogDispatcher()
+    for name, controller, args in self.get_controllers():
+      dispatcher.add(controller, *args, fields=self.get_fields())
+    begin_ln = 0
+    if self.from_line != None:
+      begin_ln = max(0, self.from_line - 1)
+    dispatcher.set_limits(begin_ln, self.to_line, self.max_records, self.stop_cmd)
+    return dispatcher
+
+
+  # Optional fields of data models to compute, see C_base.FIELDS
+  def get_fields(self):
+    if self.fields != None:
+      return self.fields
+    fields = ['name', 'elapsed']
+    if ICC2LogViewer.verbose:
+      fields.append('runtime')
+    return fields
 
 
   # Parse log file
   def parse_log_file(self):
-    if len(self.logs) == 0:
+    # Streamed or chunked logs are read while parsing
+    streaming = isinstance(self.logs, LogStream) or isinstance(self.logs, LogChunks)
+    if not streaming and len(self.logs) == 0:
       return False
 
+    # Enabled controllers share one pass over the log. Data models found by
+    # later controllers replace earlier ones at the same line
+    dispatcher = self.create_dispatcher()
     if self.show_progress:
-      print 'Info: Parsing',
+      print('Info: Parsing', ' '.join([c[0] for c in self.get_controllers()]), end='')
       sys.stdout.flush()
 
-    if self.cmap:
-      if self.show_progress:
-        print 'cmap',
-        sys.stdout.flush()
-      m_vec = C_cmap.collect_data(self.logs)
-      for m in m_vec:
-        self.info[m.ln] = m
-
-    if self.cmd:
-      if self.show_progress:
-        print 'cmd',
-        sys.stdout.flush()
-      m_vec = C_cmd.collect_data(self.logs)
-      for m in m_vec:
-        self.info[m.ln] = m
-
-    if self.cts:
-      if self.show_progress:
-        print 'cts',
-        sys.stdout.flush()
-      m_vec = C_cts.collect_data(self.logs)
-      for m in m_vec:
-        self.info[m.ln] = m
-
-    if self.gr:
-      if self.show_progress:
-        print 'gr',
-        sys.stdout.flush()
-      m_vec = C_gr.collect_data(self.logs)
-      for m in m_vec:
-        self.info[m.ln] = m
-
-    if self.lgl:
-      if self.show_progress:
-        print 'lgl',
-        sys.stdout.flush()
-      m_vec = C_lgl.collect_data(self.logs)
-      for m in m_vec:
-        self.info[m.ln] = m
-
-    if self.dft:
-      if self.show_progress:
-        print 'dft',
-        sys.stdout.flush()
-      m_vec = C_dft.collect_data(self.logs)
-      for m in m_vec:
-        self.info[m.ln] = m
-
-    if self.qor:
-      if self.show_progress:
-        print 'qor',
-        sys.stdout.flush()
-      m_vec = C_qor.collect_data(self.logs)
-      for m in m_vec:
-        self.info[m.ln] = m
-
-    if self.flow:
-      if self.show_progress:
-        print 'flow',
-        sys.stdout.flush()
-      m_vec = C_flow.collect_data(self.logs)
-      for m in m_vec:
-        self.info[m.ln] = m
-
-    if self.regex != None:
+    try:
+      if isinstance(self.logs, LogStream):
+        m_vec = dispatcher.collect_stream(self.logs, self.show_progress)
+      elif isinstance(self.logs, LogChunks):
+        m_vec = dispatcher.collect_chunks(self.logs, self.jobs, self.show_progress)
+      else:
+        m_vec = dispatcher.collect_data(self.logs, self.show_progress)
+    finally:
       if self.show_progress:
-        print 'regex',
+        print() # end the progress line, also before an error message
         sys.stdout.flush()
-      m_vec = C_regex.collect_data(self.logs, self.regex, self.show_progress)
-      for m in m_vec:
-        self.info[m.ln] = m
+    for m in m_vec:
+      self.info[m.ln] = m
 
-    if self.show_progress:
-      print
-      sys.stdout.flush()
+    if streaming:
+      self.show_file_info(self.logs.num_lines, self.logs.head, dispatcher.stop_ln == None)
+    if dispatcher.stop_ln != None and self.show_info:
+      print('Info: Stopped parsing at line', dispatcher.stop_ln)
 
     # Post-processing
     # After extracting all messages, combine identical commands appeared in a row
@@ -1308,34 +3465,170 @@ class ICC2LogViewer:
     return True
 
 
+  # Follow a running log until Ctrl-C. Only appended lines are parsed, and
+  # data models are shown once they cannot change any more
+  def follow_log_file(self):
+    if self.log == None:
+      return False
+    if Compression.detect(self.log.name) != None:
+      print('Error: -follow does not support compressed log files')
+      return False
+
+    print('Info: Following ' + self.log.name + ' (press Ctrl-C to stop)')
+    print()
+    self.cprint_header()
+    sys.stdout.flush()
+
+    # the rest is shown when Ctrl-C is pressed or a limit is reached
+    dispatcher = self.create_dispatcher()
+    self.pending = {} # line -> (controller position, data model) not shown yet
+    self.held = None  # CMD to show, waiting for identical commands in a row
+    for m_vec, bound in dispatcher.settle_stream(LogStream(self.log, self.log), follow=True):
+      self.cprint_rows(self.settle_rows(m_vec, bound))
+      sys.stdout.flush()
+    if self.held != None:
+      self.cprint(self.held)
+    print()
+    return True
+
+
+  # Parse a LogStream and yield the data models in line order as soon as
+  # they cannot change any more. They are the ones parse_log_file keeps in
+  # self.info, which is filled as well
+  def iter_log_file(self):
+    dispatcher = self.create_dispatcher()
+    self.pending = {}
+    self.held = None
+    for m_vec, bound in dispatcher.settle_stream(self.logs):
+      for m in self.settle_rows(m_vec, bound):
+        self.info[m.ln] = m
+        yield m
+    if self.held != None:
+      self.info[self.held.ln] = self.held
+      yield self.held
+    self.show_file_info(self.logs.num_lines, self.logs.head, dispatcher.stop_ln == None)
+    return
+
+
+  # Pending data models before line bound in line order. A data model found
+  # by a later controller replaces an earlier one at the same line, and
+  # identical commands in a row are combined, as parse_log_file does. The
+  # last command is held in self.held until a different data model follows
+  def settle_rows(self, m_vec, bound):
+    for k, m in m_vec:
+      if m.ln not in self.pending or self.pending[m.ln][0] <= k:
+        self.pending[m.ln] = (k, m)
+
+    rows = []
+    for ln in sorted([ln for ln in self.pending.keys() if ln < bound]):
+      k, m = self.pending.pop(ln)
+      # combine identical commands appeared in a row, as parse_log_file does
+      prev_m = self.held
+      if prev_m != None:
+        if (m.tag == 'CMD' and m.compact == '' and prev_m.cmd == m.cmd):
+          prev_m.num_repeated += 1
+          continue
+        rows.append(prev_m)
+        self.held = None
+      if m.tag == 'CMD' and m.compact == '':
+        self.held = m
+      else:
+        rows.append(m)
+    return rows
+
+
+  # Load extracted info from the parse cache, or parse the log file
+  def load_info(self):
+    if self.load_cache():
+      return True
+    self.load_file()
+    ok = self.parse_log_file()
+    self.save_cache()
+    return ok
+
+
+  # Load extracted info of an unchanged log from the parse cache
+  def load_cache(self):
+    if not self.use_cache or self.log == None:
+      return False
+    key = ParseCache.get_key(self.log, self.get_cache_flags())
+    entry = ParseCache.load(key)
+    if entry == None:
+      return False
+    self.file_info, self.info = entry
+    self.show_file_info(*self.file_info)
+    if self.show_progress:
+      print('Info: Parsing', ' '.join([c[0] for c in self.get_controllers()]), '(cached)')
+      sys.stdout.flush()
+    return True
+
+
+  # Save extracted info to the parse cache
+  def save_cache(self):
+    if not self.use_cache or self.log == None or self.file_info == None:
+      return False
+    key = ParseCache.get_key(self.log, self.get_cache_flags())
+    return ParseCache.save(key, (self.file_info, self.info))
+
+
+  # Options that change the extracted info
+  def get_cache_flags(self):
+    flags = [(name, args) for name, controller, args in self.get_controllers()]
+    limits = (self.from_line, self.to_line, self.stop_cmd, self.max_records)
+    return (flags, ICC2LogViewer.verbose, sorted(self.get_fields()), limits)
+
+
   # Print message with ANSI color
   def cprint(self, m):
-    lineno = m.ln
-    tag = m.get_tag()
-    color = m.COLOR
-    message = m.to_string()
-    if ICC2LogViewer.colored:
-      msg = '%9s ' % (str(lineno))
-      msg += ANSI.REVERSED + ' ' + ANSI.ENDC
-      msg += color + ' %-10s ' % (tag) + ANSI.ENDC
-      msg += ANSI.REVERSED + ' ' + ANSI.ENDC
-      msg += ' ' + color + message + ANSI.ENDC
-    else:
-      msg = '%9s | %-10s | %s' % (str(lineno), tag, message)
-    print msg
+    self.cprint_rows([m])
     return
 
 
+  # Print data models, with one write for every ROWS_PER_WRITE rows
+  def cprint_rows(self, m_vec):
+    step = ICC2LogViewer.ROWS_PER_WRITE
+    for k in range(0, len(m_vec), step):
+      rows = [self.format_row(m) for m in m_vec[k:k + step]]
+      sys.stdout.write('\n'.join(rows) + '\n')
+    return
+
+
+  # Output row of a data model
+  def format_row(self, m, colored=None):
+    if colored == None:
+      colored = ICC2LogViewer.colored
+    if colored:
+      return ICC2LogViewer.get_row_format(m.COLOR) % (m.ln, m.get_tag(), m.to_string())
+    return '%9s | %-10s | %s' % (m.ln, m.get_tag(), m.to_string())
+
+
+  # Format of a row with the given color, ANSI codes are joined only once
+  @staticmethod
+  def get_row_format(color):
+    row_format = ICC2LogViewer.row_formats.get(color)
+    if row_format == None:
+      row_format = ('%9s ' + ANSI.REVERSED + ' ' + ANSI.ENDC +
+                    color + ' %-10s ' + ANSI.ENDC +
+                    ANSI.REVERSED + ' ' + ANSI.ENDC +
+                    ' ' + color + '%s' + ANSI.ENDC)
+      ICC2LogViewer.row_formats[color] = row_format
+    return row_format
+
+
+  # Header of the output rows
+  def get_header(self):
+    if self.qor:
+      return '%9s   %-10s   %-125s' % ('Line', 'Tag', M_qor.header())
+    return '%9s   %-10s   %-125s' % ('Line', 'Tag', 'Info')
+
+
   # Print header with ANSI color
   def cprint_header(self):
-    if self.qor:
-      header = '%9s   %-10s   %-125s' % ('Line', 'Tag', M_qor.header())
-    else:
-      header = '%9s   %-10s   %-125s' % ('Line', 'Tag', 'Info')
+    header = self.get_header()
     if ICC2LogViewer.colored:
-      print ANSI.REVERSED + ANSI.BOLD + header + ANSI.ENDC
+      print(ANSI.REVERSED + ANSI.BOLD + header + ANSI.ENDC)
     else:
-      print header
+      print(header)
     return
 
 
@@ -1344,20 +3637,365 @@ class ICC2LogViewer:
     if len(self.info) == 0:
       return True
 
-    print
+    print()
     self.cprint_header()
-    for i in sorted(self.info.keys()):
-      self.cprint(self.info[i])
-    print
+    self.cprint_rows([self.info[i] for i in sorted(self.info.keys())])
+    print()
+
+    return True
+
 
+  # Show results in an interactive browser, or as text if it is not possible
+  def browse(self):
+    global curses
+    if len(self.info) == 0:
+      return True
+    try:
+      import curses
+    except ImportError: # not available on some platforms
+      curses = None
+    if curses == None or not sys.stdin.isatty() or not sys.stdout.isatty():
+      print('Warning: -tui needs curses and a terminal, information is printed instead')
+      return self.show()
+    curses.wrapper(LogBrowser(self).run)
     return True
 
+##############################################################################
+
+# Author: Deyuan Guo
+# Interactive browser of the extracted information of an ICC2LogViewer, see
+# -tui. Only the rows in the window are formatted, and log lines are read
+# only when a record is opened, so large logs are not parsed or read again
+class LogBrowser:
+  # key -> tag of records to jump to
+  JUMP_KEYS = {'C': 'CMD', 'Q': 'QOR', 'R': 'GR', 'L': 'LGL', 'T': 'CTS',
+               'D': 'DFT', 'F': 'FLOW', 'M': 'CMAP', 'X': 'REGEX'}
+  HELP = ('j/k,PgUp/PgDn,g/G: move  C/Q/R/L/T/D/F/M/X: next CMD/QOR/GR/LGL/CTS/DFT/FLOW/CMAP/REGEX  '
+          'n/p: next/prev same tag  Enter: log  q: quit')
+  LOG_HELP = 'j/k,PgUp/PgDn: scroll  Enter/q: back'
+  CONTEXT = 10 # log lines shown before an opened record
+  KEEP_LINES = 10000 # lines of a compressed log kept before the shown ones
+
+  def __init__(self, viewer):
+    self.viewer = viewer
+    self.lns = sorted(viewer.info.keys())
+    self.pos = 0        # selected record
+    self.top = 0        # first record in the window
+    self.lines = None   # log lines, opened on demand. A LineWindow of a compressed log
+    self.stream = None  # LogStream of a compressed log
+    self.reader = None  # chunks of a compressed log not read yet
+    self.colors = {}    # ANSI color -> curses attribute
+    return
+
+
+  def run(self, screen):
+    self.screen = screen
+    self.init_colors()
+    curses.curs_set(0)
+    try:
+      while True:
+        self.draw()
+        key = screen.getch()
+        if key in (ord('q'), 27): # Esc
+          break
+        elif key in (ord('\n'), curses.KEY_ENTER):
+          self.browse_log(self.lns[self.pos])
+        else:
+          self.move(key)
+    finally:
+      self.close_stream()
+    return
+
+
+  def init_colors(self):
+    if not curses.has_colors():
+      return
+    curses.start_color()
+    try:
+      curses.use_default_colors()
+      background = -1
+    except curses.error:
+      background = curses.COLOR_BLACK
+    for k, (ansi, color) in enumerate([(ANSI.RED, curses.COLOR_RED), (ANSI.GREEN, curses.COLOR_GREEN),
+                                        (ANSI.YELLOW, curses.COLOR_YELLOW), (ANSI.BLUE, curses.COLOR_BLUE),
+                                        (ANSI.MAGENTA, curses.COLOR_MAGENTA), (ANSI.CYAN, curses.COLOR_CYAN)]):
+      curses.init_pair(k + 1, color, background)
+      self.colors[ansi] = curses.color_pair(k + 1)
+    return
+
+
+  # Move the selection by a key
+  def move(self, key):
+    height = self.get_height()
+    pos = self.pos
+    if key in (ord('j'), curses.KEY_DOWN):
+      pos += 1
+    elif key in (ord('k'), curses.KEY_UP):
+      pos -= 1
+    elif key in (curses.KEY_NPAGE, ord(' ')):
+      pos += height
+    elif key == curses.KEY_PPAGE:
+      pos -= height
+    elif key in (ord('g'), curses.KEY_HOME):
+      pos = 0
+    elif key in (ord('G'), curses.KEY_END):
+      pos = len(self.lns) - 1
+    elif key in (ord('n'), ord('p')):
+      pos = self.find(self.viewer.info[self.lns[pos]].TAG, key == ord('n'))
+    elif 0 <= key < 256 and chr(key) in LogBrowser.JUMP_KEYS:
+      pos = self.find(LogBrowser.JUMP_KEYS[chr(key)], True)
+    self.pos = max(0, min(pos, len(self.lns) - 1))
+    if self.pos < self.top:
+      self.top = self.pos
+    elif self.pos >= self.top + height:
+      self.top = self.pos - height + 1
+    return
+
+
+  # Position of the next (or previous) record with the tag, the selected
+  # one if there is none
+  def find(self, tag, forward):
+    info = self.viewer.info
+    step = 1
+    if not forward:
+      step = -1
+    k = self.pos + step
+    while 0 <= k < len(self.lns):
+      if info[self.lns[k]].TAG == tag:
+        return k
+      k += step
+    curses.beep()
+    return self.pos
+
+
+  # Rows for records, the header and the status line
+  def get_height(self):
+    return max(1, self.screen.getmaxyx()[0] - 2)
+
+
+  def draw(self):
+    screen = self.screen
+    height, width = screen.getmaxyx()
+    screen.erase()
+    self.add_line(0, self.viewer.get_header(), width, curses.A_REVERSE | curses.A_BOLD)
+    for row in range(min(self.get_height(), len(self.lns) - self.top)):
+      k = self.top + row
+      m = self.viewer.info[self.lns[k]]
+      attr = self.colors.get(m.COLOR, 0)
+      if k == self.pos:
+        attr |= curses.A_REVERSE
+      self.add_line(row + 1, self.viewer.format_row(m, False), width, attr)
+    status = ' %d/%d  %s' % (self.pos + 1, len(self.lns), LogBrowser.HELP)
+    self.add_line(height - 1, status, width, curses.A_REVERSE)
+    screen.refresh()
+    return
+
+
+  # Draw text clipped to the window width. Bytes of the log that are not
+  # text are drawn as they are
+  def add_line(self, y, text, width, attr=0):
+    try:
+      self.screen.addstr(y, 0, os.fsencode(text.expandtabs()[:width - 1].ljust(width - 1)), attr)
+    except curses.error:
+      pass
+    return
+
+
+  # Show log lines around line ln (counted from 1) until Enter or q is pressed
+  def browse_log(self, ln):
+    top = max(0, ln - 1 - LogBrowser.CONTEXT)
+    while True:
+      height, width = self.screen.getmaxyx()
+      lines = self.get_log_lines(top, top + height - 1)
+      self.screen.erase()
+      for row in range(len(lines)):
+        attr = 0
+        if top + row == ln - 1:
+          attr = curses.A_REVERSE
+        self.add_line(row, '%9d  %s' % (top + row + 1, lines[row]), width, attr)
+      if self.lines == None:
+        self.add_line(0, 'Log lines are not available', width)
+      status = ' %s line %d  %s' % (self.viewer.log.name, ln, LogBrowser.LOG_HELP)
+      self.add_line(height - 1, status, width, curses.A_REVERSE)
+      self.screen.refresh()
+
+      key = self.screen.getch()
+      if key in (ord('q'), 27, ord('\n'), curses.KEY_ENTER):
+        break
+      elif key in (ord('j'), curses.KEY_DOWN):
+        top += 1
+      elif key in (ord('k'), curses.KEY_UP):
+        top -= 1
+      elif key in (curses.KEY_NPAGE, ord(' ')):
+        top += height - 1
+      elif key == curses.KEY_PPAGE:
+        top -= height - 1
+      top = max(0, top)
+    return
+
+
+  # Log lines [begin, end), read from the log the first time they are needed
+  def get_log_lines(self, begin, end):
+    if self.lines == None:
+      self.open_log(begin)
+    if self.lines == None:
+      return []
+    if self.stream == None:
+      return self.lines[begin:min(end, len(self.lines))]
+
+    # A compressed log is read again from the checkpoint before begin if
+    # begin is before the window, and only KEEP_LINES lines are kept before
+    # begin, so going back a few pages does not read the log again
+    try:
+      if begin < self.lines.base:
+        self.open_stream(begin - LogBrowser.KEEP_LINES)
+      while self.reader != None and len(self.lines) < end:
+        try:
+          self.lines.extend(next(self.reader))
+        except StopIteration:
+          self.reader = None
+        self.lines.discard(min(begin - LogBrowser.KEEP_LINES, len(self.lines)))
+    except EnvironmentError:
+      self.close_stream()
+      self.lines = None
+      return []
+    return self.lines.buf[begin - self.lines.base:min(end, len(self.lines)) - self.lines.base]
+
+
+  # Use the lines of the viewer if it kept them. Otherwise map the log, or
+  # read a compressed log in chunks from the checkpoint before line ln
+  def open_log(self, ln):
+    logs = self.viewer.logs
+    if isinstance(logs, LogBuffer) or isinstance(logs, list) and len(logs) > 0:
+      self.lines = logs
+      return
+    path = self.viewer.log.name
+    if not os.path.isfile(path):
+      return # e.g. stdin
+    try:
+      if Compression.detect(path) != None:
+        self.open_stream(ln - LogBrowser.KEEP_LINES)
+      else:
+        with open(path, 'rb') as f:
+          self.lines = LogBuffer.open(f)
+    except EnvironmentError:
+      self.close_stream()
+      self.lines = None
+    return
+
+
+  # Read a compressed log from line ln, or from the checkpoint before it in
+  # a seekable log (see FrameIndex and GzipIndex)
+  def open_stream(self, ln):
+    self.close_stream()
+    path = self.viewer.log.name
+    raw = open(path, 'rb')
+    try:
+      self.stream = LogStream.open(raw, Compression.detect(path))
+    except EnvironmentError:
+      raw.close()
+      raise
+    self.stream.skip_to(max(0, ln))
+    self.lines = LineWindow(self.stream.first_ln)
+    self.reader = self.stream.read_chunks()
+    return
+
+
+  # Stop reading a compressed log and close it
+  def close_stream(self):
+    if self.stream != None:
+      self.reader = None
+      self.stream.close()
+      self.stream.raw.close()
+      self.stream = None
+    return
+
+
+##############################################################################
+
+# Author: Deyuan Guo
+# Library API. Parse the log at path and return an iterator of the data
+# models (M_cmd, M_qor, ...) in line order, the rows icc2_log_viewer.py would
+# show, without printing anything. Text fields are log text, see decode_text.
+# - categories: names of the command line options, ICC2LogViewer.ALL by default
+# - stream: read the log while parsing as -stream and yield data models as
+#   soon as they are settled. Otherwise the log is mapped or parsed with jobs
+#   processes, and data models come once the whole log is parsed
+# - regex: a pattern or a list of patterns as -regex
+# - fields: optional fields to compute, see C_base.FIELDS, None for all
+# - from_line, to_line, stop_cmd, max_records: as the command line options
+# - use_cache: reuse and save extracted info of an unchanged log, see
+#   ParseCache. The cache is written once the log is parsed to its end
+# Raise ValueError for unknown categories or patterns that cannot be searched
+def parse(path, categories=None, stream=True, regex=None, fields=None,
+          from_line=None, to_line=None, stop_cmd=None, max_records=None,
+          jobs=1, use_cache=False):
+  viewer = ICC2LogViewer()
+  viewer.show_progress = False
+  viewer.show_info = False
+  if isinstance(regex, str):
+    regex = [regex]
+  if regex != None:
+    regex = [decode_arg(r) for r in regex]
+    error = ICC2LogViewer.check_regexes(regex)
+    if error != None:
+      raise ValueError(error)
+  if categories == None:
+    categories = ICC2LogViewer.ALL
+  viewer.set_categories(categories, regex)
+  if fields == None:
+    fields = set()
+    for name, controller, args in viewer.get_controllers():
+      fields.update(controller.FIELDS)
+  viewer.fields = sorted(fields)
+  viewer.stream = stream
+  viewer.jobs = jobs
+  viewer.from_line = from_line
+  viewer.to_line = to_line
+  if stop_cmd != None:
+    viewer.stop_cmd = decode_arg(stop_cmd)
+  viewer.max_records = max_records
+  viewer.use_cache = use_cache
+  return iter_parse(viewer, open(path, 'rb'))
+
+
+# Author: Deyuan Guo
+# Generator of parse(), the log file is closed when it ends or is closed
+def iter_parse(viewer, log):
+  viewer.log = log
+  try:
+    if not viewer.load_cache():
+      viewer.load_file()
+      if isinstance(viewer.logs, LogStream):
+        for m in viewer.iter_log_file():
+          yield m
+        viewer.save_cache()
+        return
+      viewer.parse_log_file()
+      viewer.save_cache()
+    info = viewer.info
+    for ln in sorted(info.keys()):
+      yield info[ln]
+  finally:
+    if isinstance(viewer.logs, LogStream):
+      viewer.logs.close()
+    viewer.release_logs()
+    viewer.log = None
+    log.close()
+
+
+# Author: Deyuan Guo
+# Attributes of a data model as a dict
+def to_dict(m):
+  return dict((attr, getattr(m, attr)) for attr in m.__slots__)
+
 
 ##############################################################################
 
 # Author: Deyuan Guo
 def icc2_log_viewer():
   sys.tracebacklimit = 0
+  sys.stdout.reconfigure(errors='surrogateescape') # log bytes are written unchanged
   viewer = ICC2LogViewer()
   viewer.run()
   return
@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -29,7 +29,7 @@ def process(log):
   else:
     hb1 = lines[ln_prev_hb]
 
-  print "SCN BEFORE:"
+  print("SCN BEFORE:")
   print_scn_table(lines, ln_prev_hb)
 
   ln_sbo = log_util.get_next_ln_starts_with(lines, ln_delay, '    SBO Optimization Summary')
@@ -51,27 +51,27 @@ def process(log):
   else:
     hb2 = lines[ln_end]
 
-  print "SCN AFTER:"
+  print("SCN AFTER:")
   print_scn_table(lines, ln_end)
 
   qor1 = log_util.parse_heartbeat(hb1)
   qor2 = log_util.parse_heartbeat(hb2)
   if qor1['valid'] and qor2['valid']:
-    print 'runtime', t_delay, t_sbo, t_pbo_wns_1, t_pbo_wns_2, t_pbo_tns_1, t_end
-    print "wns", qor1['wns'], qor2['wns']
-    print "tns", qor1['tns'], qor2['tns']
-    print "maxtran", qor1['maxtran'], qor2['maxtran']
-    print "area", qor1['area'], qor2['area']
-    print "buf", qor1['bufcnt'], qor2['bufcnt']
-    print "inv", qor1['invcnt'], qor2['invcnt']
+    print('runtime', t_delay, t_sbo, t_pbo_wns_1, t_pbo_wns_2, t_pbo_tns_1, t_end)
+    print("wns", qor1['wns'], qor2['wns'])
+    print("tns", qor1['tns'], qor2['tns'])
+    print("maxtran", qor1['maxtran'], qor2['maxtran'])
+    print("area", qor1['area'], qor2['area'])
+    print("buf", qor1['bufcnt'], qor2['bufcnt'])
+    print("inv", qor1['invcnt'], qor2['invcnt'])
   else:
-    print 'runtime'
-    print "wns"
-    print "tns"
-    print "maxtran"
-    print "area"
-    print "buf"
-    print "inv"
+    print('runtime')
+    print("wns")
+    print("tns")
+    print("maxtran")
+    print("area")
+    print("buf")
+    print("inv")
 
   return
 
@@ -82,13 +82,13 @@ def print_scn_table(lines, ln):
     return
   scenarios = []
   for m in range(ln - 3, max(0, ln - 100), -1):
-    match = re.search('^\s+\d+\s+\*\s+', lines[m])
+    match = log_util.Patterns.HEARTBEAT_LN.search(lines[m])
     if match:
       scenarios.append(lines[m])
     if lines[m].startswith('Scene'):
       break
   for l in reversed(scenarios):
-    print l
+    print(l)
 
 
 ###############################################################################
@@ -98,7 +98,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
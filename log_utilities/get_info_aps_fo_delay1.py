@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -36,14 +36,14 @@ def process(log):
 
   hb1 = ''
   for i in range(ln_begin, ln_fo, -1):
-    match = re.search('\s+ELAPSED\s+WORST NEG\s+TOTAL NEG', lines[i])
+    match = re.search(r'\s+ELAPSED\s+WORST NEG\s+TOTAL NEG', lines[i])
     if match:
       hb1 = lines[i + 3]
       break
 
   hb2 = ''
   for i in range(ln_end, ln_begin, -1):
-    match = re.search('\s+ELAPSED\s+WORST NEG\s+TOTAL NEG', lines[i])
+    match = re.search(r'\s+ELAPSED\s+WORST NEG\s+TOTAL NEG', lines[i])
     if match:
       hb2 = lines[i + 3]
 
@@ -55,7 +55,7 @@ def process(log):
         else:
           break
       for l in reversed(scenarios):
-        print l
+        print(l)
 
       break
 
@@ -66,26 +66,24 @@ def process(log):
 
   if qor1['valid'] and qor2['valid']:
 
-    hh, mm, ss = qor1['elapsed'].split(':')
-    t1 = int(hh) * 3600 + int(mm) * 60 + int(ss)
-    hh, mm, ss = qor2['elapsed'].split(':')
-    t2 = int(hh) * 3600 + int(mm) * 60 + int(ss)
-
-    print "runtime", t1, t2
-    print "wns", qor1['wns'], qor2['wns']
-    print "tns", qor1['tns'], qor2['tns']
-    print "maxtran", qor1['maxtran'], qor2['maxtran']
-    print "area", qor1['area'], qor2['area']
-    print "buf", qor1['bufcnt'], qor2['bufcnt']
-    print "inv", qor1['invcnt'], qor2['invcnt']
+    t1 = log_util.elapsed_to_seconds(qor1['elapsed'])
+    t2 = log_util.elapsed_to_seconds(qor2['elapsed'])
+
+    print("runtime", t1, t2)
+    print("wns", qor1['wns'], qor2['wns'])
+    print("tns", qor1['tns'], qor2['tns'])
+    print("maxtran", qor1['maxtran'], qor2['maxtran'])
+    print("area", qor1['area'], qor2['area'])
+    print("buf", qor1['bufcnt'], qor2['bufcnt'])
+    print("inv", qor1['invcnt'], qor2['invcnt'])
   else:
-    print "runtime"
-    print "wns"
-    print "tns"
-    print "maxtran"
-    print "area"
-    print "buf"
-    print "inv"
+    print("runtime")
+    print("wns")
+    print("tns")
+    print("maxtran")
+    print("area")
+    print("buf")
+    print("inv")
 
   return
 
@@ -97,7 +95,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -26,23 +26,22 @@ def process(log):
   hb = lines[ln]
   for i in range(ln, 0, -1):
     if lines[i].startswith('END_FUNC: propagate_switching_activity'):
-      match = re.search('ELAPSE:\s+(\d+) s', lines[i])
+      match = log_util.Patterns.ELAPSE.search(lines[i])
       if match:
         t2 = int(match.group(1))
     elif lines[i].startswith('START_FUNC: propagate_switching_activity'):
-      match = re.search('ELAPSE:\s+(\d+) s', lines[i])
+      match = log_util.Patterns.ELAPSE.search(lines[i])
       if match:
         t1 = int(match.group(1))
         break
 
   qor = log_util.parse_heartbeat(hb)
   if qor['valid']:
-    hh, mm, ss = qor['elapsed'].split(':')
-    t3 = int(hh) * 3600 + int(mm) * 60 + int(ss)
+    t3 = log_util.elapsed_to_seconds(qor['elapsed'])
 
-    print "runtime", t1, t2, t3
+    print("runtime", t1, t2, t3)
   else:
-    print "runtime"
+    print("runtime")
 
   return
 
@@ -54,7 +53,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -24,19 +24,19 @@ def process(log):
   tns = "--"
   whs = "--"
   ths = "--"
-  match = re.search("\s+WNS\(setup\)=(\S+)\s+TNS\(setup\)=(\S+)\s.*", lines[ln + 1])
+  match = re.search(r"\s+WNS\(setup\)=(\S+)\s+TNS\(setup\)=(\S+)\s.*", lines[ln + 1])
   if match:
     wns = match.group(1)
     tns = match.group(2)
-  match = re.search("\s+WNS\(hold\)=(\S+)\s+TNS\(hold\)=(\S+)\s.*", lines[ln + 2])
+  match = re.search(r"\s+WNS\(hold\)=(\S+)\s+TNS\(hold\)=(\S+)\s.*", lines[ln + 2])
   if match:
     whs = match.group(1)
     ths = match.group(2)
 
-  print "wns", wns
-  print "tns", tns
-  print "whs", whs
-  print "ths", ths
+  print("wns", wns)
+  print("tns", tns)
+  print("whs", whs)
+  print("ths", ths)
 
   return
 
@@ -48,7 +48,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -20,21 +20,21 @@ def do_work(lines, ln, prefix):
     if not line.startswith('ROPTSTATS'):
       continue
 
-    match = re.search('ROPTSTATS:\s+valid\s+attempt=(\d+)\s+pass=(\d+)\s+fail=(\d+)\s+cpu=(\S+)\s+LRX', line)
+    match = re.search(r'ROPTSTATS:\s+valid\s+attempt=(\d+)\s+pass=(\d+)\s+fail=(\d+)\s+cpu=(\S+)\s+LRX', line)
     if match:
       vat = match.group(1)
       vac = match.group(2)
       vrj = match.group(3)
       vrt = match.group(4)
 
-    match = re.search('ROPTSTATS:\s+estimate\s+attempt=(\d+)\s+pass=(\d+)\s+fail=(\d+)\s+cpu=(\S+)\s+LRX', line)
+    match = re.search(r'ROPTSTATS:\s+estimate\s+attempt=(\d+)\s+pass=(\d+)\s+fail=(\d+)\s+cpu=(\S+)\s+LRX', line)
     if match:
       eat = match.group(1)
       eac = match.group(2)
       erj = match.group(3)
       ert = match.group(4)
 
-    match = re.search('ROPTSTATS:\s+run\s+attempt=(\d+)\s+pass=(\d+)\s+fail=(\d+)\s+cpu=(\S+)\s+LRX', line)
+    match = re.search(r'ROPTSTATS:\s+run\s+attempt=(\d+)\s+pass=(\d+)\s+fail=(\d+)\s+cpu=(\S+)\s+LRX', line)
     if match:
       rat = match.group(1)
       rac = match.group(2)
@@ -42,9 +42,9 @@ def do_work(lines, ln, prefix):
       rrt = match.group(4)
       break
 
-  print prefix + 'v', vat, vac, vrj, vrt
-  print prefix + 'e', eat, eac, erj, ert
-  print prefix + 'r', rat, rac, rrj, rrt
+  print(prefix + 'v', vat, vac, vrj, vrt)
+  print(prefix + 'e', eat, eac, erj, ert)
+  print(prefix + 'r', rat, rac, rrj, rrt)
   return
 
 
@@ -72,7 +72,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
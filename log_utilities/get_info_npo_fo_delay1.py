@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -41,17 +41,17 @@ def process(log):
         # print scenarios
         scenarios = []
         for m in range(j - 3, max(0, j - 100), -1):
-          match = re.search('^\s+\d+\s+\*\s+', lines[m])
+          match = log_util.Patterns.HEARTBEAT_LN.search(lines[m])
           if match:
             scenarios.append(lines[m])
           if lines[m].startswith('Scene'):
             break
         for l in reversed(scenarios):
-          print l
+          print(l)
 
       for k in range(j, ln_fo, -1):
         if lines[k].startswith('START_FUNC'):
-          match = re.search('ELAPSE:\s+(\d+) s', lines[k])
+          match = log_util.Patterns.ELAPSE.search(lines[k])
           if match:
             if cnt == 1:
               t1 = int(match.group(1))
@@ -63,7 +63,7 @@ def process(log):
 
   ok = True
 
-  match = re.search('    \*   \*\s+(\S+)\s+(\S+)\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+(\S+)\s+\S+\s+\S+\s+(\S+)\s+\S+\s+(\S+)\s+(\S+)', hb1)
+  match = re.search(r'    \*   \*\s+(\S+)\s+(\S+)\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+(\S+)\s+\S+\s+\S+\s+(\S+)\s+\S+\s+(\S+)\s+(\S+)', hb1)
   if match:
     wns1 = match.group(1)
     tns1 = match.group(2)
@@ -74,7 +74,7 @@ def process(log):
   else:
     ok = False
 
-  match = re.search('    \*   \*\s+(\S+)\s+(\S+)\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+(\S+)\s+\S+\s+\S+\s+(\S+)\s+\S+\s+(\S+)\s+(\S+)', hb2)
+  match = re.search(r'    \*   \*\s+(\S+)\s+(\S+)\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+(\S+)\s+\S+\s+\S+\s+(\S+)\s+\S+\s+(\S+)\s+(\S+)', hb2)
   if match:
     wns2 = match.group(1)
     tns2 = match.group(2)
@@ -86,13 +86,13 @@ def process(log):
     ok = False
 
   if ok:
-    print "runtime", t1, t2
-    print "wns", wns1, wns2
-    print "tns", tns1, tns2
-    print "maxtran", maxtran1, maxtran2
-    print "area", area1, area2
-    print "buf", buf1, buf2
-    print "inv", inv1, inv2
+    print("runtime", t1, t2)
+    print("wns", wns1, wns2)
+    print("tns", tns1, tns2)
+    print("maxtran", maxtran1, maxtran2)
+    print("area", area1, area2)
+    print("buf", buf1, buf2)
+    print("inv", inv1, inv2)
 
 
   return
@@ -105,7 +105,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -35,7 +35,7 @@ def process(log):
     elif 'Main Graph Rejection Count' in line:
       cnt_mrj = line.split('=')[1].strip()
 
-  print "sum-sbo", cnt_at, cnt_xac, cnt_xrj, cnt_drj, cnt_mat, cnt_mrj
+  print("sum-sbo", cnt_at, cnt_xac, cnt_xrj, cnt_drj, cnt_mat, cnt_mrj)
 
 
   cnt_at = cnt_xac = cnt_xrj = cnt_drj = cnt_mat = cnt_mrj = -1
@@ -55,7 +55,7 @@ def process(log):
     elif 'Main Graph Rejection Count' in line:
       cnt_mrj = line.split('=')[1].strip()
 
-  print "sum-pbo-w", cnt_at, cnt_xac, cnt_xrj, cnt_drj, cnt_mat, cnt_mrj
+  print("sum-pbo-w", cnt_at, cnt_xac, cnt_xrj, cnt_drj, cnt_mat, cnt_mrj)
 
   cnt_at = cnt_xac = cnt_xrj = cnt_drj = cnt_mat = cnt_mrj = -1
   ln_pbo_t = log_util.get_next_ln_starts_with(lines, ln_pbo_w, '    TNS Optimization Summary')
@@ -74,7 +74,7 @@ def process(log):
     elif 'Main Graph Rejection Count' in line:
       cnt_mrj = line.split('=')[1].strip()
 
-  print "sum-pbo-t", cnt_at, cnt_xac, cnt_xrj, cnt_drj, cnt_mat, cnt_mrj
+  print("sum-pbo-t", cnt_at, cnt_xac, cnt_xrj, cnt_drj, cnt_mat, cnt_mrj)
 
   return
 
@@ -86,7 +86,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
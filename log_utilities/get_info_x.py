@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -18,7 +18,7 @@ def do_work(lines, ln, record):
       continue
 
     at = ac = rj = rt = -1
-    match = re.search('ROPTSTATS:\s+(\S+)\s+attempt=(\d+)\s+pass=(\d+)\s+fail=(\d+)\s+cpu=(\S+)\s+(\S+)', line)
+    match = re.search(r'ROPTSTATS:\s+(\S+)\s+attempt=(\d+)\s+pass=(\d+)\s+fail=(\d+)\s+cpu=(\S+)\s+(\S+)', line)
     if match:
       t = match.group(1)
       at = match.group(2)
@@ -65,9 +65,9 @@ def process(log):
       vat, vac, vrj, vrt = record[x]['valid']
       eat, eac, erj, ert = record[x]['estimate']
       rat, rac, rrj, rrt = record[x]['run']
-      print x, vat, vac, vrj, vrt, eat, eac, erj, ert, rat, rac, rrj, rrt
+      print(x, vat, vac, vrj, vrt, eat, eac, erj, ert, rat, rac, rrj, rrt)
     else:
-      print x
+      print(x)
 
   return
 
@@ -79,7 +79,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -16,10 +16,10 @@ import icc2_log_utilities as log_util
 def process(log):
 
   # Match patterns here
-  pattern = "Scenario Mapping Table\n((\d[^\n]*\n)*)\n"
+  pattern = r"Scenario Mapping Table\n((\d[^\n]*\n)*)\n"
   match = re.search(pattern, log)
   if match:
-    print match.group(1)
+    print(match.group(1))
 
   return
 
@@ -31,7 +31,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -24,7 +24,7 @@ def process(log):
   t1 = log_util.get_elapse_time(lines, ln_fo, forward=True)
   t2 = log_util.get_elapse_time(lines, ln_lgl1, forward=False)
 
-  print t2 - t1
+  print(t2 - t1)
 
   return
 
@@ -36,7 +36,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 ICC2 log file processing utilities
@@ -8,8 +8,15 @@ Created on Oct 12, 2017
 
 import sys
 import os
-import gzip
 import re
+import bisect
+
+# Shared parsing helpers live in the log viewer
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'icc2_log_viewer'))
+import icc2_log_viewer as V
+
+# Compiled patterns shared with the log viewer
+Patterns = V.Patterns
 
 
 ###############################################################################
@@ -18,32 +25,93 @@ import re
 ###############################################################################
 def load_log_file(log_path):
   if not os.path.exists(log_path) or not os.path.isfile(log_path):
-    print 'Error: Cannot access log file', log_path
+    print('Error: Cannot access log file', log_path)
     return ''
 
-  log = ''
-  if log_path.endswith('.gz'):
-    logFileObj = open(log_path, 'r')
-    decompressedFile = gzip.GzipFile(fileobj=logFileObj) #gunzip
-    log = decompressedFile.read()
-    logFileObj.close()
-  else:
-    logFileObj = open(log_path, 'r')
-    log = logFileObj.read()
-    logFileObj.close()
+  # gzip, zstd or lz4 compressed logs are detected by magic bytes
+  logFileObj = open(log_path, 'rb')
+  log = V.decode_text(V.Compression.open(logFileObj, V.Compression.detect(log_path)).read())
+  logFileObj.close()
 
   return log
 
 
+###############################################################################
+# Author: Deyuan Guo
+# Note: Return lines [begin_ln, end_ln) of a log file as a list. Negative line
+#       numbers count from the end, e.g. -1000 for the last 1000 lines. Only
+#       the frames or gzip checkpoints holding the lines are decompressed if the
+#       log is seekable (see icc2_log_recompressor.py)
+###############################################################################
+def load_log_lines(log_path, begin_ln=0, end_ln=None):
+  if not os.path.exists(log_path) or not os.path.isfile(log_path):
+    print('Error: Cannot access log file', log_path)
+    return []
+
+  logFileObj = open(log_path, 'rb')
+  stream = V.LogStream.open(logFileObj, V.Compression.detect(log_path))
+  if begin_ln < 0 or end_ln != None and end_ln < 0:
+    if stream.index == None:
+      logFileObj.close()
+      return load_log_file(log_path).split('\n')[begin_ln:end_ln]
+    if begin_ln < 0:
+      begin_ln = max(0, stream.index.num_lines + begin_ln)
+    if end_ln != None and end_ln < 0:
+      end_ln = max(0, stream.index.num_lines + end_ln)
+
+  lines = []
+  stream.skip_to(begin_ln)
+  ln = stream.first_ln
+  for chunk in stream.read_chunks():
+    end = len(chunk)
+    if end_ln != None:
+      end = max(0, min(end, end_ln - ln))
+    lines += chunk[max(0, begin_ln - ln):end]
+    ln += len(chunk)
+    if end_ln != None and ln >= end_ln:
+      break
+  stream.close()
+  logFileObj.close()
+  return lines
+
+
+###############################################################################
+# Author: Deyuan Guo
+# Note: Find lines starting with any of the prefixes in a single pass, return
+#       a dict of prefix -> list of line numbers. Pass it to
+#       get_next_ln_starts_with as line_index to avoid rescanning lines
+###############################################################################
+def index_lines_starting_with(lines, prefixes):
+  index = V.TriggerIndex([(prefix, prefix) for prefix in prefixes])
+  line_index = dict((prefix, []) for prefix in prefixes)
+  for i in range(len(lines)):
+    if lines[i][:1] in index.table:
+      for prefix in index.match(lines[i]):
+        line_index[prefix].append(i)
+  return line_index
+
+
 ###############################################################################
 # Author: Deyuan Guo
 # Note: From line number start_ln, find the line number of the next line
 #       starting with line_prefix
 ###############################################################################
-def get_next_ln_starts_with(lines, start_ln, line_prefix, forward=True):
+def get_next_ln_starts_with(lines, start_ln, line_prefix, forward=True, line_index=None):
   if type(lines) != list or start_ln == None:
     return None
 
+  if line_index != None and line_prefix in line_index:
+    lns = line_index[line_prefix]
+    if forward == True:
+      k = bisect.bisect_left(lns, start_ln)
+      if k < len(lns):
+        return lns[k]
+    else:
+      k = bisect.bisect_right(lns, start_ln) - 1
+      if k >= 0 and lns[k] > 0:
+        return lns[k]
+    return None
+
   if forward == True:
     for i in range(start_ln, len(lines)):
       if lines[i].startswith(line_prefix):
@@ -56,29 +124,40 @@ def get_next_ln_starts_with(lines, start_ln, line_prefix, forward=True):
   return None
 
 
+###############################################################################
+# Author: Deyuan Guo
+# Note: Index ELAPSE time stamps of START/END_CMD/FUNC lines in a single pass.
+#       Pass it to get_elapse_time as time_index to avoid rescanning lines
+###############################################################################
+def index_elapse_time(lines):
+  return V.TimeIndex.build(lines)
+
+
 ###############################################################################
 # Author: Deyuan Guo
 # Note: From line number start_ln, find the nearest ELAPSE time
 ###############################################################################
-def get_elapse_time(lines, start_ln, forward=True):
+def get_elapse_time(lines, start_ln, forward=True, time_index=None):
   if type(lines) != list or start_ln == None:
     return 0
 
+  if time_index == None:
+    time_index = V.TimeIndex()
+    if forward:
+      for i in range(start_ln, len(lines)):
+        if lines[i].startswith(V.TimeIndex.PREFIXES) and time_index.add(i, lines[i]):
+          break
+    else:
+      for i in range(start_ln, 0, -1):
+        if lines[i].startswith(V.TimeIndex.PREFIXES) and time_index.add(i, lines[i]):
+          break
+
   if forward:
-    for i in range(start_ln, len(lines)):
-      if (lines[i].startswith('START_CMD:') or lines[i].startswith('END_CMD:') or
-          lines[i].startswith('START_FUNC:') or lines[i].startswith('END_FUNC:')):
-        match = re.search('ELAPSE:\s+(\d+) s', lines[i])
-        if match:
-          return int(match.group(1))
+    k = time_index.find_next(start_ln)
   else:
-    for i in range(start_ln, 0, -1):
-      if (lines[i].startswith('START_CMD:') or lines[i].startswith('END_CMD:') or
-          lines[i].startswith('START_FUNC:') or lines[i].startswith('END_FUNC:')):
-        match = re.search('ELAPSE:\s+(\d+) s', lines[i])
-        if match:
-          return int(match.group(1))
-
+    k = time_index.find_prev(start_ln, 0)
+  if k >= 0:
+    return time_index.elapsed[k]
   return 0
 
 ###############################################################################
@@ -175,3 +254,10 @@ def parse_heartbeat(line):
   return qor
 
 
+###############################################################################
+# Author: Deyuan Guo
+# Note: Convert elapsed time 'hh:mm:ss' of a heartbeat to seconds, None if
+#       it is not a time
+###############################################################################
+def elapsed_to_seconds(elapsed):
+  return V.M_qor.to_seconds(elapsed)
@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -17,24 +17,27 @@ def process(log):
 
   # Match patterns here
   lines = log.split('\n')
+  line_index = log_util.index_lines_starting_with(lines, ['START_CMD: clock_opt', 'END_CMD: clock_opt'])
+  time_index = log_util.index_elapse_time(lines)
 
-  print 'runtime',
+  print('runtime', end='')
 
   ln_start = 0
   while True:
 
-    ln1 = log_util.get_next_ln_starts_with(lines, ln_start, 'START_CMD: clock_opt')
+    ln1 = log_util.get_next_ln_starts_with(lines, ln_start, 'START_CMD: clock_opt', line_index=line_index)
     if ln1 == ln_start:
       break
-    t1 = log_util.get_elapse_time(lines, ln1, forward=True)
+    t1 = log_util.get_elapse_time(lines, ln1, forward=True, time_index=time_index)
 
-    ln2 = log_util.get_next_ln_starts_with(lines, ln1, 'END_CMD: clock_opt')
+    ln2 = log_util.get_next_ln_starts_with(lines, ln1, 'END_CMD: clock_opt', line_index=line_index)
     if ln2 == ln1:
       break
-    t2 = log_util.get_elapse_time(lines, ln2, forward=True)
+    t2 = log_util.get_elapse_time(lines, ln2, forward=True, time_index=time_index)
 
-    print t1, t2,
+    print('', t1, t2, end='')
     ln_start = ln2
+  print()
 
   return
 
@@ -46,7 +49,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
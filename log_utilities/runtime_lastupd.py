@@ -1,4 +1,4 @@
-#!/remote/us01home46/dguo/bin/python
+#!/remote/us01home46/dguo/bin/python3
 # -*- coding: utf-8 -*-
 """
 Template for extracting information from an ICC2 log file
@@ -18,7 +18,7 @@ def process(log):
   # Match patterns here
   lines = log.split('\n')
 
-  print 'runtime',
+  print('runtime', end='')
 
   ln_start = 0
   while True:
@@ -33,9 +33,10 @@ def process(log):
       break
     t2 = log_util.get_elapse_time(lines, ln2, forward=True)
 
-    print t1, t2,
+    print('', t1, t2, end='')
     ln_start = ln2
     break
+  print()
 
   return
 
@@ -47,7 +48,7 @@ if __name__ ==  '__main__':
   sys.tracebacklimit = 1
 
   if len(sys.argv) != 2:
-    print 'Usage: script <log>'
+    print('Usage: script <log>')
     exit(0)
 
   log = log_util.load_log_file(sys.argv[1])
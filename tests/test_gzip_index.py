@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpoint indexes of .gz logs give the same lines as the plain text
+"""
+
+import gzip
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'log_utilities'))
+import icc2_log_utilities as U
+V = U.V
+
+
+def make_text(num_lines):
+  rnd = random.Random(num_lines)
+  words = ['place_opt', 'Information:', 'ELAPSE:', 'MEM-PEAK:', 'WNS', 'TNS', '(NDM-099)', '*']
+  lines = []
+  for i in range(num_lines):
+    fields = [rnd.choice(words) for _ in range(rnd.randint(0, 12))]
+    lines.append(' '.join(fields) + ' u_core/reg_%d %.4f' % (i, rnd.random()))
+  return '\n'.join(lines) + '\n'
+
+
+def single_member(text):
+  return gzip.compress(text.encode(), 6)
+
+
+# members of about 300k text that do not always end a line, some of them stored
+def multi_member(text):
+  data = text.encode()
+  members = []
+  for k, begin in enumerate(range(0, len(data), 300000)):
+    members.append(gzip.compress(data[begin:begin + 300000], 0 if k == 2 else 9))
+  return b''.join(members)
+
+
+@pytest.fixture(autouse=True)
+def small_checkpoints(monkeypatch):
+  monkeypatch.setattr(V.GzipIndex, 'CHECKPOINT_SIZE', 1 << 17)
+  monkeypatch.setattr(V.GzipReader, 'BLOCK_SIZE', 1 << 14)
+
+
+@pytest.mark.parametrize('compress', [single_member, multi_member])
+def test_load_log_lines_from_checkpoints(tmp_path, compress):
+  text = make_text(40000)
+  lines = text.split('\n')
+  path = str(tmp_path / 'place_opt.out.gz')
+  with open(path, 'wb') as f:
+    f.write(compress(text))
+
+  index = V.GzipIndex.build(path)
+  index.save(path)
+  index = V.GzipIndex.load(path)
+  assert index != None
+  assert index.num_lines == len(lines)
+  assert len(index.offsets) > 4
+  assert any(end != 0 for end in index.ends) # inside a member
+
+  for k in range(len(index.offsets)):
+    ln = index.lines[k]
+    assert U.load_log_lines(path, ln, ln + 3000) == lines[ln:ln + 3000]
+  assert U.load_log_lines(path, -1500) == lines[-1500:]
+  assert U.load_log_lines(path, -5, -1) == lines[-5:-1]